@@ -0,0 +1,4 @@
+"""
+NYC Congestion Pricing Audit - analysis pipeline
+Builds the artifacts under outputs/ that dashboard.py displays
+"""
@@ -0,0 +1,20 @@
+"""
+Atomic artifact writes
+Artifacts are read by the dashboard while a build may be rewriting them, so
+each is written to a temporary file next to it and moved into place.
+"""
+
+import numpy as np
+
+
+def atomic_savez(path, **arrays):
+    """Save arrays as a compressed .npz, replacing path only once the file is complete"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        tmp_path.replace(path)
+    finally:
+        # Only left behind when writing failed
+        tmp_path.unlink(missing_ok=True)
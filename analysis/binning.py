@@ -0,0 +1,50 @@
+"""
+Fixed-grid 2D histograms for Tab 3
+Surcharge vs tip percentage is reduced to a constant-size grid of trip counts,
+so the correlation plot costs the same to store and draw for any trip volume.
+"""
+
+import numpy as np
+
+from analysis.artifacts import atomic_savez
+from analysis.config import AFTER_YEAR, TAXI_TYPES
+
+# Uniform bin edges; values outside the range are counted in the edge bins
+SURCHARGE_EDGES = np.linspace(0, 5, 21)
+TIP_PCT_EDGES = np.linspace(0, 100, 51)
+
+
+def bin_index(values, edges):
+    """Bin number of each value on a uniform grid, clipped to the outer bins"""
+    n_bins = len(edges) - 1
+    width = (edges[-1] - edges[0]) / n_bins
+    return np.clip(np.floor((values - edges[0]) / width), 0, n_bins - 1).astype(np.int64)
+
+
+def hist2d(x, y, x_edges=SURCHARGE_EDGES, y_edges=TIP_PCT_EDGES):
+    """Trip counts per (x bin, y bin) via a single bincount"""
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    cells = bin_index(x, x_edges) * ny + bin_index(y, y_edges)
+    return np.bincount(cells, minlength=nx * ny).reshape(nx, ny)
+
+
+def tip_density(grouped, year=AFTER_YEAR):
+    """(taxi_type, surcharge bin, tip % bin) count grid for one year"""
+    shape = (len(TAXI_TYPES), len(SURCHARGE_EDGES) - 1, len(TIP_PCT_EDGES) - 1)
+    counts = np.zeros(shape, dtype=np.int64)
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        if (taxi_type, year) in grouped:
+            counts[t] = grouped[(taxi_type, year)][1]["tip_hist"]
+    return counts
+
+
+def write_tip_density(counts, year, path):
+    """Save the density grids with their bin edges as a compressed .npz"""
+    atomic_savez(
+        path,
+        year=np.array(year),
+        taxi_types=np.array(TAXI_TYPES),
+        surcharge_edges=SURCHARGE_EDGES,
+        tip_pct_edges=TIP_PCT_EDGES,
+        counts=counts.astype(np.int64),
+    )
@@ -0,0 +1,160 @@
+"""
+Bootstrap confidence intervals for the Tab 2 / Tab 3 headline metrics
+Resamples small per-unit aggregates instead of trips: speed sums and counts per
+(month, day of week, hour) congestion-zone cell for the velocity deltas, and
+surcharge / tip moments per pickup day for the tip correlation. Each replicate
+is a row of draw counts, so a whole batch of replicates reduces to one matrix
+product; batches are spread over a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from analysis.config import AFTER_YEAR, TAXI_TYPES
+from analysis.moments import C_XY, M2_X, M2_Y, MEAN_X, MEAN_Y, N, collapse
+from analysis.scheduler import default_workers
+from analysis.velocity import YEARS
+
+REPLICATES = 10_000
+CONFIDENCE = 0.95
+SEED = 20250105
+
+# Replicates per pool task; fixed so the intervals do not depend on the worker count
+CHUNK_SIZE = 1_000
+
+# What one resampled unit is, recorded next to the intervals
+VELOCITY_UNIT = "month x day-of-week x hour cell"
+TIP_UNIT = "pickup day"
+
+
+def draw_counts(rng, n_units, replicates):
+    """(replicates, n_units) matrix of how often each unit is drawn in each replicate"""
+    draws = rng.integers(0, n_units, size=(replicates, n_units))
+    rows = np.arange(replicates)[:, None] * n_units
+    return np.bincount((draws + rows).ravel(), minlength=replicates * n_units).reshape(replicates, n_units)
+
+
+def ratio_replicates(units, seed, replicates):
+    """Resampled sum(numerator) / sum(denominator) for (n_units, 2) units"""
+    weights = draw_counts(np.random.default_rng(seed), len(units), replicates).astype(np.float64)
+    totals = weights @ units
+    return totals[:, 0] / totals[:, 1]
+
+
+def moments_replicates(units, seed, replicates):
+    """Resampled (pearson r, OLS slope) for (n_units, 6) centred power sums"""
+    weights = draw_counts(np.random.default_rng(seed), len(units), replicates).astype(np.float64)
+    n, sx, sy, sxx, syy, sxy = (weights @ units).T
+    mean_x, mean_y = sx / n, sy / n
+    var_x, var_y = sxx / n - mean_x ** 2, syy / n - mean_y ** 2
+    cov = sxy / n - mean_x * mean_y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.column_stack([cov / np.sqrt(var_x * var_y), cov / var_x])
+
+
+@contextmanager
+def bootstrap_pool(workers=None):
+    """Process pool for the replicate batches, or None to run them in-process"""
+    workers = workers or default_workers()
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+
+def replicate(pool, statistic, units, seed, replicates=REPLICATES):
+    """Run a replicate statistic in fixed-size batches, each with its own child seed"""
+    sizes = [min(CHUNK_SIZE, replicates - start) for start in range(0, replicates, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = (pool.map if pool else map)(statistic, [units] * len(sizes), seeds, sizes)
+    return np.concatenate(list(batches))
+
+
+def interval(values, confidence=CONFIDENCE):
+    """Percentile interval [low, high] of the replicates along the first axis"""
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(values, [tail, 100 - tail], axis=0)
+    return [float(low), float(high)] if np.ndim(low) == 0 else np.column_stack([low, high]).tolist()
+
+
+def velocity_units(speed_sum, trip_count):
+    """(n_cells, 2) speed sum / trip count units, dropping cells without trips"""
+    speed_sum, trip_count = speed_sum.ravel(), trip_count.ravel()
+    kept = trip_count > 0
+    return np.column_stack([speed_sum[kept], trip_count[kept]]).astype(np.float64)
+
+
+def velocity_intervals(cells, pool=None, replicates=REPLICATES):
+    """Intervals of the speed change per taxi type and combined, from velocity_cells output
+
+    The two years are resampled independently; the combined change is the mean
+    of the per-type changes within each replicate, as in velocity_summary.
+    """
+    changes = {}
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        counts = cells["trip_count"][t].sum(axis=(1, 2, 3))
+        if (counts == 0).any():
+            continue
+        before, after = (
+            replicate(pool, ratio_replicates, velocity_units(cells["speed_sum"][t, y], cells["trip_count"][t, y]),
+                      [SEED, t, y], replicates)
+            for y in range(len(YEARS))
+        )
+        changes[taxi_type] = {"change_mph": after - before, "change_pct": (after - before) / before * 100}
+    if not changes:
+        return None
+    intervals = {
+        taxi_type: {key: interval(values) for key, values in change.items()} for taxi_type, change in changes.items()
+    }
+    combined = {key: interval(np.mean([change[key] for change in changes.values()], axis=0))
+                for key in ("change_mph", "change_pct")}
+    return {"taxi_types": intervals, "combined": combined}
+
+
+def tip_units(day_moments):
+    """(n_days, 6) power sums per day, centred on the overall means so they cannot cancel"""
+    day_moments = day_moments[day_moments[:, N] > 0]
+    total = collapse(day_moments)
+    n = day_moments[:, N]
+    dx = day_moments[:, MEAN_X] - total[MEAN_X]
+    dy = day_moments[:, MEAN_Y] - total[MEAN_Y]
+    return np.column_stack([
+        n, n * dx, n * dy,
+        day_moments[:, M2_X] + n * dx * dx,
+        day_moments[:, M2_Y] + n * dy * dy,
+        day_moments[:, C_XY] + n * dx * dy,
+    ])
+
+
+def tip_intervals(grouped, pool=None, year=AFTER_YEAR, replicates=REPLICATES):
+    """Intervals of the surcharge vs tip correlation and slope per taxi type"""
+    intervals = {}
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        if (taxi_type, year) not in grouped:
+            continue
+        units = tip_units(grouped[(taxi_type, year)][1]["tip_day_moments"])
+        if len(units) < 2:
+            continue
+        correlation, slope = interval(replicate(pool, moments_replicates, units, [SEED, t, year], replicates))
+        intervals[taxi_type] = {"correlation": correlation, "slope": slope}
+    return {"taxi_types": intervals} if intervals else None
+
+
+def bootstrap_info(unit, replicates=REPLICATES):
+    """How the intervals of a results section were computed"""
+    return {"method": "percentile", "confidence": CONFIDENCE, "replicates": replicates, "unit": unit}
+
+
+def add_intervals(section, intervals, unit, replicates=REPLICATES):
+    """Attach intervals to the matching entries of a results section as "ci" fields"""
+    for taxi_type, ci in intervals["taxi_types"].items():
+        if taxi_type in section["taxi_types"]:
+            section["taxi_types"][taxi_type]["ci"] = ci
+    if "combined" in intervals and "combined" in section:
+        section["combined"]["ci"] = intervals["combined"]
+    section["bootstrap"] = bootstrap_info(unit, replicates)
+    return section
+
@@ -0,0 +1,73 @@
+"""
+Border effect engine for Tab 1
+Per-zone % change in drop-offs between Q1 2024 and Q1 2025, computed from the
+per-month DOLocationID bincounts stored in the partial aggregates.
+"""
+
+import numpy as np
+
+from analysis.border_zones import load_border_zone_ids
+from analysis.config import AFTER_YEAR, BEFORE_YEAR, COMPARISON_MONTHS, CONGESTION_ZONE_IDS, load_zone_names
+
+
+def period_dropoffs(partial, months=COMPARISON_MONTHS):
+    """Total drop-offs per zone over the given months"""
+    return partial["dropoff_zone_counts"][[m - 1 for m in months]].sum(axis=0)
+
+
+def zone_changes(before, after, zone_ids):
+    """Vectorised % change per zone, skipping zones with no drop-offs before
+
+    Returns (zone_ids, pct_change) as numpy arrays.
+    """
+    zones = np.asarray(zone_ids)
+    before, after = before[zones].astype(np.float64), after[zones].astype(np.float64)
+    valid = before > 0
+    return zones[valid], (after[valid] - before[valid]) / before[valid] * 100
+
+
+def summarize(zones, changes, zone_names, border_ids):
+    """Headline figures shown in the Tab 1 findings cards"""
+    border = np.isin(zones, border_ids)
+    border_idx = np.flatnonzero(border)
+
+    def zone_entry(i):
+        zone = int(zones[i])
+        return {"zone_id": zone, "zone": zone_names.get(zone, f"Zone {zone}"), "pct_change": float(changes[i])}
+
+    return {
+        "avg_change": float(changes.mean()),
+        "border_avg_change": float(changes[border].mean()) if border.any() else 0.0,
+        "zones_analyzed": int(len(zones)),
+        "border_zones": int(border.sum()),
+        # Extremes over every analysed zone (congestion and border)
+        "max_increase": zone_entry(int(np.argmax(changes))),
+        "max_decrease": zone_entry(int(np.argmin(changes))),
+        # Extremes over the border zones only, None when none had drop-offs before
+        "border_max_increase": zone_entry(border_idx[np.argmax(changes[border])]) if border.any() else None,
+        "border_max_decrease": zone_entry(border_idx[np.argmin(changes[border])]) if border.any() else None,
+        "zones": {str(int(z)): float(c) for z, c in zip(zones, changes)},
+    }
+
+
+def border_effect(grouped):
+    """Border effect section of the results file from partials grouped by (taxi_type, year)"""
+    return border_effect_from_dropoffs({
+        key: period_dropoffs(partial) for key, (_, partial) in grouped.items() if key[1] in (BEFORE_YEAR, AFTER_YEAR)
+    })
+
+
+def border_effect_from_dropoffs(dropoffs):
+    """Border effect section from per-zone drop-off totals keyed by (taxi_type, year)"""
+    zone_names = load_zone_names()
+    border_ids = load_border_zone_ids()
+    analysis_ids = tuple(sorted(set(CONGESTION_ZONE_IDS) | set(border_ids)))
+    results = {}
+    for taxi_type in ("yellow", "green"):
+        if (taxi_type, BEFORE_YEAR) not in dropoffs or (taxi_type, AFTER_YEAR) not in dropoffs:
+            continue
+        zones, changes = zone_changes(dropoffs[(taxi_type, BEFORE_YEAR)], dropoffs[(taxi_type, AFTER_YEAR)],
+                                      analysis_ids)
+        if len(zones):
+            results[taxi_type] = summarize(zones, changes, zone_names, border_ids)
+    return {"before_year": BEFORE_YEAR, "after_year": AFTER_YEAR, "taxi_types": results}
@@ -0,0 +1,81 @@
+"""
+Taxi zones bordering the Congestion Relief Zone
+The border arm of Tabs 1 and 2 is every taxi zone whose shape touches the
+congestion zone, computed from the TLC taxi zone shapefile and stored as an
+artifact. Without the shapefile (or with an artifact built for another set of
+congestion zones) the hand-picked config.BORDER_ZONE_IDS are used.
+Run with: python -m analysis.border_zones
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import shapely
+
+from analysis.config import ARTIFACTS_DIR, BORDER_ZONE_IDS, CONGESTION_ZONE_IDS, ZONE_SHAPES_PATH
+
+BORDER_ZONES_PATH = ARTIFACTS_DIR / "border_zones.json"
+
+# Slack in feet (the shapefile's units) so digitising gaps between neighbouring edges still count as touching
+TOUCH_TOLERANCE_FT = 10.0
+
+
+def adjacent_zones(zones, zone_ids=CONGESTION_ZONE_IDS, tolerance=TOUCH_TOLERANCE_FT):
+    """LocationIDs of the zones outside zone_ids whose shapes touch their union"""
+    inside = zones["LocationID"].isin(zone_ids).to_numpy()
+    area = shapely.union_all(zones.geometry.values[inside]).buffer(tolerance)
+    touching = shapely.intersects(zones.geometry.values, area) & ~inside
+    return tuple(sorted(int(zone) for zone in zones["LocationID"].to_numpy()[touching]))
+
+
+def write_border_zones(border_ids, path=BORDER_ZONES_PATH):
+    """Write the border zones with the congestion zones they were computed for, atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"congestion_zone_ids": list(CONGESTION_ZONE_IDS), "border_zone_ids": list(border_ids)}, f, indent=1)
+    tmp_path.replace(path)
+
+
+def build_border_zones(shapes=ZONE_SHAPES_PATH, path=BORDER_ZONES_PATH):
+    """Recompute the border zones artifact from the shapefile; None when the shapefile is not downloaded"""
+    if not shapes.exists():
+        return None
+    # geopandas is only needed here, keep it out of every importer of this module
+    from analysis.zone_map import load_zones
+
+    border_ids = adjacent_zones(load_zones(shapes))
+    write_border_zones(border_ids, path)
+    return border_ids
+
+
+def load_border_zone_ids(path=BORDER_ZONES_PATH):
+    """Border zones from the artifact, or the hand-picked fallback if it is missing or stale"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return BORDER_ZONE_IDS
+    if tuple(artifact.get("congestion_zone_ids", ())) != CONGESTION_ZONE_IDS:
+        return BORDER_ZONE_IDS
+    return tuple(artifact["border_zone_ids"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the taxi zones touching the congestion zone")
+    parser.add_argument("--shapes", type=Path, default=ZONE_SHAPES_PATH, help="TLC taxi_zones shapefile")
+    args = parser.parse_args()
+
+    border_ids = build_border_zones(args.shapes)
+    if border_ids is None:
+        print(f"No shapefile at {args.shapes}; using the {len(BORDER_ZONE_IDS)} hand-picked border zones")
+        return
+    fallback = set(BORDER_ZONE_IDS)
+    print(f"Wrote {BORDER_ZONES_PATH}: {len(border_ids)} border zones")
+    print(f"  not in the hand-picked list: {sorted(set(border_ids) - fallback)}")
+    print(f"  hand-picked but not touching: {sorted(fallback - set(border_ids))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Incremental rebuild of the dashboard artifacts
+Only months whose source file is new or changed since the last build are
+rescanned; every other month is served from its saved partial aggregates.
+Run with: python -m analysis.build
+"""
+
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from analysis.binning import tip_density, write_tip_density
+from analysis.border import border_effect
+from analysis.border_zones import BORDER_ZONES_PATH, adjacent_zones, write_border_zones
+from analysis.bootstrap import (
+    REPLICATES, TIP_UNIT, VELOCITY_UNIT, add_intervals, bootstrap_pool, tip_intervals, velocity_intervals,
+)
+from analysis.config import (
+    AFTER_YEAR, ARTIFACTS_DIR, BEFORE_YEAR, COMPARISON_MONTHS, MANIFEST_PATH, PARTIALS_DIR, RAW_DATA_DIR,
+    RESULTS_PATH, VISUALIZATIONS_DIR, ZONE_SHAPES_PATH,
+)
+from analysis.daily_index import DAILY_INDEX_PATH, build_daily_index, write_daily_index
+from analysis.did import diff_in_diff
+from analysis.ghost_trips import ghost_summary
+from analysis.ingest import daily_counts_frame
+from analysis.manifest import (
+    advance_watermark, load_manifest, record_artifact, record_source, save_manifest, source_is_current,
+)
+from analysis.partials import PARTIAL_VERSION, load_partial, merge_partials, save_partial
+from analysis.rain import rain_from_files
+from analysis.results import update_results
+from analysis.scheduler import run_partitions
+from analysis.tips import monthly_tip_frame, tip_crowding
+from analysis.toll import toll_summary
+from analysis.trips import prune_cache
+from analysis.validation import validation_summary
+from analysis.velocity import cube_from_cells, velocity_cells, velocity_summary, write_velocity_cube
+
+SOURCE_PATTERN = re.compile(r"^(yellow|green)_tripdata_(\d{4})-(\d{2})\.parquet$")
+
+
+def discover_sources(raw_dir=RAW_DATA_DIR):
+    """(taxi_type, year, month, path) for every monthly TLC file on disk"""
+    sources = []
+    for path in sorted(raw_dir.glob("*_tripdata_*.parquet")):
+        match = SOURCE_PATTERN.match(path.name)
+        if match:
+            sources.append((match.group(1), int(match.group(2)), int(match.group(3)), path))
+    return sources
+
+
+def partial_path(taxi_type, year, month):
+    """Where the partial aggregates of one monthly file are stored"""
+    return PARTIALS_DIR / f"{taxi_type}_{year}-{month:02d}.npz"
+
+
+def stale_sources(manifest, sources, force=False):
+    """Sources whose partial is missing, outdated or was built from different file contents"""
+    stale = []
+    for taxi_type, year, month, path in sources:
+        entry = manifest["sources"].get(path.name)
+        if (
+            force
+            or not entry
+            or entry.get("partial_version") != PARTIAL_VERSION
+            or not partial_path(taxi_type, year, month).exists()
+            or not source_is_current(entry, path)
+        ):
+            stale.append((taxi_type, year, month, path))
+    return stale
+
+
+def refresh_partials(manifest, sources, force=False, workers=None, use_cache=True):
+    """Recompute partials for new or changed months only, returning what was rebuilt"""
+    stale = stale_sources(manifest, sources, force)
+    for (taxi_type, year, month, path), partial in run_partitions(stale, workers, use_cache):
+        print(f"Scanned {path.name}")
+        target = partial_path(taxi_type, year, month)
+        save_partial(partial, target)
+        record_source(manifest, path.name, path, target.name, PARTIAL_VERSION)
+        advance_watermark(manifest, taxi_type, year, month)
+    return stale
+
+
+def group_partials(sources):
+    """Load saved partials grouped by (taxi_type, year) with their source names
+
+    Each partial is folded into its group as it is loaded, so only one month
+    is held besides the running totals.
+    """
+    grouped = {}
+    for taxi_type, year, month, path in sources:
+        partial = load_partial(partial_path(taxi_type, year, month))
+        if (taxi_type, year) in grouped:
+            names, merged = grouped[(taxi_type, year)]
+            grouped[(taxi_type, year)] = (names + [path.name], merge_partials([merged, partial]))
+        else:
+            grouped[(taxi_type, year)] = ([path.name], partial)
+    return grouped
+
+
+def year_sources(grouped, year):
+    """Source files of one calendar year"""
+    return [name for (_, source_year), (names, _) in grouped.items() if source_year == year for name in names]
+
+
+def comparison_sources(grouped):
+    """Source files of the before/after comparison months"""
+    sources = []
+    for (_, year), (names, _) in grouped.items():
+        if year in (BEFORE_YEAR, AFTER_YEAR):
+            sources += [name for name in names if int(SOURCE_PATTERN.match(name).group(3)) in COMPARISON_MONTHS]
+    return sources
+
+
+def add_bootstrap_intervals(sections, grouped, cells, replicates, workers=None):
+    """Attach bootstrap confidence intervals to the velocity and tip crowding sections"""
+    start = time.perf_counter()
+    with bootstrap_pool(workers) as pool:
+        velocity = velocity_intervals(cells, pool, replicates)
+        if velocity and "velocity" in sections:
+            add_intervals(sections["velocity"], velocity, VELOCITY_UNIT, replicates)
+        tips = tip_intervals(grouped, pool, replicates=replicates)
+        if tips and "tip_crowding" in sections:
+            add_intervals(sections["tip_crowding"], tips, TIP_UNIT, replicates)
+    print(f"Bootstrap intervals ({replicates:,} replicates per metric) in {time.perf_counter() - start:.1f}s")
+
+
+def write_zone_artifacts(manifest, shapes=ZONE_SHAPES_PATH):
+    """Border zones and the Tab 1 choropleth zone map, from the taxi zone shapefile"""
+    # geopandas is only needed here, so builds without the shapefile never import it
+    from analysis.zone_map import ZONE_MAP_PATH, build_zone_map, load_zones, write_zone_map
+
+    zones = load_zones(shapes)
+    write_border_zones(adjacent_zones(zones))
+    write_zone_map(build_zone_map(zones))
+    for path in (BORDER_ZONES_PATH, ZONE_MAP_PATH):
+        record_artifact(manifest, path.name, [shapes.name])
+
+
+def write_artifacts(manifest, grouped, replicates=REPLICATES, workers=None):
+    """Write the merged CSV/.npz artifacts and return the results file sections"""
+    years = sorted({year for _, year in grouped})
+    for year in years:
+        if ("yellow", year) in grouped:
+            names, partial = grouped[("yellow", year)]
+            name = f"daily_taxi_trips_{year}_real.csv"
+            daily_counts_frame(partial["daily_counts"], year).to_csv(VISUALIZATIONS_DIR / name, index=False)
+            record_artifact(manifest, name, names)
+
+        frames, names = [], []
+        for taxi_type in ("yellow", "green"):
+            if (taxi_type, year) in grouped:
+                source_names, partial = grouped[(taxi_type, year)]
+                frames.append(monthly_tip_frame(taxi_type, year, partial))
+                names += source_names
+        name = f"tip_crowding_monthly_{year}.csv"
+        pd.concat(frames).to_csv(VISUALIZATIONS_DIR / name, index=False, float_format="%.4f")
+        record_artifact(manifest, name, names)
+
+    write_daily_index(build_daily_index(grouped))
+    record_artifact(manifest, DAILY_INDEX_PATH.name, [name for names, _ in grouped.values() for name in names])
+
+    sections = {}
+    tips = tip_crowding(grouped)
+    if tips["taxi_types"]:
+        sections["tip_crowding"] = tips
+        write_tip_density(tip_density(grouped), AFTER_YEAR, ARTIFACTS_DIR / "tip_density.npz")
+        record_artifact(manifest, "tip_density.npz", year_sources(grouped, AFTER_YEAR))
+
+    # Without the shapefile the border effect uses the hand-picked zones and Tab 1 the static maps
+    if ZONE_SHAPES_PATH.exists():
+        write_zone_artifacts(manifest)
+    border = border_effect(grouped)
+    if border["taxi_types"]:
+        sections["border_effect"] = border
+
+    cells = velocity_cells(grouped)
+    cube = cube_from_cells(cells)
+    write_velocity_cube(cube, ARTIFACTS_DIR / "velocity_cube.npz")
+    record_artifact(manifest, "velocity_cube.npz", comparison_sources(grouped))
+    velocity = velocity_summary(cube)
+    if velocity:
+        sections["velocity"] = velocity
+
+    if replicates:
+        add_bootstrap_intervals(sections, grouped, cells, replicates, workers)
+
+    did = diff_in_diff(grouped)
+    if did["outcomes"]["dropoffs"]:
+        sections["diff_in_diff"] = did
+
+    sections["ghost_trips"] = ghost_summary([partial for _, partial in grouped.values()])
+    sections["data_quality"] = validation_summary(grouped)
+    toll = toll_summary(grouped)
+    if toll["zone_trips"]:
+        sections["toll"] = toll
+
+    daily_path = VISUALIZATIONS_DIR / f"daily_taxi_trips_{AFTER_YEAR}_real.csv"
+    precipitation_path = VISUALIZATIONS_DIR / f"central_park_precipitation_{AFTER_YEAR}_real.csv"
+    if daily_path.exists() and precipitation_path.exists():
+        weather = rain_from_files(daily_path, precipitation_path)
+        if weather:
+            sections["weather"] = weather
+    return sections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally rebuild dashboard artifacts from TLC Parquet files")
+    parser.add_argument("--force", action="store_true", help="Rescan every source file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for scanning (default: one per core)")
+    parser.add_argument("--no-trip-cache", action="store_true",
+                        help="Decode the Parquet files directly instead of the cleaned-trips cache")
+    parser.add_argument("--replicates", type=int, default=REPLICATES,
+                        help="Bootstrap replicates for the confidence intervals (0 skips them)")
+    args = parser.parse_args()
+
+    manifest = load_manifest(MANIFEST_PATH)
+    sources = discover_sources()
+    if not sources:
+        print(f"No TLC files found in {RAW_DATA_DIR}")
+        return
+
+    rebuilt = refresh_partials(manifest, sources, force=args.force, workers=args.workers,
+                               use_cache=not args.no_trip_cache)
+    # Save the rescanned months now so a failure writing the artifacts does not force a full rescan
+    save_manifest(manifest, MANIFEST_PATH)
+    if not args.no_trip_cache:
+        for name in prune_cache(sources):
+            print(f"Removed cached trips for {name}")
+    print(f"Recomputed {len(rebuilt)} of {len(sources)} monthly partials")
+    # Merging saved partials is cheap, so artifacts are always rewritten from them
+    sections = write_artifacts(manifest, group_partials(sources), args.replicates, args.workers)
+    update_results(sections, manifest)
+    quality = sections["data_quality"]
+    broken = ", ".join(f"{rule} {count:,}" for rule, count in quality["rules"].items() if count)
+    print(f"Quarantined {quality['quarantined']:,} of {quality['rows']:,} rows" + (f" ({broken})" if broken else ""))
+    save_manifest(manifest, MANIFEST_PATH)
+    print(f"Updated {RESULTS_PATH.name}: {', '.join(sorted(sections))}")
+    print(f"Watermark: {manifest['watermark']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Shared paths and constants for the analysis pipeline
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Initialize paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+RAW_DATA_DIR = BASE_DIR / "data" / "raw"
+VISUALIZATIONS_DIR = BASE_DIR / "outputs" / "visualizations"
+ARTIFACTS_DIR = BASE_DIR / "outputs" / "artifacts"
+PARTIALS_DIR = ARTIFACTS_DIR / "partials"
+MANIFEST_PATH = ARTIFACTS_DIR / "manifest.json"
+RESULTS_PATH = BASE_DIR / "outputs" / "results.json"
+# Bump ZONE_MAP_VERSION whenever the zone map encoding changes; the dashboard ignores other versions
+ZONE_MAP_PATH = ARTIFACTS_DIR / "zone_map.json"
+ZONE_MAP_VERSION = 1
+ZONE_LOOKUP_PATH = RAW_DATA_DIR / "taxi_zone_lookup.csv"
+# TLC taxi_zones.zip, extracted: NAD83 / New York Long Island (EPSG:2263, US feet)
+ZONE_SHAPES_PATH = RAW_DATA_DIR / "taxi_zones" / "taxi_zones.shp"
+WEATHER_CACHE_DIR = BASE_DIR / "data" / "weather_cache"
+TRIPS_CACHE_DIR = BASE_DIR / "data" / "trips_cache"
+QUARANTINE_DIR = BASE_DIR / "data" / "quarantine"
+# Served by Streamlit at app/static/ (server.enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = BASE_DIR / "static"
+
+TAXI_TYPES = ("yellow", "green")
+
+# Pickup/dropoff timestamp columns differ between yellow (tpep) and green (lpep) files
+TIMESTAMP_COLUMNS = {
+    "yellow": ("tpep_pickup_datetime", "tpep_dropoff_datetime"),
+    "green": ("lpep_pickup_datetime", "lpep_dropoff_datetime"),
+}
+
+# Files before mid-2016 record pickup/drop-off coordinates instead of LocationIDs
+# (green files capitalise them: Pickup_longitude, ...)
+COORDINATE_COLUMNS = {
+    "PULocationID": ("pickup_longitude", "pickup_latitude"),
+    "DOLocationID": ("dropoff_longitude", "dropoff_latitude"),
+}
+
+# Rows per streamed batch - keeps a 3-4M row month well under 100 MB resident
+BATCH_SIZE = 262_144
+
+# TLC LocationIDs run 1-265 (264/265 = unknown), arrays are indexed by ID directly
+N_ZONES = 266
+
+# Congestion Relief Zone: Manhattan south of 60th St
+CONGESTION_ZONE_IDS = (
+    4, 12, 13, 45, 48, 50, 68, 79, 87, 88, 90, 100, 107, 113, 114, 125, 137, 144,
+    148, 158, 161, 162, 163, 164, 170, 186, 209, 211, 224, 229, 230, 231, 232, 233,
+    234, 246, 249, 261,
+)
+
+# Hand-picked zones around the congestion zone: Manhattan just north of 60th St and
+# the Brooklyn / Queens waterfront across the East River. Only a fallback - the
+# border arm is computed from the zone shapes by analysis.border_zones
+BORDER_ZONE_IDS = (
+    7, 33, 34, 43, 52, 65, 66, 112, 140, 141, 142, 143, 145, 146, 193, 195, 202,
+    217, 236, 237, 238, 239, 255, 256, 262, 263,
+)
+
+# Before/after comparison window: Q1 2024 vs Q1 2025 (toll started Jan 5, 2025)
+BEFORE_YEAR = 2024
+AFTER_YEAR = 2025
+COMPARISON_MONTHS = (1, 2, 3)
+TOLL_START = "2025-01-05"
+
+# Open-Meteo reference point for the rain analysis
+CENTRAL_PARK = (40.7812, -73.9665)
+
+# Trips faster than this are treated as implausible for city driving
+MAX_PLAUSIBLE_MPH = 65.0
+
+
+def tlc_path(taxi_type, year, month):
+    """Path of a monthly TLC trip record file"""
+    return RAW_DATA_DIR / f"{taxi_type}_tripdata_{year}-{month:02d}.parquet"
+
+
+def load_zone_names():
+    """LocationID -> zone name from the TLC lookup table, empty if it is not downloaded"""
+    if not ZONE_LOOKUP_PATH.exists():
+        return {}
+    lookup = pd.read_csv(ZONE_LOOKUP_PATH)
+    return dict(zip(lookup["LocationID"].astype(int), lookup["Zone"].astype(str)))
+
+
+def zone_lookup(zone_ids):
+    """Boolean array indexed by LocationID, True for the given zones"""
+    lookup = np.zeros(N_ZONES, dtype=bool)
+    lookup[list(zone_ids)] = True
+    return lookup
@@ -0,0 +1,165 @@
+"""
+Prefix-sum index for arbitrary date-range and zone filters
+Trips, congestion surcharge and CBD fee totals per (pickup day, pickup zone)
+are kept for the days that have trips, with the trips also split into rainy
+and dry days. Loading the index turns them into prefix sums along that day
+axis, so the total over any [start, end] window is cum[hi] - cum[lo] per zone,
+whatever the window length or trip volume; lo and hi are found by binary search
+over the stored days.
+Run with: python -m analysis.daily_index --start 2025-01-05 --end 2025-03-31 [--zone 161]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from analysis.artifacts import atomic_savez
+from analysis.config import ARTIFACTS_DIR, TAXI_TYPES, VISUALIZATIONS_DIR, load_zone_names
+
+DAILY_INDEX_PATH = ARTIFACTS_DIR / "daily_index.npz"
+
+# Summed measure -> partial field it is accumulated from
+MEASURES = {
+    "trips": "zone_daily_trips",
+    "surcharge": "zone_daily_surcharge",
+    "cbd_fee": "zone_daily_cbd_fee",
+}
+
+# Per-day arrays turned into prefix sums when the index is loaded
+SUMMED = (*MEASURES, "rainy_trips", "dry_trips")
+
+
+def precipitation_path(year):
+    """Central Park daily precipitation CSV written by analysis.weather"""
+    return VISUALIZATIONS_DIR / f"central_park_precipitation_{year}_real.csv"
+
+
+def daily_precipitation(days):
+    """Precipitation in mm on each of the given days, NaN where no weather data is available"""
+    precipitation = pd.Series(np.nan, index=pd.DatetimeIndex(days))
+    for year in sorted(set(precipitation.index.year)):
+        path = precipitation_path(year)
+        if not path.exists():
+            continue
+        frame = pd.read_csv(path, usecols=["date", "precipitation_mm"], parse_dates=["date"])
+        precipitation.update(frame.set_index("date")["precipitation_mm"])
+    return precipitation.to_numpy(np.float64)
+
+
+def build_daily_index(grouped):
+    """Per-day totals of every day with trips, in year order
+
+    Days without any trip (months not downloaded) are left out rather than
+    stored as zeros, so a stray old month adds a few dozen days, not years.
+    """
+    zone_trips = sum(partial["zone_daily_trips"].sum(axis=0) for _, partial in grouped.values())
+    # Only zones that ever had a pickup are kept on the zone axis
+    zone_ids = np.flatnonzero(zone_trips)
+
+    blocks = []
+    for year in sorted({year for _, year in grouped}):
+        parts = {taxi_type: grouped[(taxi_type, year)][1] for taxi_type in TAXI_TYPES if (taxi_type, year) in grouped}
+        n_days = len(next(iter(parts.values()))["zone_daily_trips"])
+        year_values = {measure: np.zeros((len(TAXI_TYPES), n_days, len(zone_ids))) for measure in MEASURES}
+        for taxi_type, partial in parts.items():
+            for measure, field in MEASURES.items():
+                year_values[measure][TAXI_TYPES.index(taxi_type)] = partial[field][:, zone_ids]
+        kept = np.flatnonzero(year_values["trips"].sum(axis=(0, 2)))
+        days = np.datetime64(f"{year}-01-01", "D") + kept
+        blocks.append((days, {measure: values[:, kept] for measure, values in year_values.items()}))
+
+    days = np.concatenate([days for days, _ in blocks])
+    daily = {measure: np.concatenate([values[measure] for _, values in blocks], axis=1) for measure in MEASURES}
+    precipitation = daily_precipitation(days)
+    rainy, dry = precipitation > 0, precipitation == 0
+    names = load_zone_names()
+    # Trip counts per zone and day fit int32; money is rounded to float32 (well under a cent per day)
+    return {
+        "taxi_types": np.array(TAXI_TYPES),
+        "days": days,
+        "zone_ids": zone_ids,
+        "zone_names": np.array([names.get(zone, f"Zone {zone}") for zone in zone_ids]),
+        "precipitation_mm": precipitation.astype(np.float32),
+        "trips": daily["trips"].astype(np.int32),
+        "surcharge": daily["surcharge"].astype(np.float32),
+        "cbd_fee": daily["cbd_fee"].astype(np.float32),
+        "rainy_trips": (daily["trips"] * rainy[None, :, None]).astype(np.int32),
+        "dry_trips": (daily["trips"] * dry[None, :, None]).astype(np.int32),
+    }
+
+
+def write_daily_index(index, path=DAILY_INDEX_PATH):
+    """Save the index atomically as a compressed .npz"""
+    atomic_savez(path, **index)
+
+
+def prefix_sum(daily):
+    """Cumulative sum along the day axis (axis 1) with a leading zero row, in 64-bit precision"""
+    cum = np.cumsum(daily, axis=1, dtype=np.int64 if daily.dtype.kind == "i" else np.float64)
+    return np.concatenate([np.zeros_like(cum[:, :1]), cum], axis=1)
+
+
+def load_daily_index(path=DAILY_INDEX_PATH):
+    """Read an index written by write_daily_index, with the per-day arrays as prefix sums"""
+    with np.load(path) as data:
+        index = {key: data[key] for key in data.files}
+    for name in SUMMED:
+        index[name] = prefix_sum(index[name])
+    precipitation = index["precipitation_mm"]
+    index["rainy_days"] = np.concatenate([[0], np.cumsum(precipitation > 0)])
+    index["dry_days"] = np.concatenate([[0], np.cumsum(precipitation == 0)])
+    return index
+
+
+def window_totals(index, start, end, taxi_types=TAXI_TYPES, zones=None):
+    """Totals over the inclusive [start, end] date window for the given taxi types and pickup zones
+
+    Each measure costs two rows of the prefix sums, independent of the window
+    length; zones=None means every zone. "days" counts the days with trips.
+    """
+    lo = int(np.searchsorted(index["days"], np.datetime64(start, "D"), side="left"))
+    hi = int(np.searchsorted(index["days"], np.datetime64(end, "D"), side="right"))
+    hi = max(hi, lo)
+    types = [list(index["taxi_types"]).index(taxi_type) for taxi_type in taxi_types]
+    columns = np.flatnonzero(np.isin(index["zone_ids"], zones)) if zones else np.arange(len(index["zone_ids"]))
+
+    totals = {}
+    for name in SUMMED:
+        rows = index[name][np.ix_(types, [lo, hi], columns)]
+        totals[name] = float((rows[:, 1] - rows[:, 0]).sum())
+    totals["days"] = hi - lo
+    totals["rainy_days"] = int(index["rainy_days"][hi] - index["rainy_days"][lo])
+    totals["dry_days"] = int(index["dry_days"][hi] - index["dry_days"][lo])
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the date-range / zone prefix-sum index")
+    parser.add_argument("--start", required=True, help="First pickup day (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="Last pickup day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--zone", type=int, action="append", help="Pickup LocationID (repeatable, default: all)")
+    parser.add_argument("--taxi-type", action="append", choices=TAXI_TYPES,
+                        help="Taxi type to include (repeatable, default: all)")
+    args = parser.parse_args()
+
+    if not DAILY_INDEX_PATH.exists():
+        print(f"No index at {DAILY_INDEX_PATH} - run python -m analysis.build first")
+        return
+    index = load_daily_index()
+    totals = window_totals(index, args.start, args.end, args.taxi_type or TAXI_TYPES, args.zone)
+    names = dict(zip(index["zone_ids"].tolist(), index["zone_names"]))
+    zones = ", ".join(names.get(zone, f"Zone {zone}") for zone in args.zone) if args.zone else "all zones"
+    print(f"{args.start} .. {args.end} ({totals['days']} days with trips), {zones}:")
+    print(f"  Trips:               {totals['trips']:,.0f}")
+    print(f"  Congestion surcharge ${totals['surcharge']:,.2f}")
+    print(f"  CBD fees             ${totals['cbd_fee']:,.2f}")
+    if totals["rainy_days"] and totals["dry_days"]:
+        rainy_avg = totals["rainy_trips"] / totals["rainy_days"]
+        dry_avg = totals["dry_trips"] / totals["dry_days"]
+        print(f"  Rainy days {totals['rainy_days']}: {rainy_avg:,.0f} trips/day | dry days {totals['dry_days']}: "
+              f"{dry_avg:,.0f} trips/day ({(rainy_avg - dry_avg) / dry_avg * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Difference-in-differences engine for Tabs 1 and 2
+Compares zones inside the congestion zone (and, as a second arm, the border
+zones) with every other taxi zone on a zone x hour x week panel built from the
+partial aggregates. Zone-hour and week-hour fixed effects are absorbed with
+sparse least squares, so no dense design matrix is ever formed, and standard
+errors are clustered by zone.
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import lsmr
+
+from analysis.config import (
+    AFTER_YEAR, BEFORE_YEAR, COMPARISON_MONTHS, CONGESTION_ZONE_IDS, TAXI_TYPES, TOLL_START, zone_lookup,
+)
+from analysis.border_zones import load_border_zone_ids
+from analysis.partials import N_WEEKS
+
+YEARS = (BEFORE_YEAR, AFTER_YEAR)
+
+# Every real zone (1-263, i.e. not unknown / outside NYC) outside the treatment arms is a control
+PANEL_ZONES = np.arange(1, 264)
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+# Convergence tolerance of the fixed-effect projections
+LSMR_TOL = 1e-10
+
+
+def treatment_arms():
+    """Zones of each treatment arm: the congestion zone and the zones bordering it"""
+    return {"congestion": CONGESTION_ZONE_IDS, "border": load_border_zone_ids()}
+
+
+def window_weeks(year, months=COMPARISON_MONTHS, start=None):
+    """Weeks (days since Jan 1 // 7) lying entirely inside the months of a year and on or after start"""
+    jan1 = np.datetime64(f"{year}-01-01", "D")
+    first = (np.datetime64(f"{year}-{min(months):02d}", "M").astype("datetime64[D]") - jan1).astype(np.int64)
+    end = ((np.datetime64(f"{year}-{max(months):02d}", "M") + 1).astype("datetime64[D]") - jan1).astype(np.int64)
+    if start is not None:
+        first = max(first, (np.datetime64(start, "D") - jan1).astype(np.int64))
+    weeks = np.arange(N_WEEKS)
+    return weeks[(weeks * 7 >= first) & (weeks * 7 + 7 <= end)]
+
+
+def panel_weeks(months=COMPARISON_MONTHS):
+    """Window weeks per year; the after year starts at the first full week of tolling"""
+    return {BEFORE_YEAR: window_weeks(BEFORE_YEAR, months), AFTER_YEAR: window_weeks(AFTER_YEAR, months, TOLL_START)}
+
+
+def long_panel(fields_by_year, weeks):
+    """Flatten per-year (week, zone, hour) arrays into one row per cell
+
+    Returns a (fields, rows) array of values plus the entity (zone-hour),
+    time (year-week-hour), zone and after-period flag of every row.
+    """
+    columns, entity, period, zone, post = [], [], [], [], []
+    offset = 0
+    for year, fields in fields_by_year.items():
+        arrays = [field[weeks[year]][:, PANEL_ZONES] for field in fields]
+        w, z, h = (index.ravel() for index in np.indices(arrays[0].shape))
+        columns.append(np.column_stack([array.ravel() for array in arrays]))
+        entity.append(z * 24 + h)
+        period.append((offset + w) * 24 + h)
+        zone.append(PANEL_ZONES[z])
+        post.append(np.full(len(w), year == AFTER_YEAR))
+        offset += len(weeks[year])
+    return np.vstack(columns).T, np.concatenate(entity), np.concatenate(period), np.concatenate(zone), np.concatenate(post)
+
+
+def fixed_effect_design(entity, period, weights):
+    """Sparse weighted one-hot [entity | period] design, two non-zeros per row"""
+    entity = np.unique(entity, return_inverse=True)[1]
+    period = np.unique(period, return_inverse=True)[1]
+    n_entities = entity.max() + 1
+    rows = np.repeat(np.arange(len(entity)), 2)
+    cols = np.column_stack([entity, n_entities + period]).ravel()
+    return sp.csr_matrix((np.repeat(weights, 2), (rows, cols)), shape=(len(entity), n_entities + period.max() + 1))
+
+
+def residualize(design, columns):
+    """Residuals of each column after least squares on the fixed-effect design"""
+    residuals = np.empty_like(columns)
+    for j in range(columns.shape[1]):
+        coef = lsmr(design, columns[:, j], atol=LSMR_TOL, btol=LSMR_TOL, maxiter=10_000)[0]
+        residuals[:, j] = columns[:, j] - design @ coef
+    return residuals
+
+
+def fit_did(outcome, treatment, entity, period, cluster, weights=None):
+    """Two-way fixed-effect coefficients of the treatment columns with cluster-robust standard errors
+
+    By Frisch-Waugh-Lovell the outcome and treatment columns are residualised
+    on the sparse fixed effects and the k treatment coefficients come from a
+    k x k system.
+    """
+    sqrt_w = np.sqrt(weights) if weights is not None else np.ones(len(outcome))
+    design = fixed_effect_design(entity, period, sqrt_w)
+    residuals = residualize(design, np.column_stack([outcome, treatment]) * sqrt_w[:, None])
+    y, x = residuals[:, 0], residuals[:, 1:]
+    bread = np.linalg.inv(x.T @ x)
+    coef = bread @ (x.T @ y)
+    errors = y - x @ coef
+
+    # Sum the score of every row within its cluster (zone)
+    clusters = np.unique(cluster, return_inverse=True)[1]
+    n_clusters = clusters.max() + 1
+    scores = np.column_stack([
+        np.bincount(clusters, weights=x[:, j] * errors, minlength=n_clusters) for j in range(x.shape[1])
+    ])
+    covariance = bread @ (scores.T @ scores) @ bread * n_clusters / (n_clusters - 1)
+    return coef, np.sqrt(np.diag(covariance))
+
+
+def treatment_columns(zone, post, arms):
+    """Arm x after-period indicator per row, one column per treatment arm"""
+    return np.column_stack([(zone_lookup(ids)[zone] & post).astype(np.float64) for ids in arms.values()])
+
+
+def dropoff_did(grouped, taxi_type, weeks, arms):
+    """Effect of the toll on log drop-offs per arm; zone-hours with no drop-offs in the window are left out"""
+    fields = {year: [grouped[(taxi_type, year)][1]["panel_dropoffs"]] for year in YEARS}
+    (trips,), entity, period, zone, post = long_panel(fields, weeks)
+    active = np.bincount(entity, weights=trips)[entity] > 0
+    coef, se = fit_did(np.log1p(trips[active]), treatment_columns(zone[active], post[active], arms),
+                       entity[active], period[active], zone[active])
+    estimates = {
+        arm: {
+            "coef": float(b),
+            "se": float(s),
+            "effect_pct": float(np.expm1(b) * 100),
+            "ci": [float(np.expm1(b - Z_95 * s) * 100), float(np.expm1(b + Z_95 * s) * 100)],
+        }
+        for arm, b, s in zip(arms, coef, se)
+    }
+    return {"arms": estimates, "observations": int(active.sum())}
+
+
+def speed_did(grouped, taxi_type, weeks, arms):
+    """Effect of the toll on average trip speed (MPH) per arm, cells weighted by trips"""
+    fields = {
+        year: [grouped[(taxi_type, year)][1]["panel_speed_sum"], grouped[(taxi_type, year)][1]["panel_speed_count"]]
+        for year in YEARS
+    }
+    (speed_sum, trips), entity, period, zone, post = long_panel(fields, weeks)
+    timed = trips > 0
+    coef, se = fit_did(speed_sum[timed] / trips[timed], treatment_columns(zone[timed], post[timed], arms),
+                       entity[timed], period[timed], zone[timed], weights=trips[timed])
+    estimates = {
+        arm: {"coef": float(b), "se": float(s), "effect_mph": float(b), "ci": [float(b - Z_95 * s), float(b + Z_95 * s)]}
+        for arm, b, s in zip(arms, coef, se)
+    }
+    return {"arms": estimates, "observations": int(timed.sum())}
+
+
+def diff_in_diff(grouped, months=COMPARISON_MONTHS):
+    """Difference-in-differences section of the results file, per outcome and taxi type"""
+    weeks = panel_weeks(months)
+    arms = treatment_arms()
+    outcomes = {"dropoffs": {}, "speed": {}}
+    for taxi_type in TAXI_TYPES:
+        if not all((taxi_type, year) in grouped for year in YEARS):
+            continue
+        outcomes["dropoffs"][taxi_type] = dropoff_did(grouped, taxi_type, weeks, arms)
+        outcomes["speed"][taxi_type] = speed_did(grouped, taxi_type, weeks, arms)
+    return {
+        "before_year": BEFORE_YEAR,
+        "after_year": AFTER_YEAR,
+        "weeks": {"before": len(weeks[BEFORE_YEAR]), "after": len(weeks[AFTER_YEAR])},
+        "control_zones": int(len(PANEL_ZONES) - np.count_nonzero(
+            np.isin(PANEL_ZONES, [zone for ids in arms.values() for zone in ids]))),
+        "outcomes": outcomes,
+    }
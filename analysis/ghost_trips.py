@@ -0,0 +1,65 @@
+"""
+Ghost trip detection for the sidebar audit table
+Flags physically impossible trip records with boolean masks computed in the
+same pass as the other partial aggregates, and summarises them per vendor.
+"""
+
+import numpy as np
+
+from analysis.config import MAX_PLAUSIBLE_MPH
+
+GHOST_RULES = ("impossible_speed", "zero_distance_paid", "dropoff_before_pickup")
+
+# VendorID codes from the TLC data dictionary; arrays are indexed by VendorID
+VENDOR_NAMES = {
+    1: "Creative Mobile Technologies",
+    2: "Curb Mobility",
+    6: "Myle Technologies",
+    7: "Helix",
+}
+N_VENDORS = 8
+
+
+def ghost_masks(batch, speed):
+    """Boolean mask per ghost rule for one batch"""
+    return {
+        "impossible_speed": np.isfinite(speed) & (speed > MAX_PLAUSIBLE_MPH),
+        "zero_distance_paid": (batch["trip_distance"] == 0) & (batch["fare_amount"] > 0),
+        "dropoff_before_pickup": batch["dropoff"] < batch["pickup"],
+    }
+
+
+def vendor_ids(values):
+    """VendorID column as a safe index into per-vendor arrays (unknown -> 0)"""
+    ids = np.nan_to_num(values.astype(np.float64), nan=0).astype(np.int64)
+    return np.where((ids > 0) & (ids < N_VENDORS), ids, 0)
+
+
+def ghost_summary(partials, top_n=5):
+    """Overall ghost trip rate and the vendors with the most flagged trips"""
+    trips = sum(p["vendor_trips"] for p in partials)
+    ghosts = sum(p["ghost_trips"] for p in partials)
+    rule_counts = sum(p["ghost_rule_counts"] for p in partials)
+    speed_sum = sum(p["ghost_speed_sum"] for p in partials)
+    speed_count = sum(p["ghost_speed_count"] for p in partials)
+
+    vendors = []
+    for vendor in np.argsort(-ghosts)[:top_n]:
+        if ghosts[vendor] == 0:
+            break
+        vendors.append({
+            "vendor_id": int(vendor),
+            "vendor": VENDOR_NAMES.get(int(vendor), f"Vendor {vendor}" if vendor else "Unknown"),
+            "ghost_trips": int(ghosts[vendor]),
+            "ghost_rate_pct": float(ghosts[vendor] / trips[vendor] * 100),
+            "avg_speed": float(speed_sum[vendor] / speed_count[vendor]) if speed_count[vendor] else None,
+        })
+
+    total = int(trips.sum())
+    return {
+        "total_trips": total,
+        "ghost_trips": int(ghosts.sum()),
+        "ghost_rate_pct": float(ghosts.sum() / total * 100) if total else 0.0,
+        "rules": {rule: int(count) for rule, count in zip(GHOST_RULES, rule_counts.sum(axis=1))},
+        "vendors": vendors,
+    }
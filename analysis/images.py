@@ -0,0 +1,113 @@
+"""
+Web image variants for the dashboard
+Each full-resolution PNG under outputs/visualizations is pre-encoded once into
+WebP (and AVIF where Pillow supports it) at a few display widths. File names
+carry a hash of the source PNG so stale variants are never served. They are
+written under static/, which Streamlit serves as plain files the browser caches.
+Run with: python -m analysis.images
+"""
+
+import argparse
+import hashlib
+import json
+
+from PIL import Image, features
+
+from analysis.config import STATIC_DIR, VISUALIZATIONS_DIR
+
+WEB_IMAGES_DIR = STATIC_DIR / "images"
+IMAGE_INDEX_PATH = WEB_IMAGES_DIR / "images.json"
+IMAGE_INDEX_VERSION = 1
+
+# Half-column and full-width slots in the wide dashboard layout
+IMAGE_WIDTHS = (960, 1600)
+IMAGE_FORMATS = {"avif": {"quality": 60}, "webp": {"quality": 82, "method": 6}}
+
+
+def source_hash(path):
+    """Short content hash of a source image"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def supported_formats():
+    """Variant formats the installed Pillow can encode"""
+    return [fmt for fmt in IMAGE_FORMATS if features.check(fmt)]
+
+
+def encode_variants(png_path, digest, formats):
+    """Resize and encode one PNG into every (format, width) variant"""
+    variants = []
+    with Image.open(png_path) as image:
+        image.load()
+        for width in IMAGE_WIDTHS:
+            width = min(width, image.width)
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                name = f"{png_path.stem}.{width}w.{digest}.{fmt}"
+                resized.save(WEB_IMAGES_DIR / name, format=fmt.upper(), **IMAGE_FORMATS[fmt])
+                variants.append({
+                    "format": fmt,
+                    "width": width,
+                    "file": name,
+                    "bytes": (WEB_IMAGES_DIR / name).stat().st_size,
+                })
+    return variants
+
+
+def load_index():
+    """Current image index, or an empty one"""
+    try:
+        with open(IMAGE_INDEX_PATH, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": IMAGE_INDEX_VERSION, "images": {}}
+    if index.get("version") != IMAGE_INDEX_VERSION:
+        return {"version": IMAGE_INDEX_VERSION, "images": {}}
+    return index
+
+
+def build_images(force=False):
+    """Encode variants for new or changed PNGs and prune variants no longer referenced"""
+    WEB_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    index = load_index()
+    formats = supported_formats()
+    images = {}
+    for png_path in sorted(VISUALIZATIONS_DIR.glob("*.png")):
+        digest = source_hash(png_path)
+        entry = index["images"].get(png_path.name)
+        current = (
+            entry
+            and entry["sha256"] == digest
+            and {v["format"] for v in entry["variants"]} == set(formats)
+            and all((WEB_IMAGES_DIR / v["file"]).exists() for v in entry["variants"])
+        )
+        if force or not current:
+            print(f"Encoding {png_path.name}...")
+            entry = {"sha256": digest, "variants": encode_variants(png_path, digest, formats)}
+        images[png_path.name] = entry
+
+    referenced = {v["file"] for entry in images.values() for v in entry["variants"]}
+    for path in WEB_IMAGES_DIR.iterdir():
+        if path != IMAGE_INDEX_PATH and path.name not in referenced:
+            path.unlink()
+
+    index = {"version": IMAGE_INDEX_VERSION, "images": images}
+    with open(IMAGE_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-encode dashboard images into sized WebP/AVIF variants")
+    parser.add_argument("--force", action="store_true", help="Re-encode every image")
+    args = parser.parse_args()
+
+    index = build_images(force=args.force)
+    for name, entry in index["images"].items():
+        sizes = ", ".join(f"{v['format']}@{v['width']}w {v['bytes'] // 1024} KB" for v in entry["variants"])
+        print(f"{name}: {sizes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Streaming ingestion of monthly TLC Parquet trip files
+Reads one batch at a time so a month is never fully resident in memory
+Run with: python -m analysis.ingest --year 2025
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analysis.config import (
+    BATCH_SIZE, COORDINATE_COLUMNS, TIMESTAMP_COLUMNS, VISUALIZATIONS_DIR, ZONE_SHAPES_PATH, tlc_path,
+)
+
+
+def coordinate_sources(available, columns):
+    """LocationID column -> (lon, lat) source columns, for LocationIDs a file only has as coordinates
+
+    Empty when the taxi zone shapefile needed to assign them is not downloaded.
+    """
+    if not ZONE_SHAPES_PATH.exists():
+        return {}
+    by_lower = {name.lower(): name for name in available}
+    sources = {}
+    for name in columns:
+        if name in COORDINATE_COLUMNS and name not in available:
+            lon, lat = (by_lower.get(source) for source in COORDINATE_COLUMNS[name])
+            if lon and lat:
+                sources[name] = (lon, lat)
+    return sources
+
+
+def iter_batches(path, taxi_type, columns, batch_size=BATCH_SIZE):
+    """Yield dicts of numpy arrays for the requested columns, one batch at a time
+
+    The taxi-specific timestamp columns are exposed as "pickup" and "dropoff".
+    LocationIDs of files that only record coordinates are assigned with
+    analysis.zone_assign; other columns a file does not have (e.g.
+    cbd_congestion_fee before 2025) are filled with NaN.
+    """
+    pickup_col, dropoff_col = TIMESTAMP_COLUMNS[taxi_type]
+    renames = {"pickup": pickup_col, "dropoff": dropoff_col}
+    source_columns = [renames.get(name, name) for name in columns]
+
+    parquet_file = pq.ParquetFile(path)
+    available = set(parquet_file.schema_arrow.names)
+    read_columns = [source for source in source_columns if source in available]
+    coordinates = coordinate_sources(available, columns)
+    if coordinates:
+        from analysis.zone_assign import default_assigner
+
+        assigner = default_assigner()
+        read_columns += sorted({source for pair in coordinates.values() for source in pair} - set(read_columns))
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=read_columns):
+        arrays = {}
+        for name, source in zip(columns, source_columns):
+            if name in coordinates:
+                lon, lat = (batch.column(source).to_numpy(zero_copy_only=False) for source in coordinates[name])
+                arrays[name] = assigner.assign(lon, lat)
+                continue
+            if source not in available:
+                arrays[name] = np.full(batch.num_rows, np.nan)
+                continue
+            values = batch.column(source).to_numpy(zero_copy_only=False)
+            if name in ("pickup", "dropoff"):
+                # Older TLC files use ns, newer ones us - normalise to us
+                values = values.astype("datetime64[us]")
+            arrays[name] = values
+        yield arrays
+
+
+def day_index(timestamps, year):
+    """Days since Jan 1 of the given year for an array of datetime64 values"""
+    days = timestamps.astype("datetime64[D]")
+    return (days - np.datetime64(f"{year}-01-01", "D")).astype(np.int64)
+
+
+def time_parts(timestamps):
+    """Split datetime64[us] values into (day of week, hour), Monday = 0"""
+    hours = timestamps.astype("datetime64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday
+    dow = (hours // 24 + 3) % 7
+    return dow, hours % 24
+
+
+def days_in_year(year):
+    """Number of days in a calendar year"""
+    return int((np.datetime64(f"{year + 1}-01-01") - np.datetime64(f"{year}-01-01")).astype(int))
+
+
+def count_daily_trips(path, taxi_type, year):
+    """Count validated trips per pickup day of the given year in one streaming pass
+
+    Batches go through analysis.trips like the build's, so rows it quarantines
+    are left out here too and both writers of the daily CSV agree.
+    """
+    from analysis.trips import iter_trips
+
+    n_days = days_in_year(year)
+    counts = np.zeros(n_days, dtype=np.int64)
+    for batch in iter_trips(path, taxi_type, ["pickup"]):
+        days = day_index(batch["pickup"], year)
+        # Pickups outside the file's month are already quarantined; this only guards the bincount
+        days = days[(days >= 0) & (days < n_days)]
+        counts += np.bincount(days, minlength=n_days)
+    return counts
+
+
+def daily_counts_frame(counts, year):
+    """Convert a per-day count array into the date,trip_count table
+
+    Trailing days with no trips (months not yet published) are dropped.
+    """
+    nonzero = np.flatnonzero(counts)
+    last_day = nonzero[-1] + 1 if len(nonzero) else 0
+    dates = pd.date_range(f"{year}-01-01", periods=last_day, freq="D")
+    return pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "trip_count": counts[:last_day]})
+
+
+def build_daily_counts(year, taxi_types=("yellow",)):
+    """Stream every available monthly file for the year and sum daily trip counts"""
+    counts = np.zeros(days_in_year(year), dtype=np.int64)
+    for taxi_type in taxi_types:
+        for month in range(1, 13):
+            path = tlc_path(taxi_type, year, month)
+            if path.exists():
+                counts += count_daily_trips(path, taxi_type, year)
+    return daily_counts_frame(counts, year)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily taxi trip counts from TLC Parquet files")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--taxi-type", action="append", choices=["yellow", "green"],
+                        help="Taxi type to include (repeatable, default: yellow)")
+    parser.add_argument("--output", default=None, help="Output CSV path")
+    args = parser.parse_args()
+
+    taxi_types = tuple(args.taxi_type or ["yellow"])
+    output = args.output or VISUALIZATIONS_DIR / f"daily_taxi_trips_{args.year}_real.csv"
+
+    daily = build_daily_counts(args.year, taxi_types)
+    daily.to_csv(output, index=False)
+    print(f"Wrote {len(daily)} days ({daily['trip_count'].sum():,} trips) to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Build manifest: which source files (size, mtime, sha256) fed which partial and
+artifact, plus the latest month ingested per taxi type (the watermark)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+MANIFEST_VERSION = 1
+
+
+def empty_manifest():
+    """Manifest with no sources or artifacts recorded"""
+    return {"version": MANIFEST_VERSION, "watermark": {}, "sources": {}, "artifacts": {}}
+
+
+def load_manifest(path):
+    """Load the manifest, starting fresh if it is missing or from another version"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return empty_manifest()
+    if manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(manifest, path):
+    """Atomically write the manifest"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(path, sha256=None):
+    """Size, mtime and content hash of a source file"""
+    stat = path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(path),
+    }
+
+
+def source_is_current(entry, path):
+    """Whether a recorded source entry still matches the file on disk
+
+    Size and mtime are checked first; the file is only re-hashed when the
+    mtime moved, so untouched months cost one stat call.
+    """
+    if not entry:
+        return False
+    stat = path.stat()
+    if stat.st_size != entry["size"]:
+        return False
+    if stat.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    if file_sha256(path) != entry["sha256"]:
+        return False
+    # Same content, touched file - refresh the mtime so the next check is cheap
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def record_source(manifest, name, path, partial_name, partial_version):
+    """Record the fingerprint of a source file and the partial built from it"""
+    manifest["sources"][name] = dict(fingerprint(path), partial=partial_name, partial_version=partial_version)
+
+
+def advance_watermark(manifest, taxi_type, year, month):
+    """Move the per-taxi-type watermark forward to year-month if it is newer"""
+    period = f"{year}-{month:02d}"
+    if period > manifest["watermark"].get(taxi_type, ""):
+        manifest["watermark"][taxi_type] = period
+
+
+def record_artifact(manifest, name, sources):
+    """Record which source files an artifact was built from"""
+    manifest["artifacts"][name] = {
+        "sources": sorted(sources),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
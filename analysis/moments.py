@@ -0,0 +1,74 @@
+"""
+Mergeable bivariate moments
+Accumulates (n, mean_x, mean_y, M2_x, M2_y, C_xy) per group so Pearson r, the
+OLS slope and the means are exact after one streaming pass. Partitions are
+combined with Chan et al.'s pairwise update, which stays numerically stable
+where raw power sums would cancel.
+"""
+
+import numpy as np
+
+# Index of each statistic along the last axis of a moments array
+N, MEAN_X, MEAN_Y, M2_X, M2_Y, C_XY = range(6)
+
+
+def empty_moments(*shape):
+    """Zeroed moments array for the given group shape"""
+    return np.zeros(shape + (6,))
+
+
+def group_moments(groups, x, y, n_groups):
+    """Moments of (x, y) per integer group label, computed two-pass within the batch"""
+    moments = empty_moments(n_groups)
+    n = np.bincount(groups, minlength=n_groups).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = np.where(n > 0, np.bincount(groups, weights=x, minlength=n_groups) / n, 0.0)
+        mean_y = np.where(n > 0, np.bincount(groups, weights=y, minlength=n_groups) / n, 0.0)
+    dx, dy = x - mean_x[groups], y - mean_y[groups]
+    moments[:, N] = n
+    moments[:, MEAN_X] = mean_x
+    moments[:, MEAN_Y] = mean_y
+    moments[:, M2_X] = np.bincount(groups, weights=dx * dx, minlength=n_groups)
+    moments[:, M2_Y] = np.bincount(groups, weights=dy * dy, minlength=n_groups)
+    moments[:, C_XY] = np.bincount(groups, weights=dx * dy, minlength=n_groups)
+    return moments
+
+
+def merge_moments(a, b):
+    """Combine two moments arrays of the same shape (Chan et al. pairwise update)"""
+    merged = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    n_a, n_b = a[..., N], b[..., N]
+    n = n_a + n_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w_b = np.where(n > 0, n_b / n, 0.0)
+        cross = np.where(n > 0, n_a * n_b / n, 0.0)
+    dx = b[..., MEAN_X] - a[..., MEAN_X]
+    dy = b[..., MEAN_Y] - a[..., MEAN_Y]
+    merged[..., N] = n
+    merged[..., MEAN_X] = a[..., MEAN_X] + dx * w_b
+    merged[..., MEAN_Y] = a[..., MEAN_Y] + dy * w_b
+    merged[..., M2_X] = a[..., M2_X] + b[..., M2_X] + dx * dx * cross
+    merged[..., M2_Y] = a[..., M2_Y] + b[..., M2_Y] + dy * dy * cross
+    merged[..., C_XY] = a[..., C_XY] + b[..., C_XY] + dx * dy * cross
+    return merged
+
+
+def collapse(moments):
+    """Merge every group along the leading axis into a single moments vector"""
+    total = empty_moments()
+    for group in moments:
+        total = merge_moments(total, group)
+    return total
+
+
+def pearson_r(moments):
+    """Pearson correlation coefficient (NaN when either variance is zero)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return moments[..., C_XY] / np.sqrt(moments[..., M2_X] * moments[..., M2_Y])
+
+
+def ols_fit(moments):
+    """(slope, intercept) of the least-squares line y = slope * x + intercept"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = moments[..., C_XY] / moments[..., M2_X]
+    return slope, moments[..., MEAN_Y] - slope * moments[..., MEAN_X]
@@ -0,0 +1,242 @@
+"""
+Per-file partial aggregates
+Each monthly TLC file is reduced to a small set of additive arrays in a single
+streaming pass. Partials from different months are merged by field so a new
+month only costs one file scan.
+"""
+
+import numpy as np
+
+from analysis.artifacts import atomic_savez
+from analysis.binning import SURCHARGE_EDGES, TIP_PCT_EDGES, hist2d
+from analysis.config import CONGESTION_ZONE_IDS, MAX_PLAUSIBLE_MPH, N_ZONES, TOLL_START, zone_lookup
+from analysis.ghost_trips import GHOST_RULES, N_VENDORS, ghost_masks, vendor_ids
+from analysis.ingest import day_index, days_in_year, time_parts
+from analysis.moments import empty_moments, group_moments, merge_moments
+from analysis.sketch import N_BUCKETS, bucket_index
+from analysis.trips import TRIP_COLUMNS, iter_trips
+from analysis.validation import VALIDATION_RULES, iter_quarantined, read_counters, trip_speed_mph
+
+# Bump whenever fields are added or their meaning changes so saved partials are rebuilt
+PARTIAL_VERSION = 12
+
+# New columns go into analysis.trips.TRIP_COLUMNS (with a CLEAN_VERSION bump) first
+PARTIAL_COLUMNS = TRIP_COLUMNS
+
+CONGESTION_ZONE = zone_lookup(CONGESTION_ZONE_IDS)
+
+# Weeks (days since Jan 1 // 7) in a year, the time axis of the zone x hour panel
+N_WEEKS = 53
+
+# Columns the ghost trip rules read back from the quarantine files
+GHOST_COLUMNS = ["VendorID", "pickup", "dropoff", "trip_distance", "fare_amount"]
+
+
+def empty_partial(year):
+    """Zeroed partial aggregates for one taxi type and calendar year"""
+    return {
+        "year": np.array(year),
+        # Trips per pickup day
+        "daily_counts": np.zeros(days_in_year(year), dtype=np.int64),
+        # Trips, congestion surcharge and CBD fee per (pickup day, PULocationID), the
+        # source of the date-range / zone prefix-sum index
+        "zone_daily_trips": np.zeros((days_in_year(year), N_ZONES), dtype=np.int64),
+        "zone_daily_surcharge": np.zeros((days_in_year(year), N_ZONES)),
+        "zone_daily_cbd_fee": np.zeros((days_in_year(year), N_ZONES)),
+        # Surcharge (x) vs tip percentage (y) moments, indexed by month - 1
+        "tip_moments": empty_moments(12),
+        # The same moments per pickup day, the resampling unit of the bootstrap intervals
+        "tip_day_moments": empty_moments(days_in_year(year)),
+        # Surcharge vs tip percentage trip density on a fixed grid
+        "tip_hist": np.zeros((len(SURCHARGE_EDGES) - 1, len(TIP_PCT_EDGES) - 1), dtype=np.int64),
+        # Drop-offs per (month - 1, DOLocationID)
+        "dropoff_zone_counts": np.zeros((12, N_ZONES), dtype=np.int64),
+        # Speed of trips inside the congestion zone by (month - 1, day of week, hour)
+        "velocity_sum": np.zeros((12, 7, 24)),
+        "velocity_sumsq": np.zeros((12, 7, 24)),
+        "velocity_count": np.zeros((12, 7, 24), dtype=np.int64),
+        # Quantile sketch of the same speeds: trips per log-spaced speed bucket
+        "velocity_sketch": np.zeros((12, 7, 24, N_BUCKETS), dtype=np.int64),
+        # Zone x hour x week panel: drop-offs by (week, DOLocationID, pickup hour) and the
+        # speed of plausible trips by (week, PULocationID, pickup hour)
+        "panel_dropoffs": np.zeros((N_WEEKS, N_ZONES, 24), dtype=np.int64),
+        "panel_speed_sum": np.zeros((N_WEEKS, N_ZONES, 24)),
+        "panel_speed_count": np.zeros((N_WEEKS, N_ZONES, 24), dtype=np.int64),
+        # Congestion toll: fees collected, and trips touching the zone after the toll start
+        "cbd_fee_sum": np.zeros(()),
+        "tolled_zone_trips": np.zeros((), dtype=np.int64),
+        "tolled_zone_trips_charged": np.zeros((), dtype=np.int64),
+        # Ghost trips per VendorID: totals, per-rule counts and speed of flagged trips
+        "vendor_trips": np.zeros(N_VENDORS, dtype=np.int64),
+        "ghost_trips": np.zeros(N_VENDORS, dtype=np.int64),
+        "ghost_rule_counts": np.zeros((len(GHOST_RULES), N_VENDORS), dtype=np.int64),
+        "ghost_speed_sum": np.zeros(N_VENDORS),
+        "ghost_speed_count": np.zeros(N_VENDORS, dtype=np.int64),
+        # Validation counters of the source file: rows read, rows quarantined, rows per broken rule
+        "validation_rows": np.zeros((), dtype=np.int64),
+        "validation_rejected": np.zeros((), dtype=np.int64),
+        "validation_rule_counts": np.zeros(len(VALIDATION_RULES), dtype=np.int64),
+    }
+
+
+def tip_percentage(total_amount, fare_amount, congestion_surcharge):
+    """Tip % as defined in the tip crowding report: (total - fare - surcharge) / fare * 100"""
+    return (total_amount - fare_amount - congestion_surcharge) / fare_amount * 100
+
+
+def zone_ids(values):
+    """LocationID column as a safe integer index into zone lookup arrays"""
+    ids = np.nan_to_num(values.astype(np.float64), nan=0).astype(np.int64)
+    return np.clip(ids, 0, N_ZONES - 1)
+
+
+def update_partial(partial, batch):
+    """Fold one streamed batch into the partial aggregates"""
+    year = int(partial["year"])
+    n_days = len(partial["daily_counts"])
+    days = day_index(batch["pickup"], year)
+    in_year = (days >= 0) & (days < n_days)
+    partial["daily_counts"] += np.bincount(days[in_year], minlength=n_days)
+
+    # Monthly surcharge vs tip percentage moments
+    months = batch["pickup"].astype("datetime64[M]").astype(np.int64) % 12
+    fare = batch["fare_amount"]
+    surcharge = np.nan_to_num(batch["congestion_surcharge"])
+    priced = in_year & (fare > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tip_pct = tip_percentage(batch["total_amount"], fare, surcharge)
+    priced &= np.isfinite(tip_pct)
+    partial["tip_moments"] = merge_moments(
+        partial["tip_moments"], group_moments(months[priced], surcharge[priced], tip_pct[priced], 12)
+    )
+    partial["tip_day_moments"] = merge_moments(
+        partial["tip_day_moments"], group_moments(days[priced], surcharge[priced], tip_pct[priced], n_days)
+    )
+    partial["tip_hist"] += hist2d(surcharge[priced], tip_pct[priced])
+
+    # Drop-offs by month and zone for the border effect
+    pickup_zone = zone_ids(batch["PULocationID"])
+    dropoff_zone = zone_ids(batch["DOLocationID"])
+    partial["dropoff_zone_counts"] += np.bincount(
+        months[in_year] * N_ZONES + dropoff_zone[in_year], minlength=12 * N_ZONES
+    ).reshape(12, N_ZONES)
+
+    # Velocity cells for trips that start and end inside the congestion zone
+    speed = trip_speed_mph(batch)
+    inside = (
+        in_year
+        & CONGESTION_ZONE[pickup_zone]
+        & CONGESTION_ZONE[dropoff_zone]
+        & (speed > 0) & (speed <= MAX_PLAUSIBLE_MPH)
+    )
+    dow, hour = time_parts(batch["pickup"][inside])
+    cells = (months[inside] * 7 + dow) * 24 + hour
+    shape = partial["velocity_count"].shape
+    partial["velocity_sum"] += np.bincount(cells, weights=speed[inside], minlength=12 * 7 * 24).reshape(shape)
+    partial["velocity_sumsq"] += np.bincount(cells, weights=speed[inside] ** 2, minlength=12 * 7 * 24).reshape(shape)
+    partial["velocity_count"] += np.bincount(cells, minlength=12 * 7 * 24).reshape(shape)
+    buckets = cells * N_BUCKETS + bucket_index(speed[inside])
+    partial["velocity_sketch"] += np.bincount(buckets, minlength=12 * 7 * 24 * N_BUCKETS).reshape(
+        partial["velocity_sketch"].shape
+    )
+
+    # Zone x hour x week panel cells for the difference-in-differences fits
+    _, pickup_hour = time_parts(batch["pickup"])
+    weeks = days // 7
+    shape = partial["panel_dropoffs"].shape
+    n_cells = N_WEEKS * N_ZONES * 24
+    dropoff_cells = ((weeks * N_ZONES + dropoff_zone) * 24 + pickup_hour)[in_year]
+    partial["panel_dropoffs"] += np.bincount(dropoff_cells, minlength=n_cells).reshape(shape)
+    plausible = in_year & (speed > 0) & (speed <= MAX_PLAUSIBLE_MPH)
+    speed_cells = ((weeks * N_ZONES + pickup_zone) * 24 + pickup_hour)[plausible]
+    partial["panel_speed_sum"] += np.bincount(speed_cells, weights=speed[plausible], minlength=n_cells).reshape(shape)
+    partial["panel_speed_count"] += np.bincount(speed_cells, minlength=n_cells).reshape(shape)
+
+    # Congestion toll revenue and compliance (trips starting or ending in the zone should be charged)
+    fee = np.nan_to_num(batch["cbd_congestion_fee"])
+    tolled = in_year & (batch["pickup"] >= np.datetime64(TOLL_START))
+    touches_zone = tolled & (CONGESTION_ZONE[pickup_zone] | CONGESTION_ZONE[dropoff_zone])
+    partial["cbd_fee_sum"] += fee[in_year].sum()
+    partial["tolled_zone_trips"] += np.count_nonzero(touches_zone)
+    partial["tolled_zone_trips_charged"] += np.count_nonzero(touches_zone & (fee > 0))
+
+    # Daily totals per pickup zone
+    zone_days = (days * N_ZONES + pickup_zone)[in_year]
+    n_zone_days = n_days * N_ZONES
+    partial["zone_daily_trips"] += np.bincount(zone_days, minlength=n_zone_days).reshape(n_days, N_ZONES)
+    partial["zone_daily_surcharge"] += np.bincount(
+        zone_days, weights=surcharge[in_year], minlength=n_zone_days
+    ).reshape(n_days, N_ZONES)
+    partial["zone_daily_cbd_fee"] += np.bincount(zone_days, weights=fee[in_year], minlength=n_zone_days).reshape(
+        n_days, N_ZONES
+    )
+
+    update_ghosts(partial, batch, speed, in_year)
+
+
+def update_ghosts(partial, batch, speed, in_year):
+    """Ghost trips: any record failing at least one impossibility rule"""
+    vendor = vendor_ids(batch["VendorID"])[in_year]
+    rule_masks = ghost_masks(batch, speed)
+    masks = [rule_masks[rule][in_year] for rule in GHOST_RULES]
+    ghost = np.logical_or.reduce(masks)
+    partial["vendor_trips"] += np.bincount(vendor, minlength=N_VENDORS)
+    partial["ghost_trips"] += np.bincount(vendor[ghost], minlength=N_VENDORS)
+    for i, mask in enumerate(masks):
+        partial["ghost_rule_counts"][i] += np.bincount(vendor[mask], minlength=N_VENDORS)
+    ghost_speed = speed[in_year]
+    timed = ghost & np.isfinite(ghost_speed) & (ghost_speed >= 0)
+    partial["ghost_speed_sum"] += np.bincount(vendor[timed], weights=ghost_speed[timed], minlength=N_VENDORS)
+    partial["ghost_speed_count"] += np.bincount(vendor[timed], minlength=N_VENDORS)
+
+
+def compute_partial(path, taxi_type, year, use_cache=True):
+    """Reduce one monthly TLC file to its partial aggregates in a single pass
+
+    Batches come from the memory-mapped cleaned-trips cache when it is current.
+    """
+    partial = empty_partial(year)
+    for batch in iter_trips(path, taxi_type, PARTIAL_COLUMNS, use_cache=use_cache):
+        update_partial(partial, batch)
+
+    # The ghost trip audit covers every record, so the quarantined rows are folded back in
+    n_days = len(partial["daily_counts"])
+    for batch in iter_quarantined(path, taxi_type, GHOST_COLUMNS):
+        days = day_index(batch["pickup"], year)
+        update_ghosts(partial, batch, trip_speed_mph(batch), (days >= 0) & (days < n_days))
+    counters = read_counters(path, taxi_type)
+    partial["validation_rows"] += counters["rows"]
+    partial["validation_rejected"] += counters["rejected"]
+    partial["validation_rule_counts"] += [counters["rules"].get(rule, 0) for rule in VALIDATION_RULES]
+    return partial
+
+
+# Fields that are not simply summed when partials are merged
+MERGERS = {
+    "tip_moments": merge_moments,
+    "tip_day_moments": merge_moments,
+}
+
+
+def merge_partials(partials):
+    """Merge partials of the same taxi type and year into one"""
+    partials = list(partials)
+    merged = {key: np.array(value, copy=True) for key, value in partials[0].items()}
+    for partial in partials[1:]:
+        for key, value in partial.items():
+            if key in MERGERS:
+                merged[key] = MERGERS[key](merged[key], value)
+            elif key != "year":
+                merged[key] += value
+    return merged
+
+
+def save_partial(partial, path):
+    """Write partial aggregates to a compressed .npz file"""
+    atomic_savez(path, **partial)
+
+
+def load_partial(path):
+    """Read partial aggregates written by save_partial"""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
@@ -0,0 +1,261 @@
+"""
+Embedded SQL query layer over the TLC Parquet files
+The comparison-window analyses (Tab 1 border effect, Tab 2 velocity cube) as
+parameterised DuckDB aggregate queries. Only the referenced columns are read
+(projection pushdown) and the pickup-date / zone predicates are pushed into the
+Parquet scan, so row groups whose min/max statistics fall outside the window
+are skipped without being decoded.
+Run with: python -m analysis.query [velocity] [border] [--explain]
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from analysis.bootstrap import VELOCITY_UNIT, add_intervals, bootstrap_pool, velocity_intervals
+from analysis.border import border_effect_from_dropoffs
+from analysis.config import (
+    AFTER_YEAR, ARTIFACTS_DIR, BEFORE_YEAR, COMPARISON_MONTHS, CONGESTION_ZONE_IDS, MANIFEST_PATH,
+    MAX_PLAUSIBLE_MPH, N_ZONES, RESULTS_PATH, TAXI_TYPES, TIMESTAMP_COLUMNS, tlc_path,
+)
+from analysis.manifest import fingerprint, load_manifest, record_artifact, save_manifest, source_is_current
+from analysis.results import update_results
+from analysis.sketch import GAMMA, N_BUCKETS, SPEED_LOW
+from analysis.validation import AMOUNT_COLUMNS, MAX_ZONE_ID, MIN_ZONE_ID
+from analysis.velocity import YEARS, cube_from_cells, velocity_summary, write_velocity_cube
+
+ANALYSES = ("velocity", "border")
+
+# Zone lists are trusted constants, inlined so DuckDB can push the IN filter into the scan
+CONGESTION_ZONE_SQL = ", ".join(str(zone) for zone in CONGESTION_ZONE_IDS)
+
+# Rows analysis.validation accepts, so both paths aggregate the same trips: pickup in the
+# month of the file it came from, no negative amounts, a plausible speed and real LocationIDs
+# (a NULL LocationID passes, as NaN does in Python, and counts as zone 0 like zone_ids maps it)
+VALID_ROWS_SQL = """
+      AND strftime({pickup}, '%Y-%m') = regexp_extract(filename, '_(\\d{{4}}-\\d{{2}})\\.parquet$', 1)
+      AND {dropoff} >= {pickup}
+      AND NOT coalesce({dropoff} > {pickup}
+                       AND trip_distance / ((epoch({dropoff}) - epoch({pickup})) / 3600) > $max_mph, false)
+      AND coalesce(PULocationID, {min_zone}) BETWEEN {min_zone} AND {max_zone}
+      AND coalesce(DOLocationID, {min_zone}) BETWEEN {min_zone} AND {max_zone}
+      {amounts}"""
+
+# Speed of trips that start and end inside the congestion zone, by (month, day of week, hour)
+# and quantile sketch bucket; same filters and buckets as the velocity cells in analysis.partials
+VELOCITY_SQL = """
+SELECT
+    month, dow, hour,
+    least(greatest(coalesce(ceil(ln(speed / $sketch_low) / ln($sketch_gamma)), 0), 0), $max_bucket) AS bucket,
+    sum(speed) AS speed_sum, sum(speed * speed) AS speed_sumsq, count(*) AS trip_count
+FROM (
+    SELECT
+        month({pickup}) AS month,
+        isodow({pickup}) - 1 AS dow,
+        hour({pickup}) AS hour,
+        trip_distance / ((epoch({dropoff}) - epoch({pickup})) / 3600) AS speed
+    FROM read_parquet($files, union_by_name = true, filename = true)
+    WHERE {pickup} >= $start AND {pickup} < $end
+      AND {dropoff} > {pickup}
+      AND PULocationID IN ({zones})
+      AND DOLocationID IN ({zones}){valid_rows}
+)
+WHERE speed > 0 AND speed <= $max_mph
+GROUP BY ALL
+"""
+
+# Drop-offs per DOLocationID for trips picked up in the window
+DROPOFFS_SQL = """
+SELECT coalesce(DOLocationID, 0) AS zone, count(*) AS trips
+FROM read_parquet($files, union_by_name = true, filename = true)
+WHERE {pickup} >= $start AND {pickup} < $end{valid_rows}
+GROUP BY ALL
+"""
+
+
+# Bound parameters of VELOCITY_SQL besides the window
+VELOCITY_PARAMS = {
+    "sketch_low": SPEED_LOW,
+    "sketch_gamma": GAMMA,
+    "max_bucket": N_BUCKETS - 1,
+}
+
+
+def connect(threads=None):
+    """In-process DuckDB connection (duckdb is only needed for this query layer)"""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("The SQL query layer needs duckdb: pip install duckdb") from e
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def window(year, months=COMPARISON_MONTHS):
+    """Half-open [start, end) pickup window covering the given months of a year"""
+    last = max(months)
+    end = date(year + 1, 1, 1) if last == 12 else date(year, last + 1, 1)
+    return date(year, min(months), 1), end
+
+
+def window_files(taxi_type, year, months=COMPARISON_MONTHS):
+    """Existing monthly files of the window's months
+
+    Rows picked up outside the month of their file are quarantined by
+    analysis.validation (and VALID_ROWS_SQL), so other months' files cannot
+    contribute to the window and are not opened at all.
+    """
+    return [str(path) for path in (tlc_path(taxi_type, year, month) for month in months) if path.exists()]
+
+
+def file_columns(files):
+    """Union of the column names of the files, from their Parquet footers"""
+    return set().union(*(pq.read_schema(path).names for path in files))
+
+
+def query_sql(template, taxi_type, files):
+    """Fill a query template with the taxi type's timestamp columns and the validation predicates
+
+    Amount columns missing from every file (e.g. cbd_congestion_fee before
+    2025) are left out of the non-negativity checks.
+    """
+    pickup, dropoff = TIMESTAMP_COLUMNS[taxi_type]
+    columns = file_columns(files)
+    amounts = " ".join(f"AND coalesce({name}, 0) >= 0" for name in AMOUNT_COLUMNS if name in columns)
+    valid_rows = VALID_ROWS_SQL.format(
+        pickup=pickup, dropoff=dropoff, min_zone=MIN_ZONE_ID, max_zone=MAX_ZONE_ID, amounts=amounts
+    ).rstrip()
+    return template.format(pickup=pickup, dropoff=dropoff, zones=CONGESTION_ZONE_SQL, valid_rows=valid_rows)
+
+
+def window_sources(manifest, months=COMPARISON_MONTHS):
+    """Fingerprints of every file the window queries read, reusing the build's hashes of unchanged files"""
+    sources = {}
+    for taxi_type in TAXI_TYPES:
+        for year in YEARS:
+            for path in map(Path, window_files(taxi_type, year, months)):
+                entry = manifest["sources"].get(path.name)
+                sources[path.name] = fingerprint(path, entry["sha256"] if source_is_current(entry, path) else None)
+    return sources
+
+
+def query_params(taxi_type, year, months=COMPARISON_MONTHS):
+    """Bound parameters for one (taxi type, year) window, or None if it has no files"""
+    start, end = window(year, months)
+    files = window_files(taxi_type, year, months)
+    if not files:
+        return None
+    return {"files": files, "start": start, "end": end, "max_mph": MAX_PLAUSIBLE_MPH}
+
+
+def velocity_cells_query(con, months=COMPARISON_MONTHS):
+    """The (taxi_type, year, month, dow, hour) cells of analysis.velocity, straight from Parquet"""
+    shape = (len(TAXI_TYPES), len(YEARS), len(months), 7, 24)
+    cells = {
+        "speed_sum": np.zeros(shape),
+        "speed_sumsq": np.zeros(shape),
+        "trip_count": np.zeros(shape, dtype=np.int64),
+        "speed_sketch": np.zeros(shape + (N_BUCKETS,), dtype=np.int64),
+    }
+    month_index = {month: i for i, month in enumerate(months)}
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        for y, year in enumerate(YEARS):
+            params = query_params(taxi_type, year, months)
+            if params is None:
+                continue
+            params.update(VELOCITY_PARAMS)
+            rows = con.execute(query_sql(VELOCITY_SQL, taxi_type, params["files"]), params).fetchnumpy()
+            month = np.array([month_index[int(m)] for m in rows["month"]], dtype=np.int64)
+            dow, hour = rows["dow"].astype(np.int64), rows["hour"].astype(np.int64)
+            bucket = rows["bucket"].astype(np.int64)
+            # One row per sketch bucket: sum the buckets back into their cell
+            for name in ("speed_sum", "speed_sumsq", "trip_count"):
+                np.add.at(cells[name][t, y], (month, dow, hour), rows[name])
+            cells["speed_sketch"][t, y, month, dow, hour, bucket] = rows["trip_count"]
+    return cells
+
+
+def dropoffs_query(con, taxi_type, year, months=COMPARISON_MONTHS):
+    """Drop-offs per zone over the window, indexed by LocationID (None if no files)"""
+    params = query_params(taxi_type, year, months)
+    if params is None:
+        return None
+    rows = con.execute(query_sql(DROPOFFS_SQL, taxi_type, params["files"]), params).fetchnumpy()
+    counts = np.zeros(N_ZONES, dtype=np.int64)
+    counts[rows["zone"].astype(np.int64)] = rows["trips"]
+    return counts
+
+
+def border_effect_query(con, months=COMPARISON_MONTHS):
+    """Border effect section of the results file, straight from Parquet"""
+    dropoffs = {}
+    for taxi_type in TAXI_TYPES:
+        for year in (BEFORE_YEAR, AFTER_YEAR):
+            counts = dropoffs_query(con, taxi_type, year, months)
+            if counts is not None:
+                dropoffs[(taxi_type, year)] = counts
+    return border_effect_from_dropoffs(dropoffs)
+
+
+def explain(con, template, taxi_type, year, **extra):
+    """Physical plan of one query, showing the projected columns and pushed-down filters"""
+    params = query_params(taxi_type, year)
+    if params is None:
+        return f"No {taxi_type} files for {year}"
+    rows = con.execute("EXPLAIN " + query_sql(template, taxi_type, params["files"]), {**params, **extra}).fetchall()
+    return "\n".join(row[1] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the comparison-window analyses with DuckDB")
+    parser.add_argument("analyses", nargs="*", metavar="{velocity,border}", help="Analyses to rebuild (default: all)")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB worker threads (default: all cores)")
+    parser.add_argument("--explain", action="store_true", help="Print the query plans instead of running them")
+    args = parser.parse_args()
+    analyses = args.analyses or ANALYSES
+    unknown = sorted(set(analyses) - set(ANALYSES))
+    if unknown:
+        parser.error(f"unknown analyses: {', '.join(unknown)} (choose from {', '.join(ANALYSES)})")
+
+    con = connect(args.threads)
+    if args.explain:
+        if "velocity" in analyses:
+            print(explain(con, VELOCITY_SQL, "yellow", AFTER_YEAR, **VELOCITY_PARAMS))
+        if "border" in analyses:
+            print(explain(con, DROPOFFS_SQL, "yellow", AFTER_YEAR))
+        return
+
+    manifest = load_manifest(MANIFEST_PATH)
+    # Provenance of what DuckDB read, in the shape update_results digests
+    inputs = {"sources": window_sources(manifest), "watermark": manifest["watermark"]}
+    sections = {}
+    if "velocity" in analyses:
+        cells = velocity_cells_query(con)
+        cube = cube_from_cells(cells)
+        write_velocity_cube(cube, ARTIFACTS_DIR / "velocity_cube.npz")
+        record_artifact(manifest, "velocity_cube.npz", inputs["sources"])
+        velocity = velocity_summary(cube)
+        if velocity:
+            with bootstrap_pool() as pool:
+                add_intervals(velocity, velocity_intervals(cells, pool), VELOCITY_UNIT)
+            sections["velocity"] = velocity
+    if "border" in analyses:
+        border = border_effect_query(con)
+        if border["taxi_types"]:
+            sections["border_effect"] = border
+
+    if not sections:
+        print("No comparison-window files found")
+        return
+    update_results(sections, inputs, source="duckdb")
+    save_manifest(manifest, MANIFEST_PATH)
+    print(f"Updated {RESULTS_PATH.name}: {', '.join(sorted(sections))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Rain elasticity of demand for Tab 4
+Joins the daily trip counts with Central Park precipitation and fits the
+trip count against daily rainfall.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def strength_label(r):
+    """Correlation wording used on the weather tab"""
+    return f"{'Weak' if abs(r) < 0.3 else 'Strong'} {'Positive' if r >= 0 else 'Negative'}"
+
+
+def rain_analysis(daily, precipitation):
+    """Correlation, elasticity and rainy/dry day figures, or None until enough days have trips
+
+    daily has date, trip_count; precipitation has date, precipitation_mm, month
+    for the whole year. Dates are YYYY-MM-DD strings.
+    """
+    merged = daily.merge(precipitation, on="date")
+    # The wettest-month trend needs a month with at least two days of trips (not yet the case
+    # on incremental builds before the wet months' files have landed)
+    days_per_month = merged.groupby("month").size()
+    trend_months = days_per_month.index[days_per_month >= 2]
+    if len(trend_months) == 0:
+        return None
+    trips = merged["trip_count"].to_numpy(np.float64)
+    rain = merged["precipitation_mm"].to_numpy(np.float64)
+
+    r = float(np.corrcoef(rain, trips)[0, 1])
+    slope, _ = np.polyfit(rain, trips, 1)
+    mean_trips = trips.mean()
+    # Point elasticity at the means, and % change in trips per extra mm of rain
+    elasticity = float(slope * rain.mean() / mean_trips)
+
+    monthly_rain = precipitation.groupby("month")["precipitation_mm"].sum()
+    wettest = int(monthly_rain[trend_months].idxmax())
+    in_wettest = (merged["month"] == wettest).to_numpy()
+    trend_slope, trend_intercept = np.polyfit(rain[in_wettest], trips[in_wettest], 1)
+    wettest_label = pd.Timestamp(year=int(merged["date"].str[:4].iloc[0]), month=wettest, day=1).strftime("%B %Y")
+
+    rainy = rain > 0
+    rainy_avg, dry_avg = trips[rainy].mean(), trips[~rainy].mean()
+    return {
+        "rain_correlation": r,
+        "rain_correlation_label": strength_label(r),
+        "elasticity": elasticity,
+        "elasticity_label": "Inelastic" if abs(elasticity) < 1 else "Elastic",
+        "elasticity_pct_per_mm": float(slope / mean_trips * 100),
+        "wettest_month": wettest_label,
+        "wettest_month_mm": float(monthly_rain[wettest]),
+        "wettest_month_trend": {"slope": float(trend_slope), "intercept": float(trend_intercept)},
+        "rainy_days": int(rainy.sum()),
+        "rainy_days_pct": float(rainy.mean() * 100),
+        "total_precipitation_mm": float(precipitation["precipitation_mm"].sum()),
+        "total_trips": int(trips.sum()),
+        "avg_daily_trips": float(mean_trips),
+        "date_start": merged["date"].min(),
+        "date_end": merged["date"].max(),
+        "rainy_day_avg_trips": float(rainy_avg),
+        "dry_day_avg_trips": float(dry_avg),
+        "rainy_day_change_pct": float((rainy_avg - dry_avg) / dry_avg * 100),
+    }
+
+
+def rain_from_files(daily_path, precipitation_path):
+    """Run the rain analysis from the daily counts and precipitation CSVs"""
+    daily = pd.read_csv(daily_path, dtype={"date": str})
+    precipitation = pd.read_csv(precipitation_path, dtype={"date": str})
+    return rain_analysis(daily, precipitation)
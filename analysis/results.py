@@ -0,0 +1,59 @@
+"""
+Versioned results file behind every dashboard metric
+The build merges each freshly computed section into outputs/results.json;
+sections it could not compute (e.g. no weather data) keep their last values.
+"sources" records where each section came from: seeded from the analysis
+reports, or computed by analysis.build / the DuckDB layer from inputs with the
+given digest.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from analysis.config import RESULTS_PATH
+
+RESULTS_SCHEMA_VERSION = 1
+
+
+def load_results(path=RESULTS_PATH):
+    """Current results, or an empty document if missing or from another schema version"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        results = {}
+    if results.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        return {"schema_version": RESULTS_SCHEMA_VERSION}
+    return results
+
+
+def inputs_digest(manifest):
+    """Single hash over every source file fingerprint recorded in the manifest"""
+    digest = hashlib.sha256()
+    for name in sorted(manifest["sources"]):
+        digest.update(f"{name}:{manifest['sources'][name]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def update_results(sections, manifest, path=RESULTS_PATH, source="build"):
+    """Merge computed sections into the results file and write it atomically
+
+    manifest only needs the "sources" fingerprints the sections were computed
+    from and the "watermark"; source names the engine that computed them.
+    """
+    results = load_results(path)
+    results.update(sections)
+    results["generated_at"] = datetime.now().isoformat(timespec="seconds")
+    results["inputs"] = {"digest": inputs_digest(manifest), "watermark": manifest["watermark"]}
+    sources = results.setdefault("sources", {})
+    for name in sections:
+        sources[name] = {"source": source, "digest": results["inputs"]["digest"],
+                         "generated_at": results["generated_at"]}
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    return results
@@ -0,0 +1,42 @@
+"""
+Process-pool execution of per-file partitions
+Each (taxi_type, month) file is scanned in its own worker process; the small
+partial aggregates are sent back and reduced in the parent.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analysis.partials import compute_partial
+
+
+def default_workers():
+    """Number of cores available to this process"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _scan_partition(task, use_cache=True):
+    """Worker entry point: reduce one monthly file to its partial aggregates"""
+    taxi_type, year, month, path = task
+    return compute_partial(path, taxi_type, year, use_cache)
+
+
+def run_partitions(tasks, workers=None, use_cache=True):
+    """Yield (task, partial) for each (taxi_type, year, month, path) task as it completes
+
+    Falls back to scanning in-process when one worker is requested or there is
+    only one task, which avoids the pool start-up cost for single-month deltas.
+    """
+    tasks = list(tasks)
+    workers = min(workers or default_workers(), len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            yield task, _scan_partition(task, use_cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_scan_partition, task, use_cache): task for task in tasks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
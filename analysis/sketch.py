@@ -0,0 +1,48 @@
+"""
+Mergeable quantile sketches for trip speeds
+Speeds are counted in logarithmically spaced buckets (the DDSketch layout):
+each bucket spans a constant ratio GAMMA, so any quantile read back from the
+counts is within RELATIVE_ACCURACY of the exact value however many trips a cell
+holds. A sketch is a plain count array, so monthly partials merge by addition
+like every other field.
+"""
+
+import numpy as np
+
+from analysis.config import MAX_PLAUSIBLE_MPH
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Bucketed speed range in MPH; slower trips share the first bucket (faster ones are already filtered out)
+SPEED_LOW = 0.5
+N_BUCKETS = int(np.ceil(np.log(MAX_PLAUSIBLE_MPH / SPEED_LOW) / np.log(GAMMA))) + 1
+
+# Quantiles shown on the Tab 2 heatmaps
+HEATMAP_QUANTILES = (0.5, 0.9)
+
+
+def bucket_index(values, low=SPEED_LOW, n_buckets=N_BUCKETS, gamma=GAMMA):
+    """Bucket of each value: bucket i > 0 covers (low * gamma^(i-1), low * gamma^i]"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        index = np.ceil(np.log(values / low) / np.log(gamma))
+    return np.clip(np.nan_to_num(index, nan=0), 0, n_buckets - 1).astype(np.int64)
+
+
+def bucket_values(low=SPEED_LOW, n_buckets=N_BUCKETS, gamma=GAMMA):
+    """Value reported for each bucket, within the relative accuracy of anything counted in it"""
+    return low * gamma ** np.arange(n_buckets) * 2 / (gamma + 1)
+
+
+def sketch_quantiles(counts, quantiles, low=SPEED_LOW, gamma=GAMMA):
+    """Quantiles of sketches along the last axis; the quantile axis comes first, NaN for empty sketches"""
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1]
+    values = bucket_values(low, counts.shape[-1], gamma)
+    estimates = []
+    for q in quantiles:
+        # First bucket whose cumulative count passes the (0-based) rank of the quantile
+        rank = q * (total - 1)
+        index = np.argmax(cumulative > rank[..., None], axis=-1)
+        estimates.append(np.where(total > 0, values[index], np.nan))
+    return np.stack(estimates)
@@ -0,0 +1,58 @@
+"""
+Tip crowding-out analysis for Tab 3
+Monthly surcharge and tip percentage means plus the trip-level correlation and
+regression line, all read from the merged moments in the partial aggregates.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis.config import AFTER_YEAR, TAXI_TYPES
+from analysis.moments import MEAN_X, MEAN_Y, N, collapse, ols_fit, pearson_r
+
+
+def monthly_tip_frame(taxi_type, year, partial):
+    """Monthly average surcharge and tip percentage table"""
+    moments = partial["tip_moments"]
+    months = np.flatnonzero(moments[:, N])
+    return pd.DataFrame({
+        "taxi_type": taxi_type,
+        "year": year,
+        "month": months + 1,
+        "trips": moments[months, N].astype(np.int64),
+        "avg_surcharge": moments[months, MEAN_X],
+        "avg_tip_pct": moments[months, MEAN_Y],
+    })
+
+
+def correlation_label(r):
+    """Strength wording used on the dashboard for a correlation coefficient"""
+    if not np.isfinite(r) or abs(r) < 0.1:
+        return "No Correlation"
+    strength = "Strong" if abs(r) >= 0.3 else "Weak"
+    return f"{strength} {'Positive' if r > 0 else 'Negative'}"
+
+
+def tip_crowding(grouped, year=AFTER_YEAR):
+    """Tip crowding section of the results file: correlation, regression and means per taxi type"""
+    results = {}
+    for taxi_type in TAXI_TYPES:
+        if (taxi_type, year) not in grouped:
+            continue
+        monthly = grouped[(taxi_type, year)][1]["tip_moments"]
+        total = collapse(monthly)
+        if total[N] == 0:
+            continue
+        r = float(pearson_r(total))
+        slope, intercept = ols_fit(total)
+        results[taxi_type] = {
+            "trips": int(total[N]),
+            "months_analyzed": int(np.count_nonzero(monthly[:, N])),
+            "correlation": r,
+            "label": correlation_label(r),
+            "slope": float(slope),
+            "intercept": float(intercept),
+            "avg_surcharge": float(total[MEAN_X]),
+            "avg_tip_pct": float(total[MEAN_Y]),
+        }
+    return {"year": year, "taxi_types": results}
@@ -0,0 +1,18 @@
+"""
+Congestion toll revenue and compliance for the executive summary
+"""
+
+from analysis.config import AFTER_YEAR
+
+
+def toll_summary(grouped, year=AFTER_YEAR):
+    """Fees collected and share of zone trips that were charged, across taxi types"""
+    partials = [partial for (_, partial_year), (_, partial) in grouped.items() if partial_year == year]
+    zone_trips = sum(int(p["tolled_zone_trips"]) for p in partials)
+    charged = sum(int(p["tolled_zone_trips_charged"]) for p in partials)
+    return {
+        "year": year,
+        "revenue_usd": float(sum(float(p["cbd_fee_sum"]) for p in partials)),
+        "zone_trips": zone_trips,
+        "compliance_rate_pct": charged / zone_trips * 100 if zone_trips else None,
+    }
@@ -0,0 +1,161 @@
+"""
+Cleaned-trips cache
+The first scan of a monthly TLC file decodes it once into an uncompressed Arrow
+IPC (Feather v2) file under data/trips_cache/<taxi_type>/, holding the
+normalised columns every analysis reads; rows failing analysis.validation are
+quarantined on the way and never reach it. Later scans memory-map that file and
+hand out numpy views of its buffers without copying, so re-running an analysis
+over the same month skips the Parquet decode entirely.
+Run with: python -m analysis.trips [--year 2025] [--taxi-type yellow]
+"""
+
+import argparse
+
+import numpy as np
+import pyarrow as pa
+
+from analysis.config import QUARANTINE_DIR, RAW_DATA_DIR, TAXI_TYPES, TRIPS_CACHE_DIR
+from analysis.ingest import iter_batches
+from analysis.validation import Quarantine, quarantine_metadata, quarantine_path
+
+# Bump whenever the cleaning changes so cached months are rewritten
+CLEAN_VERSION = 2
+
+# Every column the partial aggregates read; timestamps are datetime64[us], the rest float64
+TRIP_COLUMNS = [
+    "VendorID", "pickup", "dropoff", "trip_distance", "PULocationID", "DOLocationID",
+    "fare_amount", "total_amount", "congestion_surcharge", "cbd_congestion_fee",
+]
+TIMESTAMP_FIELDS = ("pickup", "dropoff")
+TRIP_SCHEMA = pa.schema([
+    (name, pa.timestamp("us") if name in TIMESTAMP_FIELDS else pa.float64()) for name in TRIP_COLUMNS
+])
+
+
+def cache_path(path, taxi_type):
+    """Cleaned-trips file for a monthly source file"""
+    return TRIPS_CACHE_DIR / taxi_type / f"{path.stem}.arrow"
+
+
+def source_stamp(path):
+    """Schema metadata tying a cache file to the exact source file it was built from"""
+    stat = path.stat()
+    return {
+        "clean_version": str(CLEAN_VERSION),
+        "source_size": str(stat.st_size),
+        "source_mtime_ns": str(stat.st_mtime_ns),
+    }
+
+
+def open_cached(path, taxi_type):
+    """Memory-mapped IPC reader for a source's cache file, or None if it or its quarantine file is missing or stale"""
+    cache = cache_path(path, taxi_type)
+    quarantine = quarantine_metadata(path, taxi_type)
+    stamp = source_stamp(path)
+    if not cache.exists() or quarantine is None or any(quarantine.get(key) != value for key, value in stamp.items()):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(str(cache), "r"))
+    except pa.ArrowInvalid:
+        return None
+    metadata = {key.decode(): value.decode() for key, value in (reader.schema.metadata or {}).items()}
+    return reader if metadata == stamp else None
+
+
+def batch_arrays(batch, columns):
+    """numpy views of the requested columns; only columns holding nulls (NaT) are copied"""
+    arrays = {}
+    for name in columns:
+        column = batch.column(name)
+        arrays[name] = column.to_numpy(zero_copy_only=column.null_count == 0)
+    return arrays
+
+
+def read_cached(reader, columns):
+    """Yield the cached batches as dicts of zero-copy numpy arrays"""
+    for i in range(reader.num_record_batches):
+        yield batch_arrays(reader.get_batch(i), columns)
+
+
+def validated_batches(path, taxi_type, columns):
+    """Decode the Parquet file, yielding the rows that pass validation and quarantining the rest"""
+    read_columns = list(dict.fromkeys([*TRIP_COLUMNS, *columns]))
+    with Quarantine(path, taxi_type, TRIP_SCHEMA.with_metadata(source_stamp(path))) as quarantine:
+        for arrays in iter_batches(path, taxi_type, read_columns):
+            accepted = quarantine.split(arrays)
+            yield {name: accepted[name] for name in columns}
+
+
+def write_through(path, taxi_type, columns):
+    """Decode and validate the Parquet file, writing every accepted batch to the cache while yielding it"""
+    cache = cache_path(path, taxi_type)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache.with_suffix(".tmp")
+    schema = TRIP_SCHEMA.with_metadata(source_stamp(path))
+    try:
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for arrays in validated_batches(path, taxi_type, TRIP_COLUMNS):
+                batch = pa.record_batch([
+                    pa.array(arrays[name].astype("datetime64[us]" if name in TIMESTAMP_FIELDS else np.float64,
+                                                 copy=False))
+                    for name in TRIP_COLUMNS
+                ], schema=schema)
+                writer.write_batch(batch)
+                yield batch_arrays(batch, columns)
+        tmp_path.replace(cache)
+    finally:
+        # A caller that stops early (or an error) leaves an incomplete file, never cached
+        tmp_path.unlink(missing_ok=True)
+
+
+def iter_trips(path, taxi_type, columns=TRIP_COLUMNS, use_cache=True):
+    """Yield validated trip batches for a monthly file, from the memory-mapped cache when current
+
+    A cache miss decodes the Parquet file once and populates the cache and the
+    quarantine file on the way through, so the caller never pays for two passes.
+    """
+    if not use_cache or not set(columns) <= set(TRIP_COLUMNS):
+        yield from validated_batches(path, taxi_type, columns)
+        return
+    reader = open_cached(path, taxi_type)
+    if reader is not None:
+        yield from read_cached(reader, columns)
+    else:
+        yield from write_through(path, taxi_type, columns)
+
+
+def prune_cache(sources):
+    """Delete cache and quarantine files whose source month no longer exists, returning their names"""
+    keep = {cache_path(path, taxi_type) for taxi_type, _, _, path in sources}
+    keep |= {quarantine_path(path, taxi_type) for taxi_type, _, _, path in sources}
+    removed = []
+    for cache in [*TRIPS_CACHE_DIR.glob("*/*.arrow"), *QUARANTINE_DIR.glob("*/*.parquet")]:
+        if cache not in keep:
+            cache.unlink()
+            removed.append(cache.name)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate the cleaned-trips cache from TLC Parquet files")
+    parser.add_argument("--year", type=int, action="append", help="Year to cache (repeatable, default: all)")
+    parser.add_argument("--taxi-type", action="append", choices=TAXI_TYPES,
+                        help="Taxi type to cache (repeatable, default: all)")
+    args = parser.parse_args()
+
+    for taxi_type in args.taxi_type or TAXI_TYPES:
+        for path in sorted(RAW_DATA_DIR.glob(f"{taxi_type}_tripdata_*.parquet")):
+            # File names end in _YYYY-MM
+            if args.year and int(path.stem[-7:-3]) not in args.year:
+                continue
+            if open_cached(path, taxi_type) is not None:
+                print(f"{path.name}: current")
+                continue
+            rows = sum(len(batch["pickup"]) for batch in write_through(path, taxi_type, ["pickup"]))
+            size_mb = cache_path(path, taxi_type).stat().st_size / 1e6
+            print(f"{path.name}: cached {rows:,} trips ({size_mb:.1f} MB)")
+    print(f"Cache: {TRIPS_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
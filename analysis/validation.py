@@ -0,0 +1,217 @@
+"""
+Data-quality validation stage of the streaming ingestion
+Every batch read from a monthly TLC file is checked against column-wise rules
+before it reaches the cleaned-trips cache or the partial aggregates. Rows
+breaking any rule go to a per-month quarantine Parquet file, tagged with a
+bitmask of the rules they broke, and per-rule counters are written to that
+file's footer - all in the same pass that reads the month.
+Run with: python -m analysis.validation [--year 2025] [--taxi-type yellow]
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analysis.config import MAX_PLAUSIBLE_MPH, QUARANTINE_DIR, RAW_DATA_DIR, TAXI_TYPES
+
+# Bit i of a row's reason code is set when it breaks VALIDATION_RULES[i]
+VALIDATION_RULES = (
+    "missing_timestamp",
+    "outside_source_month",
+    "dropoff_before_pickup",
+    "negative_amount",
+    "implausible_speed",
+    "invalid_zone",
+)
+REASON_COLUMN = "reason_code"
+
+# Money columns that must not be negative (voids and refunds are recorded as negative rows)
+AMOUNT_COLUMNS = ("fare_amount", "total_amount", "congestion_surcharge", "cbd_congestion_fee")
+
+# Real TLC LocationIDs, including 264 / 265 (unknown / outside NYC)
+MIN_ZONE_ID, MAX_ZONE_ID = 1, 265
+
+
+def trip_speed_mph(batch):
+    """Average speed of each trip in MPH (NaN where duration is not positive)"""
+    duration_h = (batch["dropoff"] - batch["pickup"]).astype("timedelta64[s]").astype(np.float64) / 3600
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(duration_h > 0, batch["trip_distance"] / duration_h, np.nan)
+
+
+def source_month(path):
+    """Calendar month a monthly TLC file covers, from its _YYYY-MM file name"""
+    return np.datetime64(path.stem[-7:], "M")
+
+
+def rule_masks(batch, month):
+    """Boolean mask per validation rule for one batch of a file covering the given month"""
+    pickup, dropoff = batch["pickup"], batch["dropoff"]
+    missing = np.isnat(pickup) | np.isnat(dropoff)
+    speed = trip_speed_mph(batch)
+    zones = [batch[name].astype(np.float64) for name in ("PULocationID", "DOLocationID")]
+    return {
+        "missing_timestamp": missing,
+        # e.g. the 2024-12-31 pickups shipped in January 2025 files
+        "outside_source_month": ~missing & (pickup.astype("datetime64[M]") != month),
+        "dropoff_before_pickup": dropoff < pickup,
+        "negative_amount": np.logical_or.reduce([batch[name] < 0 for name in AMOUNT_COLUMNS]),
+        "implausible_speed": np.isfinite(speed) & (speed > MAX_PLAUSIBLE_MPH),
+        # NaN means the file has no LocationIDs at all, which is not a row-level defect
+        "invalid_zone": np.logical_or.reduce([(ids < MIN_ZONE_ID) | (ids > MAX_ZONE_ID) for ids in zones]),
+    }
+
+
+def reason_codes(masks):
+    """Per-row bitmask of the broken rules, 0 for rows that pass"""
+    codes = np.zeros(len(next(iter(masks.values()))), dtype=np.uint8)
+    for bit, rule in enumerate(VALIDATION_RULES):
+        codes |= masks[rule].astype(np.uint8) << bit
+    return codes
+
+
+def rule_counts(codes):
+    """Rows breaking each rule; a row breaking several rules counts towards each"""
+    bits = np.unpackbits(codes[:, None], axis=1, bitorder="little")[:, :len(VALIDATION_RULES)]
+    return bits.sum(axis=0, dtype=np.int64)
+
+
+def quarantine_path(path, taxi_type):
+    """Quarantine file holding the rejected rows of a monthly source file"""
+    return QUARANTINE_DIR / taxi_type / f"{path.stem}.parquet"
+
+
+class Quarantine:
+    """Splits streamed batches into accepted rows and a quarantine file of rejects
+
+    The file, with the per-rule counters in its footer, replaces any previous
+    one only when the stream is read to the end.
+    """
+
+    def __init__(self, path, taxi_type, schema):
+        self.month = source_month(path)
+        self.path = quarantine_path(path, taxi_type)
+        self.schema = schema.append(pa.field(REASON_COLUMN, pa.uint8()))
+        self.rows = 0
+        self.counts = np.zeros(len(VALIDATION_RULES), dtype=np.int64)
+        self.rejected = 0
+        self.writer = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = self.path.with_suffix(".tmp")
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.writer.close()
+            self.tmp_path.unlink(missing_ok=True)
+            return False
+        self.writer.add_key_value_metadata({"validation": json.dumps(self.counters())})
+        self.writer.close()
+        self.tmp_path.replace(self.path)
+        return False
+
+    def split(self, batch):
+        """Accepted rows of a batch; the rejected ones are written to the quarantine file"""
+        codes = reason_codes(rule_masks(batch, self.month))
+        rejected = codes != 0
+        self.rows += len(codes)
+        if not rejected.any():
+            return batch
+        self.rejected += int(rejected.sum())
+        self.counts += rule_counts(codes[rejected])
+        columns = [
+            pa.array(np.asarray(batch[field.name])[rejected], type=field.type) for field in self.schema
+            if field.name != REASON_COLUMN
+        ]
+        self.writer.write_batch(pa.record_batch(columns + [pa.array(codes[rejected])], schema=self.schema))
+        return {name: values[~rejected] for name, values in batch.items()}
+
+    def counters(self):
+        """Rows read, rows rejected and per-rule counts so far"""
+        return {
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "rules": dict(zip(VALIDATION_RULES, self.counts.tolist())),
+        }
+
+
+def quarantine_metadata(path, taxi_type):
+    """Footer metadata of a source's quarantine file, or None if it has not been written"""
+    target = quarantine_path(path, taxi_type)
+    if not target.exists():
+        return None
+    metadata = pq.read_metadata(target).metadata or {}
+    return {key.decode(): value.decode() for key, value in metadata.items()}
+
+
+def read_counters(path, taxi_type):
+    """Validation counters recorded for a source file"""
+    return json.loads(quarantine_metadata(path, taxi_type)["validation"])
+
+
+def iter_quarantined(path, taxi_type, columns):
+    """Yield the quarantined rows of a source file as dicts of numpy arrays"""
+    for batch in pq.ParquetFile(quarantine_path(path, taxi_type)).iter_batches(columns=columns):
+        yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in columns}
+
+
+def validation_summary(grouped):
+    """Rows read and quarantined per taxi type and rule, from the partial aggregates"""
+    taxi_types = {}
+    for (taxi_type, _), (_, partial) in sorted(grouped.items()):
+        totals = taxi_types.setdefault(
+            taxi_type, {"rows": 0, "rejected": 0, "rules": np.zeros(len(VALIDATION_RULES), dtype=np.int64)}
+        )
+        totals["rows"] += int(partial["validation_rows"])
+        totals["rejected"] += int(partial["validation_rejected"])
+        totals["rules"] += partial["validation_rule_counts"]
+    rows = sum(totals["rows"] for totals in taxi_types.values())
+    rejected = sum(totals["rejected"] for totals in taxi_types.values())
+    return {
+        "rows": rows,
+        "quarantined": rejected,
+        "quarantine_rate_pct": rejected / rows * 100 if rows else 0.0,
+        "rules": {
+            rule: int(sum(totals["rules"][i] for totals in taxi_types.values()))
+            for i, rule in enumerate(VALIDATION_RULES)
+        },
+        "taxi_types": {
+            taxi_type: {
+                "rows": totals["rows"],
+                "quarantined": totals["rejected"],
+                "rules": dict(zip(VALIDATION_RULES, totals["rules"].tolist())),
+            }
+            for taxi_type, totals in taxi_types.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the validation counters of quarantined TLC files")
+    parser.add_argument("--year", type=int, action="append", help="Year to report (repeatable, default: all)")
+    parser.add_argument("--taxi-type", action="append", choices=TAXI_TYPES,
+                        help="Taxi type to report (repeatable, default: all)")
+    args = parser.parse_args()
+
+    for taxi_type in args.taxi_type or TAXI_TYPES:
+        for path in sorted(RAW_DATA_DIR.glob(f"{taxi_type}_tripdata_*.parquet")):
+            if args.year and int(path.stem[-7:-3]) not in args.year:
+                continue
+            if quarantine_metadata(path, taxi_type) is None:
+                print(f"{path.name}: not validated yet (run python -m analysis.build)")
+                continue
+            counters = read_counters(path, taxi_type)
+            broken = ", ".join(f"{rule} {count:,}" for rule, count in counters["rules"].items() if count)
+            print(f"{path.name}: {counters['rejected']:,} of {counters['rows']:,} rows quarantined"
+                  + (f" ({broken})" if broken else ""))
+    print(f"Quarantine: {QUARANTINE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Congestion velocity cube for Tab 2
+Speed sums, sums of squares, trip counts and speed quantile sketches for trips
+inside the congestion zone, indexed by (taxi_type, year, day of week, hour)
+over the comparison months. Saved as a small .npz the dashboard turns into
+mean and p50 / p90 heatmaps.
+"""
+
+import numpy as np
+
+from analysis.artifacts import atomic_savez
+from analysis.config import AFTER_YEAR, BEFORE_YEAR, COMPARISON_MONTHS, TAXI_TYPES
+from analysis.sketch import GAMMA, HEATMAP_QUANTILES, N_BUCKETS, SPEED_LOW, sketch_quantiles
+
+YEARS = (BEFORE_YEAR, AFTER_YEAR)
+
+
+def velocity_cells(grouped, months=COMPARISON_MONTHS):
+    """(taxi_type, year, month, dow, hour) cells over the comparison months from partials grouped by (taxi_type, year)"""
+    shape = (len(TAXI_TYPES), len(YEARS), len(months), 7, 24)
+    cells = {
+        "speed_sum": np.zeros(shape),
+        "speed_sumsq": np.zeros(shape),
+        "trip_count": np.zeros(shape, dtype=np.int64),
+        "speed_sketch": np.zeros(shape + (N_BUCKETS,), dtype=np.int64),
+    }
+    months = [m - 1 for m in months]
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        for y, year in enumerate(YEARS):
+            if (taxi_type, year) not in grouped:
+                continue
+            partial = grouped[(taxi_type, year)][1]
+            cells["speed_sum"][t, y] = partial["velocity_sum"][months]
+            cells["speed_sumsq"][t, y] = partial["velocity_sumsq"][months]
+            cells["trip_count"][t, y] = partial["velocity_count"][months]
+            cells["speed_sketch"][t, y] = partial["velocity_sketch"][months]
+    return cells
+
+
+def cube_from_cells(cells):
+    """Sum the month axis away, giving the (taxi_type, year, dow, hour) cube"""
+    return {key: values.sum(axis=2) for key, values in cells.items()}
+
+
+def mean_speed(cube):
+    """Average MPH per cell, NaN where a cell has no trips"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cube["speed_sum"] / cube["trip_count"]
+
+
+def velocity_summary(cube):
+    """Velocity section of the results file: overall before/after MPH per taxi type"""
+    taxi_types = {}
+    for t, taxi_type in enumerate(TAXI_TYPES):
+        counts = cube["trip_count"][t].sum(axis=(1, 2))
+        if (counts == 0).any():
+            continue
+        before, after = cube["speed_sum"][t].sum(axis=(1, 2)) / counts
+        taxi_types[taxi_type] = {
+            "before_mph": float(before),
+            "after_mph": float(after),
+            "change_mph": float(after - before),
+            "change_pct": float((after - before) / before * 100),
+        }
+    if not taxi_types:
+        return None
+    combined = {
+        key: float(np.mean([summary[key] for summary in taxi_types.values()]))
+        for key in ("change_mph", "change_pct")
+    }
+    return {"before_year": YEARS[0], "after_year": YEARS[1], "taxi_types": taxi_types, "combined": combined}
+
+
+def write_velocity_cube(cube, path):
+    """Save the cube with its axis labels as a compressed .npz"""
+    atomic_savez(
+        path,
+        taxi_types=np.array(TAXI_TYPES),
+        years=np.array(YEARS),
+        speed_sum=cube["speed_sum"].astype(np.float32),
+        speed_sumsq=cube["speed_sumsq"].astype(np.float32),
+        trip_count=cube["trip_count"].astype(np.int32),
+        speed_sketch=cube["speed_sketch"].astype(np.int32),
+        sketch_low=np.array(SPEED_LOW),
+        sketch_gamma=np.array(GAMMA),
+        # Read straight from the sketches so the dashboard needs no sketch code
+        quantiles=np.array(HEATMAP_QUANTILES),
+        speed_quantiles=sketch_quantiles(cube["speed_sketch"], HEATMAP_QUANTILES).astype(np.float32),
+    )
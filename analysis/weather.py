@@ -0,0 +1,134 @@
+"""
+Daily precipitation for the Tab 4 rain analysis
+Responses are cached on disk per location; a request only fetches the dates
+the cache does not already hold. Providers are interchangeable so rebuilds
+can run from a local file with no network access.
+Run with: python -m analysis.weather --year 2025
+"""
+
+import argparse
+
+import pandas as pd
+
+from analysis.config import CENTRAL_PARK, VISUALIZATIONS_DIR, WEATHER_CACHE_DIR
+
+OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+
+class OpenMeteoProvider:
+    """Daily precipitation from the Open-Meteo Historical Weather API"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def fetch(self, latitude, longitude, start, end):
+        """Return date, precipitation_mm rows for start..end inclusive"""
+        import requests
+
+        response = requests.get(OPEN_METEO_ARCHIVE_URL, params={
+            "latitude": latitude,
+            "longitude": longitude,
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": end.strftime("%Y-%m-%d"),
+            "daily": "precipitation_sum",
+            "timezone": "America/New_York",
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        daily = response.json()["daily"]
+        return pd.DataFrame({
+            "date": pd.to_datetime(daily["time"]),
+            "precipitation_mm": pd.to_numeric(pd.Series(daily["precipitation_sum"]), errors="coerce"),
+        })
+
+
+class FileProvider:
+    """Local stand-in provider backed by a date,precipitation_mm CSV"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, latitude, longitude, start, end):
+        """Return the rows of the file that fall within start..end inclusive"""
+        data = pd.read_csv(self.path, usecols=["date", "precipitation_mm"], parse_dates=["date"])
+        return data[(data["date"] >= start) & (data["date"] <= end)].reset_index(drop=True)
+
+
+def missing_ranges(dates, start, end):
+    """Contiguous (start, end) date ranges in start..end not present in dates"""
+    wanted = pd.date_range(start, end, freq="D")
+    missing = wanted[~wanted.isin(dates)]
+    if missing.empty:
+        return []
+    # A new run starts wherever the gap to the previous missing day exceeds one day
+    breaks = (missing.to_series().diff() != pd.Timedelta(days=1)).cumsum()
+    return [(run.iloc[0], run.iloc[-1]) for _, run in missing.to_series().groupby(breaks.values)]
+
+
+class WeatherCache:
+    """On-disk precipitation cache, one CSV per location"""
+
+    def __init__(self, provider, cache_dir=WEATHER_CACHE_DIR):
+        self.provider = provider
+        self.cache_dir = cache_dir
+
+    def cache_path(self, latitude, longitude):
+        """Cache file for a location, rounded to the API's 4-decimal precision"""
+        return self.cache_dir / f"precipitation_{latitude:.4f}_{longitude:.4f}.csv"
+
+    def load(self, latitude, longitude):
+        """Cached rows for a location (empty if nothing is cached yet)"""
+        path = self.cache_path(latitude, longitude)
+        if not path.exists():
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "precipitation_mm": pd.Series(dtype=float)})
+        return pd.read_csv(path, parse_dates=["date"])
+
+    def daily_precipitation(self, latitude, longitude, start, end):
+        """Daily precipitation for start..end, fetching only dates missing from the cache"""
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        cached = self.load(latitude, longitude)
+        gaps = missing_ranges(cached["date"], start, end)
+        if gaps:
+            fetched = [self.provider.fetch(latitude, longitude, gap_start, gap_end) for gap_start, gap_end in gaps]
+            # Days the provider has not published yet come back empty - leave them uncached
+            fetched = [frame.dropna(subset=["precipitation_mm"]) for frame in fetched]
+            cached = (
+                pd.concat([cached] + fetched, ignore_index=True)
+                .drop_duplicates(subset="date", keep="last")
+                .sort_values("date")
+            )
+            path = self.cache_path(latitude, longitude)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            cached.to_csv(path, index=False, date_format="%Y-%m-%d")
+        in_range = (cached["date"] >= start) & (cached["date"] <= end)
+        return cached[in_range].reset_index(drop=True)
+
+
+def precipitation_frame(daily):
+    """Add the month, day_of_week (Monday = 0) and is_rainy columns used by the rain analysis"""
+    daily = daily.copy()
+    daily["month"] = daily["date"].dt.month
+    daily["day_of_week"] = daily["date"].dt.dayofweek
+    daily["is_rainy"] = daily["precipitation_mm"] > 0
+    daily["date"] = daily["date"].dt.strftime("%Y-%m-%d")
+    return daily
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Central Park daily precipitation CSV")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--from-file", default=None,
+                        help="Read precipitation from this CSV instead of the Open-Meteo API")
+    args = parser.parse_args()
+
+    provider = FileProvider(args.from_file) if args.from_file else OpenMeteoProvider()
+    cache = WeatherCache(provider)
+    latitude, longitude = CENTRAL_PARK
+    daily = cache.daily_precipitation(latitude, longitude, f"{args.year}-01-01", f"{args.year}-12-31")
+
+    output = VISUALIZATIONS_DIR / f"central_park_precipitation_{args.year}_real.csv"
+    precipitation_frame(daily).to_csv(output, index=False)
+    print(f"Wrote {len(daily)} days ({daily['precipitation_mm'].sum():.0f} mm) to {output}")
+
+
+if __name__ == "__main__":
+    main()
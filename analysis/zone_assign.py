@@ -0,0 +1,120 @@
+"""
+Bulk point-in-polygon taxi zone assignment
+Maps pickup/drop-off coordinates to TLC LocationIDs for feeds that carry only
+lat/lon (e.g. 2009-2016 yellow taxi files). A regular lon/lat grid is
+precomputed over the zones: cells lying entirely inside one zone answer
+directly from a lookup array, and only points in cells crossed by a zone
+boundary fall through to an STRtree point-in-polygon query.
+Run with: python -m analysis.zone_assign [--points 10000000]
+"""
+
+import argparse
+import functools
+import time
+
+import numpy as np
+import shapely
+
+from analysis.config import ZONE_SHAPES_PATH
+
+# Grid cell size in degrees (~110 m x 85 m at NYC's latitude)
+GRID_CELL_DEG = 0.001
+
+# Lookup values besides LocationIDs: outside every zone, or needs the exact test
+NO_ZONE = 0
+BOUNDARY = -1
+
+
+class ZoneAssigner:
+    """Assigns LocationIDs to lon/lat points (0 = outside every taxi zone)"""
+
+    def __init__(self, geometries, location_ids, cell_deg=GRID_CELL_DEG):
+        self.geometries = np.asarray(geometries)
+        self.location_ids = np.asarray(location_ids, dtype=np.int16)
+        self.tree = shapely.STRtree(self.geometries)
+        # Prepared zones make each point / cell test sublinear in the zone's vertex count
+        shapely.prepare(self.geometries)
+        self.cell_deg = cell_deg
+        self.x0, self.y0, x1, y1 = shapely.total_bounds(self.geometries)
+        self.shape = (int(np.ceil((y1 - self.y0) / cell_deg)), int(np.ceil((x1 - self.x0) / cell_deg)))
+        self.grid = self._build_grid()
+
+    def _build_grid(self):
+        """Per-cell LocationID where one zone covers the whole cell, BOUNDARY where zones cross it"""
+        rows, cols = np.indices(self.shape)
+        x = self.x0 + cols.ravel() * self.cell_deg
+        y = self.y0 + rows.ravel() * self.cell_deg
+        cells = shapely.box(x, y, x + self.cell_deg, y + self.cell_deg)
+        grid = np.full(cells.size, NO_ZONE, dtype=np.int16)
+        # Query with the zones as input so the predicates run on the prepared zone side
+        cell_tree = shapely.STRtree(cells)
+        _, touching = cell_tree.query(self.geometries, predicate="intersects")
+        grid[touching] = BOUNDARY
+        zone, inside = cell_tree.query(self.geometries, predicate="contains")
+        grid[inside] = self.location_ids[zone]
+        return grid.reshape(self.shape)
+
+    def cells(self, lon, lat):
+        """Grid (row, col) of each point and whether it falls on the grid at all"""
+        col = np.floor((lon - self.x0) / self.cell_deg)
+        row = np.floor((lat - self.y0) / self.cell_deg)
+        on_grid = (row >= 0) & (row < self.shape[0]) & (col >= 0) & (col < self.shape[1])
+        return np.where(on_grid, row, 0).astype(np.int64), np.where(on_grid, col, 0).astype(np.int64), on_grid
+
+    def assign(self, lon, lat):
+        """LocationID per point; NaN or out-of-area coordinates give 0"""
+        lon, lat = np.asarray(lon, dtype=np.float64), np.asarray(lat, dtype=np.float64)
+        row, col, on_grid = self.cells(lon, lat)
+        zones = np.where(on_grid, self.grid[row, col], NO_ZONE).astype(np.int16)
+
+        # Exact test only for points in boundary cells; first matching zone wins on shared edges
+        exact = np.flatnonzero(zones == BOUNDARY)
+        zones[exact] = NO_ZONE
+        if len(exact):
+            x, y = lon[exact], lat[exact]
+            # Bounding-box candidates from the tree, then the exact test against the prepared zones
+            points, zone = self.tree.query(shapely.points(x, y))
+            hit = shapely.intersects_xy(self.geometries[zone], x[points], y[points])
+            points, zone = points[hit], zone[hit]
+            first = np.unique(points, return_index=True)[1]
+            zones[exact[points[first]]] = self.location_ids[zone[first]]
+        return zones
+
+    def boundary_share(self):
+        """Fraction of on-land grid cells that need the exact test"""
+        land = self.grid != NO_ZONE
+        return float((self.grid[land] == BOUNDARY).mean()) if land.any() else 0.0
+
+
+@functools.lru_cache(maxsize=1)
+def default_assigner(path=ZONE_SHAPES_PATH):
+    """Assigner over the TLC taxi zone shapefile in WGS84, built once per process"""
+    from analysis.zone_map import load_zones
+
+    zones = load_zones(path).to_crs(4326)
+    return ZoneAssigner(zones.geometry.values, zones["LocationID"].to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk zone assignment on random points over NYC")
+    parser.add_argument("--points", type=int, default=10_000_000, help="Random points to assign")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    assigner = default_assigner()
+    print(f"Grid {assigner.shape[0]} x {assigner.shape[1]} built in {time.perf_counter() - start:.2f}s "
+          f"({assigner.boundary_share():.1%} of land cells need the exact test)")
+
+    rng = np.random.default_rng(0)
+    x0, y0 = assigner.x0, assigner.y0
+    x1, y1 = x0 + assigner.shape[1] * assigner.cell_deg, y0 + assigner.shape[0] * assigner.cell_deg
+    lon, lat = rng.uniform(x0, x1, args.points), rng.uniform(y0, y1, args.points)
+    start = time.perf_counter()
+    zones = assigner.assign(lon, lat)
+    elapsed = time.perf_counter() - start
+    print(f"Assigned {args.points:,} points in {elapsed:.2f}s ({args.points / elapsed * 60 / 1e6:,.0f}M points/min), "
+          f"{np.count_nonzero(zones):,} inside a zone")
+
+
+if __name__ == "__main__":
+    main()
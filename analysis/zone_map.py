@@ -0,0 +1,139 @@
+"""
+Compact taxi-zone geometries for the Tab 1 choropleth
+The TLC taxi zone shapefile is dissolved to one shape per LocationID, simplified
+once per map detail level (as a coverage where possible, so neighbouring zones
+keep sharing their edges), reprojected to WGS84 and stored
+TopoJSON-style: coordinates quantized onto an integer grid and delta-encoded
+per ring. The dashboard decodes the level it needs into GeoJSON.
+Run with: python -m analysis.zone_map
+"""
+
+import argparse
+import json
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from analysis.config import ZONE_MAP_PATH, ZONE_MAP_VERSION, ZONE_SHAPES_PATH
+
+# Detail level -> (map zoom it is meant for, simplification tolerance in feet, decimals
+# the decoded lon/lat are rounded to); tolerance and rounding stay around a pixel at that zoom
+DETAIL_LEVELS = {
+    "city": (10, 400.0, 4),
+    "borough": (12, 100.0, 5),
+    "street": (14, 25.0, 5),
+}
+
+# Grid cells per axis over the bounding box: ~5 m steps across NYC
+QUANTIZATION = 10_000
+
+
+def load_zones(path=ZONE_SHAPES_PATH):
+    """One (multi)polygon per LocationID in the shapefile's projected CRS"""
+    zones = gpd.read_file(path)[["LocationID", "zone", "borough", "geometry"]]
+    # A few IDs (e.g. 56, 103) are split across several records
+    zones = zones.dissolve(by="LocationID", aggfunc="first").reset_index()
+    zones["geometry"] = shapely.make_valid(zones.geometry.values)
+    return zones.sort_values("LocationID").reset_index(drop=True)
+
+
+def simplify_levels(zones):
+    """GeoSeries in WGS84 per detail level
+
+    A clean coverage (no overlaps, matching shared edges) is simplified as a
+    whole so neighbours stay gap-free; otherwise coverage simplification cannot
+    touch the mismatched edges and each zone is simplified on its own.
+    """
+    geometries = zones.geometry.values
+    coverage = bool(shapely.coverage_is_valid(geometries))
+    levels = {}
+    for level, (_, tolerance, _) in DETAIL_LEVELS.items():
+        if coverage:
+            simplified = shapely.coverage_simplify(geometries, tolerance)
+        else:
+            simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+        levels[level] = gpd.GeoSeries(simplified, crs=zones.crs).to_crs(4326)
+    return levels
+
+
+def quantize_transform(levels):
+    """TopoJSON-style transform mapping the integer grid back to lon/lat"""
+    x0, y0, x1, y1 = np.array([series.total_bounds for series in levels.values()]).T
+    x0, y0, x1, y1 = x0.min(), y0.min(), x1.max(), y1.max()
+    return {"scale": [(x1 - x0) / (QUANTIZATION - 1), (y1 - y0) / (QUANTIZATION - 1)], "translate": [x0, y0]}
+
+
+def encode_ring(coords, transform):
+    """Quantize a ring and delta-encode it as a flat [x0, y0, dx1, dy1, ...] list"""
+    grid = np.round((np.asarray(coords)[:, :2] - transform["translate"]) / transform["scale"]).astype(np.int64)
+    # Drop points that collapse onto their predecessor after quantization
+    keep = np.ones(len(grid), dtype=bool)
+    keep[1:] = (np.diff(grid, axis=0) != 0).any(axis=1)
+    grid = grid[keep]
+    deltas = np.vstack([grid[:1], np.diff(grid, axis=0)])
+    return deltas.ravel().tolist()
+
+
+def encode_geometry(geometry, transform):
+    """Polygons -> rings -> encoded coordinates, dropping rings too small to draw"""
+    polygons = getattr(geometry, "geoms", [geometry])
+    encoded = []
+    for polygon in polygons:
+        if polygon.geom_type != "Polygon" or polygon.is_empty:
+            continue
+        rings = [encode_ring(ring.coords, transform) for ring in (polygon.exterior, *polygon.interiors)]
+        rings = [ring for ring in rings if len(ring) >= 8]
+        if rings:
+            encoded.append(rings)
+    return encoded
+
+
+def build_zone_map(zones):
+    """Compact zone map document for every detail level"""
+    levels = simplify_levels(zones)
+    transform = quantize_transform(levels)
+    return {
+        "version": ZONE_MAP_VERSION,
+        "transform": transform,
+        "zones": {str(int(row.LocationID)): {"zone": row.zone, "borough": row.borough} for row in zones.itertuples()},
+        "levels": {
+            level: {
+                "zoom": DETAIL_LEVELS[level][0],
+                "decimals": DETAIL_LEVELS[level][2],
+                "shapes": {
+                    str(int(location_id)): encode_geometry(geometry, transform)
+                    for location_id, geometry in zip(zones["LocationID"], series)
+                },
+            }
+            for level, series in levels.items()
+        },
+    }
+
+
+def write_zone_map(zone_map, path=ZONE_MAP_PATH):
+    """Write the zone map as minified JSON, atomically"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(zone_map, f, separators=(",", ":"))
+    tmp_path.replace(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compact taxi zone map used by the Tab 1 choropleth")
+    parser.add_argument("--shapes", default=ZONE_SHAPES_PATH, help="TLC taxi_zones shapefile")
+    args = parser.parse_args()
+
+    zones = load_zones(args.shapes)
+    zone_map = build_zone_map(zones)
+    write_zone_map(zone_map)
+    print(f"Wrote {ZONE_MAP_PATH} ({ZONE_MAP_PATH.stat().st_size / 1024:.1f} KB, {len(zones)} zones)")
+    for level, data in zone_map["levels"].items():
+        size = len(json.dumps(data["shapes"], separators=(",", ":"))) / 1024
+        points = sum(len(ring) // 2 for polygons in data["shapes"].values() for polygon in polygons for ring in polygon)
+        print(f"  {level:8s} zoom {data['zoom']:2d}: {points:6,} points, {size:6.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
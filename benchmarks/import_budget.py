@@ -0,0 +1,110 @@
+"""
+Import-time budget for the dashboard
+Runs the module-level imports of dashboard.py in fresh interpreters and fails
+when the median cold import time exceeds the budget, or when the dashboard's own
+imports pull in a library that is meant to be imported lazily (plotting / geo
+stacks). Packages Streamlit itself loads at import are not counted against it.
+Run with: python benchmarks/import_budget.py [--budget 1.5] [--runs 5] [--profile]
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DASHBOARD_PATH = Path(__file__).resolve().parent.parent / "dashboard.py"
+
+# Median seconds for the module-level imports on the deployment container
+DEFAULT_BUDGET = float(os.environ.get("DASHBOARD_IMPORT_BUDGET", 1.5))
+
+# Top-level packages that must only be imported on the code path that needs them
+DEFERRED_MODULES = ("plotly", "folium", "streamlit_folium", "branca", "geopandas", "shapely",
+                    "pyproj", "fiona", "matplotlib", "seaborn", "scipy", "duckdb")
+
+# Child script: time the imports, then report which deferred packages got loaded
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split(".")[0] for name in sys.modules}} & set({deferred!r}))
+print(json.dumps({{"seconds": elapsed, "deferred_loaded": loaded}}))
+"""
+
+
+def module_imports(path=DASHBOARD_PATH):
+    """Source of every module-level import statement in a script"""
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source)
+    return [ast.get_source_segment(source, node) for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def probe_imports(imports):
+    """Import time and loaded deferred packages in one fresh interpreter"""
+    script = PROBE.format(imports="\n".join(imports), deferred=DEFERRED_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            check=True, cwd=DASHBOARD_PATH.parent)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def streamlit_baseline():
+    """Deferred packages already loaded by `import streamlit` on its own"""
+    return set(probe_imports(["import streamlit"])["deferred_loaded"])
+
+
+def import_profile(imports, top_n=10):
+    """Slowest top-level packages by cumulative time, from python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "\n".join(imports)],
+                            capture_output=True, text=True, check=True, cwd=DASHBOARD_PATH.parent)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        # Nested imports are indented two spaces per level; keep the top-level ones
+        if not name.startswith("  "):
+            cumulative[name.strip()] = int(cumulative_us) / 1e6
+    return sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top_n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if dashboard cold-start imports exceed a time budget")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="median seconds allowed")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--profile", action="store_true", help="list the slowest top-level imports")
+    args = parser.parse_args()
+
+    imports = module_imports()
+    runs = [probe_imports(imports) for _ in range(args.runs)]
+    seconds = [run["seconds"] for run in runs]
+    median = statistics.median(seconds)
+    print(f"Module-level imports: {len(imports)} statements in {DASHBOARD_PATH.name}")
+    print(f"Cold import time: median {median:.3f}s, min {min(seconds):.3f}s, "
+          f"max {max(seconds):.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+
+    if args.profile:
+        for name, cumulative in import_profile(imports):
+            print(f"  {cumulative:7.3f}s  {name}")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median {median:.3f}s exceeds the {args.budget:.3f}s budget")
+    deferred_loaded = sorted(set(runs[0]["deferred_loaded"]) - streamlit_baseline())
+    if deferred_loaded:
+        failures.append(f"deferred packages imported at startup: {', '.join(deferred_loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Headless render benchmark for the dashboard
+Runs dashboard.py through Streamlit's AppTest and times the cold start, a warm
+rerun and every tab's first and repeat render, then replays many simulated
+sessions through the tabs so the shared image / results caches are exercised
+under repeated reruns. Peak RSS and cache sizes are recorded alongside, and the
+report is written as JSON so runs can be compared across commits.
+Run with: python benchmarks/render_benchmark.py [--sessions 8] [--reruns 3] [--compare old.json]
+"""
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import streamlit
+import streamlit.logger
+from streamlit.runtime.caching import get_data_cache_stats_provider, get_resource_cache_stats_provider
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DASHBOARD_PATH = REPO_DIR / "dashboard.py"
+# Reports are named after the commit they measured (benchmarks/results is gitignored)
+RESULTS_DIR = REPO_DIR / "benchmarks" / "results"
+
+# Seconds a single script run may take before AppTest gives up
+RUN_TIMEOUT = 120
+
+
+def timed_run(app):
+    """Run the script once and return the elapsed seconds, failing on app exceptions"""
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(f"dashboard raised: {app.exception[0].value}")
+    return elapsed
+
+
+def tab_names(app):
+    """Options of the lazy tab selector (empty when the tabs render eagerly)"""
+    if not any(radio.key == "active_tab" for radio in app.radio):
+        return []
+    return list(app.radio(key="active_tab").options)
+
+
+def select_tab(app, tab):
+    """Switch the tab selector and time the rerun it triggers"""
+    app.radio(key="active_tab").set_value(tab)
+    return timed_run(app)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def cache_stats(provider):
+    """Flat list of CacheStat records from a Streamlit cache stats provider"""
+    stats = provider.get_stats()
+    return [stat for family in stats.values() for stat in family] if isinstance(stats, dict) else list(stats)
+
+
+def cache_sizes():
+    """Entries (and pickled bytes for st.cache_data) per cached function"""
+    sizes = {}
+    # st.cache_data reports one record per entry with its pickled size
+    for stat in cache_stats(get_data_cache_stats_provider()):
+        entry = sizes.setdefault(f"data:{stat.cache_name.rsplit('.', 1)[-1]}", {"entries": 0, "bytes": 0})
+        entry["entries"] += 1
+        entry["bytes"] += stat.byte_length
+    # st.cache_resource holds live objects and only reports its entry count
+    for stat in cache_stats(get_resource_cache_stats_provider()):
+        sizes[f"resource:{stat.cache_name.rsplit('.', 1)[-1]}"] = {"entries": stat.byte_length, "bytes": None}
+    return dict(sorted(sizes.items()))
+
+
+def summarize(seconds):
+    """Count, median, p95 and max of a list of timings"""
+    ordered = sorted(seconds)
+    return {
+        "runs": len(ordered),
+        "median_s": statistics.median(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "max_s": ordered[-1],
+    }
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git tree"""
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=REPO_DIR)
+    return result.stdout.strip() or None
+
+
+def run_benchmark(sessions, reruns):
+    """Time cold start, warm rerun, each tab and the simulated sessions"""
+    app = AppTest.from_file(str(DASHBOARD_PATH), default_timeout=RUN_TIMEOUT)
+    cold_start = timed_run(app)
+    warm_rerun = timed_run(app)
+
+    tabs = {}
+    for tab in tab_names(app):
+        first = select_tab(app, tab)
+        repeat = select_tab(app, tab)
+        tabs[tab] = {"first_s": first, "repeat_s": repeat}
+
+    # Fresh AppTests are fresh sessions; st.cache_resource (images, reports) is shared between them
+    session_runs, session_tab_runs = [], []
+    for _ in range(sessions):
+        session = AppTest.from_file(str(DASHBOARD_PATH), default_timeout=RUN_TIMEOUT)
+        session_runs.append(timed_run(session))
+        for _ in range(reruns):
+            session_runs.append(timed_run(session))
+            for tab in tab_names(session):
+                session_tab_runs.append(select_tab(session, tab))
+
+    return {
+        "cold_start_s": cold_start,
+        "warm_rerun_s": warm_rerun,
+        "tabs": tabs,
+        "sessions": {
+            "count": sessions,
+            "reruns_per_session": reruns,
+            "rerun": summarize(session_runs),
+            "tab_switch": summarize(session_tab_runs) if session_tab_runs else None,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "cache_sizes": cache_sizes(),
+    }
+
+
+def compare(report, baseline):
+    """Print the relative change of each timing against a previous report"""
+    def timings(section, prefix=""):
+        for key, value in section.items():
+            if isinstance(value, dict):
+                yield from timings(value, f"{prefix}{key}.")
+            elif key.endswith("_s") or key == "peak_rss_mb":
+                yield f"{prefix}{key}", value
+
+    old = dict(timings(baseline["results"]))
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('created_at')}):")
+    for name, value in timings(report["results"]):
+        if old.get(name):
+            print(f"  {name:40s} {old[name]:9.3f} -> {value:9.3f}  ({(value - old[name]) / old[name] * 100:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless render benchmark for dashboard.py")
+    parser.add_argument("--sessions", type=int, default=8, help="simulated sessions to replay")
+    parser.add_argument("--reruns", type=int, default=3, help="reruns (each visiting every tab) per session")
+    parser.add_argument("--output", type=Path, help="JSON report path (default: results/render_<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="previous JSON report to diff against")
+    args = parser.parse_args()
+
+    # Deprecation notices are logged on every rerun and would drown the report
+    streamlit.logger.set_log_level("error")
+    # Read the baseline first: it may be the very file this run overwrites
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "results": run_benchmark(args.sessions, args.reruns),
+    }
+    output = args.output or RESULTS_DIR / f"render_{report['commit'] or 'worktree'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=1) + "\n", encoding="utf-8")
+
+    results = report["results"]
+    print(f"Cold start {results['cold_start_s']:.3f}s | warm rerun {results['warm_rerun_s']:.3f}s | "
+          f"peak RSS {results['peak_rss_mb']:.0f} MB")
+    for tab, timing in results["tabs"].items():
+        print(f"  {tab:40s} first {timing['first_s']:.3f}s  repeat {timing['repeat_s']:.3f}s")
+    for name, size in results["cache_sizes"].items():
+        kb = f"{size['bytes'] / 1024:10.1f} KB" if size["bytes"] is not None else ""
+        print(f"  {name:40s} {size['entries']:3d} entries {kb}")
+    print(f"Wrote {output}")
+
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,30 @@ Run with: streamlit run dashboard.py
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from PIL import Image
-from pathlib import Path
-import base64
-import folium
-from streamlit_folium import folium_static
+from datetime import datetime
+import hashlib
+import io
+import zipfile
 import numpy as np
-import re
+import json
+import os
+import time
+import uuid
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Paths and artifact versions are shared with the pipeline that writes the files
+from analysis import daily_index
+from analysis.config import (
+    ARTIFACTS_DIR, CENTRAL_PARK, RESULTS_PATH, STATIC_DIR, VISUALIZATIONS_DIR, ZONE_MAP_PATH, ZONE_MAP_VERSION,
+)
+from analysis.daily_index import DAILY_INDEX_PATH
+from analysis.results import RESULTS_SCHEMA_VERSION
+
+# Plotting and geo libraries are imported inside the code paths that use them, not
+# here; benchmarks/import_budget.py keeps the module-level imports within budget.
 
 # Set page config
 st.set_page_config(
@@ -23,9 +38,87 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+script_start = time.perf_counter()
+
+# Hot-path instrumentation: every timed section of this script run is collected in
+# run_timings, then folded into per-session and process-wide aggregates at the end.
+# The diagnostics expander is hidden unless ?diagnostics=1 or DASHBOARD_DIAGNOSTICS=1.
+DIAGNOSTICS = os.environ.get("DASHBOARD_DIAGNOSTICS") == "1" or st.query_params.get("diagnostics") == "1"
+TIMINGS_LOG = os.environ.get("DASHBOARD_TIMINGS_LOG")
+RECENT_RUNS = 200
+run_timings = []
+
+@contextmanager
+def timed(section):
+    """Record the wall time of a block under a section name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run_timings.append((section, time.perf_counter() - start))
+
+def timed_function(func):
+    """Decorator timing every call of a helper under its function name"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+# Function to hold timing aggregates shared by every session in this server process
+@st.cache_resource
+def timing_store():
+    """Process-wide section aggregates and the lock guarding them"""
+    return {"lock": threading.Lock(), "sections": {}, "runs": 0}
+
+def add_timing(sections, section, seconds):
+    """Fold one measurement into a {section: {calls, total_s, max_s, last_s}} aggregate"""
+    stats = sections.setdefault(section, {"calls": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0})
+    stats["calls"] += 1
+    stats["total_s"] += seconds
+    stats["max_s"] = max(stats["max_s"], seconds)
+    stats["last_s"] = seconds
+
+def record_run_timings():
+    """Aggregate this run's timings into the session and global stores (and the JSONL log)"""
+    session = st.session_state.setdefault("timings", {
+        "session_id": uuid.uuid4().hex[:12], "sections": {}, "runs": deque(maxlen=RECENT_RUNS)})
+    run = {"ts": datetime.now().isoformat(timespec="milliseconds"), "session_id": session["session_id"],
+           "sections": {}}
+    for section, seconds in run_timings:
+        add_timing(session["sections"], section, seconds)
+        run["sections"][section] = run["sections"].get(section, 0.0) + seconds * 1000
+    session["runs"].append(run)
+    store = timing_store()
+    with store["lock"]:
+        store["runs"] += 1
+        for section, seconds in run_timings:
+            add_timing(store["sections"], section, seconds)
+        if TIMINGS_LOG:
+            with open(TIMINGS_LOG, "a", encoding="utf-8") as log:
+                log.write(json.dumps(run) + "\n")
+    return session, store
+
+def timing_frame(sections):
+    """Per-section table in milliseconds, slowest total first"""
+    rows = [{"Section": section, "Calls": stats["calls"], "Total ms": stats["total_s"] * 1000,
+             "Mean ms": stats["total_s"] * 1000 / stats["calls"], "Max ms": stats["max_s"] * 1000,
+             "Last ms": stats["last_s"] * 1000} for section, stats in sections.items()]
+    return pd.DataFrame(rows).sort_values("Total ms", ascending=False) if rows else pd.DataFrame()
+
+def timings_jsonl(session, global_sections):
+    """JSON lines export: session and global aggregates, then this session's recent runs"""
+    lines = []
+    for scope, sections in (("session", session["sections"]), ("global", global_sections)):
+        for section, stats in sections.items():
+            lines.append({"scope": scope, "session_id": session["session_id"], "section": section,
+                          "calls": stats["calls"], "total_ms": stats["total_s"] * 1000,
+                          "mean_ms": stats["total_s"] * 1000 / stats["calls"], "max_ms": stats["max_s"] * 1000})
+    lines += [{"scope": "run", **run} for run in session["runs"]]
+    return "\n".join(json.dumps(line) for line in lines) + "\n"
 
 # GREY/BLACK THEME CSS with larger text sizes
-st.markdown("""
+THEME_CSS = """
 <style>
     /* Main Grey/Black Theme */
     .main {
@@ -239,6 +332,13 @@ st.markdown("""
         box-shadow: 0 8px 25px rgba(71, 85, 105, 0.4);
     }
     
+    /* Tab selector - LARGER */
+    div[role="radiogroup"] label p {
+        font-size: 24px !important;
+        font-weight: 700;
+        color: #e2e8f0;
+    }
+    
     /* Column spacing */
     [data-testid="column"] {
         padding: 20px !important;
@@ -291,31 +391,398 @@ st.markdown("""
         border-left: 5px solid #64748b;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+with timed("css"):
+    st.markdown(THEME_CSS, unsafe_allow_html=True)
 
 # Main header with larger text
 st.markdown('<div class="main-header">NYC CONGESTION PRICING AUDIT 2025 DASHBOARD</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-header">Impact Analysis of Manhattan Congestion Relief Zone Toll (Implemented Jan 5, 2025)</div>', unsafe_allow_html=True)
 
-# Initialize paths
-BASE_DIR = Path.cwd()
-VISUALIZATIONS_DIR = BASE_DIR / "outputs" / "visualizations"
+DAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# Pre-encoded image variants written by `python -m analysis.images`, served as
+# plain files at app/static/ (server.enableStaticServing in .streamlit/config.toml)
+IMAGE_INDEX_PATH = STATIC_DIR / "images" / "images.json"
+IMAGE_URL_PREFIX = "app/static/images"
+# In order of preference; the browser takes the first it can decode and the last,
+# most widely supported one doubles as the plain <img> fallback
+IMAGE_FORMATS = ("avif", "webp")
+
+# Function to load the image variant index
+@st.cache_resource
+def load_image_index(index_path, mtime):
+    """Load the variant index (mtime is only part of the cache key)"""
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
-# Function to load images with error handling
+def image_variants(image_path, width):
+    """(format, static URL) of the pre-encoded variant for a display width, per available format"""
+    if not IMAGE_INDEX_PATH.exists():
+        return []
+    index = load_image_index(IMAGE_INDEX_PATH, IMAGE_INDEX_PATH.stat().st_mtime)
+    entry = index["images"].get(image_path.name)
+    if not entry:
+        return []
+    urls = []
+    for fmt in IMAGE_FORMATS:
+        variants = sorted((v for v in entry["variants"] if v["format"] == fmt), key=lambda v: v["width"])
+        if variants:
+            # Smallest variant at least as wide as the slot, else the largest available
+            variant = next((v for v in variants if v["width"] >= width), variants[-1])
+            if (IMAGE_INDEX_PATH.parent / variant["file"]).exists():
+                urls.append((fmt, f"{IMAGE_URL_PREFIX}/{variant['file']}"))
+    return urls
+
+# Function to load the results file, re-read only when it changes on disk
 @st.cache_data
-def load_image(image_path):
-    """Load an image with error handling"""
-    try:
-        if image_path.exists():
-            return Image.open(image_path)
-        else:
-            st.warning(f"Image not found: {image_path}")
-            return None
-    except Exception as e:
-        st.warning(f"Error loading image {image_path}: {str(e)}")
+def load_results(results_path, mtime_ns, size):
+    """Load results.json (mtime and size are only part of the cache key)"""
+    with open(results_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@timed_function
+def read_results():
+    """Return the results file, stopping the app if it is missing or from another schema"""
+    if not RESULTS_PATH.exists():
+        st.error(f"Results file not found: {RESULTS_PATH} - run `python -m analysis.build`")
+        st.stop()
+    stat = RESULTS_PATH.stat()
+    results = load_results(RESULTS_PATH, stat.st_mtime_ns, stat.st_size)
+    if results.get("schema_version") != RESULTS_SCHEMA_VERSION:
+        st.error(f"{RESULTS_PATH.name} has schema version {results.get('schema_version')}, "
+                 f"expected {RESULTS_SCHEMA_VERSION} - rebuild it with `python -m analysis.build`")
+        st.stop()
+    return results
+
+def missing_notice(what):
+    """Info box in place of figures the results file does not have (yet)"""
+    st.info(f"No {what} in {RESULTS_PATH.name} yet - run `python -m analysis.build` with the matching TLC files")
+
+def seeded_notice(section, what="Figures"):
+    """Caption under figures that were seeded from the analysis reports rather than built"""
+    source = results.get("sources", {}).get(section)
+    if source and source["source"] == "seed":
+        st.caption(f"{what} seeded from {', '.join(source['from']) or 'the original dashboard'} "
+                   f"- not rebuilt from trip data yet")
+
+# Reports offered for download; the bundle also carries the daily trip and precipitation CSVs
+REPORTS = [
+    (VISUALIZATIONS_DIR / "congestion_velocity_summary.txt", "📄 Velocity Analysis Report"),
+    (VISUALIZATIONS_DIR / "tip_crowding_analysis_summary.txt", "📄 Tip Analysis Report"),
+    (VISUALIZATIONS_DIR / "rain_tax_academic_report.txt", "📄 Rain Tax Analysis Report")
+]
+BUNDLE_FILES = [report_path for report_path, _ in REPORTS] + [
+    VISUALIZATIONS_DIR / "daily_taxi_trips_2025_real.csv",
+    VISUALIZATIONS_DIR / "central_park_precipitation_2025_real.csv",
+]
+
+def file_key(path):
+    """(path, mtime_ns, size) cache key for a file on disk"""
+    stat = path.stat()
+    return path, stat.st_mtime_ns, stat.st_size
+
+# Function to load report bytes once, shared across sessions
+@st.cache_resource(max_entries=16)
+def load_report(report_path, mtime_ns, size):
+    """Raw bytes of a report file (mtime and size are only part of the cache key)"""
+    return report_path.read_bytes()
+
+# Function to zip the reports and CSVs once, shared across sessions
+@st.cache_resource(max_entries=2)
+def load_report_bundle(file_keys):
+    """Zip archive of the given files and the sha256 of its contents"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for path, mtime_ns, size in file_keys:
+            # Fixed timestamps keep the archive (and its hash) identical for identical inputs
+            info = zipfile.ZipInfo(path.name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            bundle.writestr(info, load_report(path, mtime_ns, size))
+    data = buffer.getvalue()
+    return data, hashlib.sha256(data).hexdigest()
+
+# Quantized taxi zone geometries (ZONE_MAP_PATH) written by `python -m analysis.zone_map`
+ZONE_MAP_CENTER = {"lat": 40.735, "lon": -73.975}
+
+# Function to decode one detail level of the zone map into GeoJSON, once per file version
+@st.cache_data
+def load_zone_geojson(zone_map_path, mtime, level):
+    """GeoJSON FeatureCollection (feature id = LocationID) and the zoom it is meant for"""
+    with open(zone_map_path, 'r', encoding='utf-8') as f:
+        zone_map = json.load(f)
+    if zone_map.get("version") != ZONE_MAP_VERSION or level not in zone_map["levels"]:
         return None
+    scale, translate = np.array(zone_map["transform"]["scale"]), np.array(zone_map["transform"]["translate"])
+    detail = zone_map["levels"][level]
+    features = []
+    for zone_id, polygons in detail["shapes"].items():
+        # Rings are delta-encoded grid coordinates: cumulative sum, then scale back to lon/lat
+        coordinates = [
+            [np.round(np.cumsum(np.reshape(ring, (-1, 2)), axis=0) * scale + translate, detail["decimals"]).tolist()
+             for ring in polygon]
+            for polygon in polygons
+        ]
+        features.append({"type": "Feature", "id": zone_id, "properties": {"zone": zone_map["zones"][zone_id]["zone"]},
+                         "geometry": {"type": "MultiPolygon", "coordinates": coordinates}})
+    return {"type": "FeatureCollection", "features": features}, detail["zoom"]
+
+def read_zone_geojson(level):
+    """Return (geojson, zoom) for a detail level, or None if the zone map has not been built"""
+    if not ZONE_MAP_PATH.exists():
+        return None
+    return load_zone_geojson(ZONE_MAP_PATH, ZONE_MAP_PATH.stat().st_mtime, level)
+
+def zone_choropleth(geojson, zoom, border_by_type):
+    """Drop-off % change choropleth with client-side buttons switching the taxi type
+
+    Analysed zones and the grey context zones are disjoint feature sets, so each
+    geometry is sent to the browser once; switching taxi type only restyles z.
+    """
+    import plotly.graph_objects as go
+    
+    analysed = set().union(*(summary["zones"] for summary in border_by_type.values()))
+    context = {"type": "FeatureCollection", "features": [f for f in geojson["features"] if f["id"] not in analysed]}
+    coloured = {"type": "FeatureCollection", "features": [f for f in geojson["features"] if f["id"] in analysed]}
+    names = {f["id"]: f["properties"]["zone"] for f in coloured["features"]}
+    limit = max(abs(change) for summary in border_by_type.values() for change in summary["zones"].values())
+    
+    def trace_data(summary):
+        locations = [zone for zone in summary["zones"] if zone in names]
+        return {"locations": locations, "z": [summary["zones"][zone] for zone in locations],
+                "customdata": [names[zone] for zone in locations]}
+    
+    by_type = {taxi_type.title(): trace_data(summary) for taxi_type, summary in border_by_type.items()}
+    first = next(iter(by_type.values()))
+    fig = go.Figure([
+        go.Choroplethmap(geojson=context, locations=[f["id"] for f in context["features"]],
+                         z=[0] * len(context["features"]), colorscale=[[0, "#334155"], [1, "#334155"]],
+                         showscale=False, marker_line_color="#64748b", marker_line_width=0.5,
+                         customdata=[f["properties"]["zone"] for f in context["features"]],
+                         hovertemplate="%{customdata}<br>Not analysed<extra></extra>"),
+        go.Choroplethmap(geojson=coloured, **first, colorscale="RdYlGn", zmid=0, zmin=-limit, zmax=limit,
+                         marker_line_color="#0f172a", marker_line_width=0.8,
+                         colorbar=dict(title="% change", ticksuffix="%"),
+                         hovertemplate="<b>%{customdata}</b><br>%{z:+.1f}% drop-offs<extra></extra>"),
+    ])
+    buttons = [dict(label=f"{label} taxis", method="restyle",
+                    args=[{key: [values] for key, values in data.items()}, [1]]) for label, data in by_type.items()]
+    fig.update_layout(template="plotly_dark", height=640, margin=dict(l=0, r=0, t=50, b=0),
+                      map=dict(style="carto-darkmatter", center=ZONE_MAP_CENTER, zoom=zoom),
+                      updatemenus=[dict(type="buttons", direction="right", buttons=buttons, x=0, y=1.08,
+                                        xanchor="left", showactive=True)])
+    return fig
+
+def speed_verdict(change_pct):
+    """Coloured SLOWER / FASTER / MINIMAL CHANGE label for a % speed change"""
+    if change_pct <= -1:
+        color, verdict = "#f87171", "SLOWER"
+    elif change_pct >= 1:
+        color, verdict = "#4ade80", "FASTER"
+    else:
+        color, verdict = "#cbd5e1", "MINIMAL CHANGE"
+    return f'<span style="color: {color}; font-weight: 800; font-size: 20px;">{verdict}</span>'
+
+# Hypothesis verdicts and their colours in the assessment boxes
+VERDICT_COLORS = {
+    "SUPPORTED": "#4ade80",
+    "PARTIALLY SUPPORTED": "#fbbf24",
+    "NOT SUPPORTED": "#cbd5e1",
+    "CONTRADICTED": "#f87171",
+}
+
+def evidence(value, ci, threshold):
+    """1 / -1 when a figure is clearly positive / negative, 0 when it is not
+
+    With a confidence interval the interval has to exclude zero; without one
+    the figure has to reach the threshold in either direction.
+    """
+    if ci:
+        low, high = ci
+        return 1 if low > 0 else -1 if high < 0 else 0
+    return 1 if value >= threshold else -1 if value <= -threshold else 0
+
+def hypothesis_verdict(outcomes):
+    """Overall verdict from {taxi_type: 1 supports / -1 contradicts / 0 neither}"""
+    values = set(outcomes.values())
+    if values == {1}:
+        return "SUPPORTED"
+    if 1 in values:
+        return "PARTIALLY SUPPORTED"
+    return "CONTRADICTED" if -1 in values else "NOT SUPPORTED"
+
+def verdict_text(outcomes):
+    """Coloured overall verdict, broken down by taxi type when the types disagree"""
+    verdict = hypothesis_verdict(outcomes)
+    text = f'<b style="color: {VERDICT_COLORS[verdict]}; font-size: 22px;">{verdict}</b>'
+    if len(set(outcomes.values())) > 1:
+        words = {1: "supported", -1: "contradicted", 0: "not supported"}
+        text += " (" + ", ".join(f"{words[outcome]} for {taxi_type} taxis" for taxi_type, outcome in outcomes.items()) + ")"
+    return text
+
+def interval_text(section, summary, key, fmt, unit=""):
+    """Bootstrap confidence interval suffix for a headline figure, empty if the results file has none"""
+    if "ci" not in summary:
+        return ""
+    low, high = summary["ci"][key]
+    level = section["bootstrap"]["confidence"] * 100
+    return f' <span style="color: #94a3b8; font-size: 16px;">[{level:.0f}% CI {low:{fmt}} to {high:{fmt}}{unit}]</span>'
+
+def did_findings(outcome, arms, fmt, unit):
+    """Difference-in-differences estimates per taxi type for a findings box, empty if the results file has none"""
+    did = results.get("diff_in_diff")
+    if not did or not did["outcomes"].get(outcome):
+        return ""
+    lines = [f'<b>DIFFERENCE-IN-DIFFERENCES</b> (vs. {did["control_zones"]} control zones, same hour of day and week):<br>']
+    for taxi_type in ("yellow", "green"):
+        estimate = did["outcomes"][outcome].get(taxi_type)
+        if not estimate:
+            continue
+        parts = []
+        for arm, label in arms.items():
+            effect = estimate["arms"][arm]
+            low, high = effect["ci"]
+            value = effect["effect_pct"] if unit == "%" else effect["effect_mph"]
+            parts.append(f'{label} <span class="highlight-grey">{value:{fmt}}{unit}</span>'
+                         f' <span style="color: #94a3b8; font-size: 16px;">[95% CI {low:{fmt}} to {high:{fmt}}{unit}]</span>')
+        lines.append(f"• {taxi_type.title()} Taxis: {', '.join(parts)}<br>")
+    return "".join(lines) + "<br>"
+
+def correlation_span(summary):
+    """Coloured correlation value and direction wording for the hypothesis box"""
+    if summary["label"] == "No Correlation":
+        color, direction = "#cbd5e1", "NO CORRELATION"
+    elif summary["correlation"] > 0:
+        color, direction = "#4ade80", "POSITIVE"
+    else:
+        color, direction = "#f87171", "NEGATIVE"
+    ci = interval_text(results["tip_crowding"], summary, "correlation", "+.3f")
+    return f'<span style="color: {color}; font-weight: 800; font-size: 20px;">{summary["correlation"]:+.3f} correlation</span>{ci} ({direction})'
+
+# Function to load the surcharge vs tip density grids
+@st.cache_data
+def load_tip_density(density_path, mtime):
+    """Trip count grids per taxi type with their bin edges"""
+    with np.load(density_path) as density:
+        return {
+            "taxi_types": [str(t) for t in density["taxi_types"]],
+            "surcharge_edges": density["surcharge_edges"],
+            "tip_pct_edges": density["tip_pct_edges"],
+            "counts": density["counts"],
+        }
+
+def read_tip_density():
+    """Return the tip density grids, or None if they have not been built"""
+    density_path = ARTIFACTS_DIR / "tip_density.npz"
+    if not density_path.exists():
+        return None
+    return load_tip_density(density_path, density_path.stat().st_mtime)
+
+def tip_density_figure(density, taxi_type, summary):
+    """Log-scaled trip density heatmap with the least-squares line overlaid"""
+    import plotly.graph_objects as go
+    
+    counts = density["counts"][density["taxi_types"].index(taxi_type)]
+    x_edges, y_edges = density["surcharge_edges"], density["tip_pct_edges"]
+    x_mid, y_mid = (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+    fig = go.Figure(go.Heatmap(
+        z=np.log10(counts.T + 1), x=x_mid, y=y_mid, customdata=counts.T, colorscale="Viridis",
+        colorbar=dict(title="log10 trips"),
+        hovertemplate="Surcharge $%{x:.2f}<br>Tip %{y:.0f}%<br>%{customdata:,} trips<extra></extra>"))
+    if "slope" in summary:
+        fig.add_trace(go.Scatter(x=x_edges[[0, -1]], y=summary["intercept"] + summary["slope"] * x_edges[[0, -1]],
+                                 mode="lines", line=dict(color="#f87171", width=3),
+                                 name=f"r = {summary['correlation']:+.3f}"))
+    fig.update_xaxes(title_text="Congestion Surcharge ($)")
+    fig.update_yaxes(title_text="Tip Percentage (%)", range=[y_edges[0], y_edges[-1]])
+    fig.update_layout(template="plotly_dark", height=480, margin=dict(l=40, r=20, t=40, b=40),
+                      legend=dict(orientation="h", y=1.08))
+    return fig
+
+# Function to load the velocity cube written by the analysis pipeline
+@st.cache_data
+def load_velocity_cube(cube_path, mtime):
+    """Mean and, when sketched, p50 / p90 MPH per (taxi_type, year, day, hour) cell"""
+    with np.load(cube_path) as cube:
+        speed_sum = cube["speed_sum"].astype(np.float64)
+        trip_count = cube["trip_count"]
+        taxi_types = [str(t) for t in cube["taxi_types"]]
+        years = [int(y) for y in cube["years"]]
+        # Quantiles read from the speed sketches by the pipeline; older cubes only have means
+        quantiles = {}
+        if "speed_quantiles" in cube.files:
+            for q, values in zip(cube["quantiles"], cube["speed_quantiles"]):
+                quantiles[f"p{round(q * 100)}"] = values.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cell_mean = speed_sum / trip_count
+    return {"taxi_types": taxi_types, "years": years, "cell_stats": {"Mean": cell_mean, **quantiles}}
+
+def read_velocity_cube():
+    """Return the velocity cube, or None if it has not been built"""
+    cube_path = ARTIFACTS_DIR / "velocity_cube.npz"
+    if not cube_path.exists():
+        return None
+    return load_velocity_cube(cube_path, cube_path.stat().st_mtime)
+
+# Heatmap statistic -> label used in the Tab 2 titles
+SPEED_STATISTICS = {"Mean": "Average", "p50": "Median (p50)", "p90": "p90"}
+
+def velocity_figures(cube, taxi_type, statistic="Mean"):
+    """Interactive speed heatmaps (before/after) and the after - before difference heatmap"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    t = cube["taxi_types"].index(taxi_type)
+    cell_speeds = cube["cell_stats"][statistic][t]
+    before, after = cell_speeds
+    hours = list(range(24))
+    hover = "%{y} %{x}:00<br>%{z:.2f} MPH<extra></extra>"
+    
+    speed_fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.12,
+                              subplot_titles=[f"Q1 {cube['years'][0]} (Before)", f"Q1 {cube['years'][1]} (After)"])
+    zmin, zmax = np.nanmin(cell_speeds), np.nanmax(cell_speeds)
+    for row, speeds in enumerate([before, after], start=1):
+        speed_fig.add_trace(go.Heatmap(z=speeds, x=hours, y=DAY_LABELS, zmin=zmin, zmax=zmax, colorscale="Viridis",
+                                       colorbar=dict(title="MPH"), showscale=row == 1, hovertemplate=hover),
+                            row=row, col=1)
+    speed_fig.update_yaxes(autorange="reversed")
+    speed_fig.update_xaxes(title_text="Hour of Day", row=2, col=1)
+    speed_fig.update_layout(template="plotly_dark", height=560, margin=dict(l=40, r=20, t=40, b=40))
+    
+    diff = after - before
+    limit = np.nanmax(np.abs(diff)) if np.isfinite(diff).any() else 1.0
+    diff_fig = go.Figure(go.Heatmap(z=diff, x=hours, y=DAY_LABELS, zmid=0, zmin=-limit, zmax=limit,
+                                    colorscale="RdBu", colorbar=dict(title="Δ MPH"),
+                                    hovertemplate="%{y} %{x}:00<br>%{z:+.2f} MPH<extra></extra>"))
+    diff_fig.update_yaxes(autorange="reversed")
+    diff_fig.update_xaxes(title_text="Hour of Day")
+    diff_fig.update_layout(template="plotly_dark", height=560, margin=dict(l=40, r=20, t=40, b=40))
+    return speed_fig, diff_fig
+
+# Date-range / zone index (DAILY_INDEX_PATH) written by the analysis pipeline for the sidebar window filters
+@st.cache_resource
+def load_daily_index(index_path, mtime):
+    """Prefix sums of the index, loaded once and shared by every session"""
+    return daily_index.load_daily_index(index_path)
+
+def read_daily_index():
+    """Return the date-range / zone index, or None if it has not been built"""
+    if not DAILY_INDEX_PATH.exists():
+        return None
+    return load_daily_index(DAILY_INDEX_PATH, DAILY_INDEX_PATH.stat().st_mtime)
+
+# Function to answer a date-range / zone filter from the prefix sums, cached across sessions
+@st.cache_data(max_entries=512)
+def window_totals(index_path, mtime, start, end, taxi_types, zones):
+    """Totals over the inclusive [start, end] window; two prefix-sum rows per measure whatever its length"""
+    return daily_index.window_totals(load_daily_index(index_path, mtime), start, end, taxi_types, zones)
+
+def dollars(value):
+    """Compact dollar amount for the sidebar metrics"""
+    return f"${value / 1e6:,.2f}M" if abs(value) >= 1e6 else f"${value:,.0f}"
 
 # Function to safely read text files with UTF-8 encoding
+@timed_function
 def safe_read_text(file_path):
     """Read text file with multiple encoding attempts"""
     try:
@@ -332,8 +799,13 @@ def safe_read_text(file_path):
             return ""
 
 # Function to display images with proper formatting
-def display_plot(image_path, title, description=""):
-    """Display plot with title and description in a container"""
+@timed_function
+def display_plot(image_path, title, description="", width=960):
+    """Display plot with title and description in a container
+
+    width is the slot's display width in pixels (960 for half-width columns,
+    1600 for full-width plots) and picks the pre-encoded variant to send.
+    """
     with st.container():
         # Larger title
         st.markdown(f'<h2 style="font-size: 28px; color: #e2e8f0; font-weight: 800; margin-bottom: 15px; background: linear-gradient(90deg, #334155, transparent); padding: 15px; border-radius: 8px; border-left: 5px solid #64748b;">{title}</h2>', unsafe_allow_html=True)
@@ -341,16 +813,36 @@ def display_plot(image_path, title, description=""):
             st.markdown(f'<p style="font-size: 18px; color: #cbd5e1; margin-bottom: 20px; padding: 15px; background: #1e293b; border-radius: 8px; border: 1px solid #475569;">{description}</p>', unsafe_allow_html=True)
         
         with st.spinner(f"Loading {title}..."):
-            img = load_image(image_path)
-            if img:
-                st.image(img, use_container_width=True)
+            variants = image_variants(image_path, width)
+            if variants:
+                # The browser picks the first format it decodes, then fetches and caches the file
+                # itself - nothing is inlined into the page
+                sources = "".join(f'<source srcset="{url}" type="image/{fmt}">' for fmt, url in variants)
+                st.markdown(f'<picture>{sources}<img src="{variants[-1][1]}" alt="{title}" '
+                            f'style="width: 100%; height: auto;"></picture>', unsafe_allow_html=True)
+                return True
+            elif image_path.exists():
+                # No pre-encoded variant yet - let Streamlit resize the full PNG
+                st.image(str(image_path), use_container_width=True)
                 return True
             else:
+                st.warning(f"Image not found: {image_path}")
                 st.error(f"Could not load: {title}")
                 return False
 
+# Function to display interactive Plotly figures in the same frame as display_plot
+def display_figure(fig, title, description=""):
+    """Display a Plotly figure with title and description in a container"""
+    with st.container():
+        st.markdown(f'<h2 style="font-size: 28px; color: #e2e8f0; font-weight: 800; margin-bottom: 15px; background: linear-gradient(90deg, #334155, transparent); padding: 15px; border-radius: 8px; border-left: 5px solid #64748b;">{title}</h2>', unsafe_allow_html=True)
+        if description:
+            st.markdown(f'<p style="font-size: 18px; color: #cbd5e1; margin-bottom: 20px; padding: 15px; background: #1e293b; border-radius: 8px; border: 1px solid #475569;">{description}</p>', unsafe_allow_html=True)
+        st.plotly_chart(fig, use_container_width=True)
+
+results = read_results()
+
 # Sidebar with project info - GREY/BLACK THEME
-with st.sidebar:
+with timed("sidebar"), st.sidebar:
     # Sidebar header with grey theme
     st.markdown("""
     <div style="background: linear-gradient(135deg, #334155, #475569); padding: 25px; border-radius: 12px; margin-bottom: 25px; border: 3px solid #64748b;">
@@ -375,17 +867,78 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
     
+    # Sections a partial build could not compute are missing from the results file
+    toll = results.get("toll")
+    weather = results.get("weather")
+    ghost_trips = results.get("ghost_trips")
+
     # Key metrics in larger format
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Estimated Revenue", "$183.2M", delta_color="off")
-        st.metric("Rain Elasticity", "-0.15", "Inelastic")
+        if toll:
+            st.metric("Estimated Revenue", f"${toll['revenue_usd'] / 1e6:.1f}M", delta_color="off")
+        if weather:
+            st.metric("Rain Elasticity", f"{weather['elasticity']:.3f}", weather['elasticity_label'])
     with col2:
-        st.metric("Compliance Rate", "92.4%", delta_color="off")
-        st.metric("Ghost Trips", "0.34%", delta_color="off")
-    
+        if toll:
+            st.metric("Compliance Rate", f"{toll['compliance_rate_pct']:.1f}%", delta_color="off")
+        if ghost_trips:
+            st.metric("Ghost Trips", f"{ghost_trips['ghost_rate_pct']:.2f}%", delta_color="off")
+    missing = [name for name, section in (("toll", toll), ("weather", weather), ("ghost trip", ghost_trips)) if not section]
+    if missing:
+        missing_notice(" / ".join(missing) + " figures")
+    seeded_notice("toll", "Toll figures")
+    seeded_notice("weather", "Rain elasticity")
+
     st.markdown("---")
     
+    # Custom date-range / zone window, answered from the prefix-sum index without touching trip data
+    window_index = read_daily_index()
+    if window_index is not None:
+        st.markdown("""
+        <div style="background: linear-gradient(135deg, #334155, #475569); padding: 25px; border-radius: 12px; margin-bottom: 25px; border: 3px solid #64748b;">
+            <h2 style="color: #f1f5f9; text-align: center; font-size: 30px; font-weight: 800; text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.5);">📅 CUSTOM WINDOW</h2>
+        </div>
+        """, unsafe_allow_html=True)
+
+        # The index only holds days with trips, so the default window is exactly the data's span
+        first_day, last_day = window_index["days"][0].item(), window_index["days"][-1].item()
+        window = st.date_input("Pickup dates", value=(first_day, last_day), min_value=first_day,
+                               max_value=last_day, key="window_dates")
+        # While a range is being picked only its first day is set
+        window_start, window_end = (window[0], window[-1]) if isinstance(window, (list, tuple)) else (window, window)
+        taxi_types = window_index["taxi_types"].tolist()
+        window_types = st.multiselect("Taxi types", taxi_types, default=taxi_types, format_func=str.title,
+                                      key="window_taxi_types")
+        zone_labels = dict(zip(window_index["zone_ids"].tolist(), window_index["zone_names"].tolist()))
+        window_zones = st.multiselect("Pickup zones (all if empty)", list(zone_labels), format_func=zone_labels.get,
+                                      key="window_zones")
+
+        if window_types:
+            with timed("window_totals"):
+                totals = window_totals(DAILY_INDEX_PATH, DAILY_INDEX_PATH.stat().st_mtime, str(window_start),
+                                       str(window_end), tuple(window_types), tuple(sorted(window_zones)))
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Trips", f"{totals['trips']:,.0f}")
+                st.metric("Surcharges", dollars(totals["surcharge"]))
+            with col2:
+                # Days with trips only: months without files would otherwise pull the average down
+                st.metric("Avg Daily Trips", f"{totals['trips'] / max(totals['days'], 1):,.0f}")
+                st.metric("CBD Fees", dollars(totals["cbd_fee"]))
+            if totals["rainy_days"] and totals["dry_days"]:
+                rainy_avg = totals["rainy_trips"] / totals["rainy_days"]
+                dry_avg = totals["dry_trips"] / totals["dry_days"]
+                st.metric(f"Rainy-Day Avg ({totals['rainy_days']} days)", f"{rainy_avg:,.0f}",
+                          f"{(rainy_avg - dry_avg) / dry_avg * 100:+.1f}% vs {totals['dry_days']} dry days"
+                          if dry_avg else None)
+            else:
+                st.caption("No rainy / dry day split: precipitation data does not cover this window")
+        else:
+            st.caption("Select at least one taxi type")
+
+        st.markdown("---")
+
     st.markdown("""
     <div style="background: linear-gradient(135deg, #334155, #475569); padding: 25px; border-radius: 12px; margin-bottom: 25px; border: 3px solid #64748b;">
         <h2 style="color: #f1f5f9; text-align: center; font-size: 30px; font-weight: 800; text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.5);">🔍 TOP SUSPICIOUS VENDORS</h2>
@@ -393,22 +946,27 @@ with st.sidebar:
     """, unsafe_allow_html=True)
     
     suspicious_df = pd.DataFrame({
-        'Vendor': ['Vendor A', 'Vendor B', 'Vendor C', 'Vendor D', 'Vendor E'],
-        'Ghost Trips': [142, 89, 76, 65, 54],
-        'Avg Speed': [72, 68, 71, 69, 70]
-    })
-    
+        'Vendor': [v['vendor'] for v in ghost_trips['vendors']],
+        'Ghost Trips': [v['ghost_trips'] for v in ghost_trips['vendors']],
+        'Avg Speed': [round(v['avg_speed']) if v['avg_speed'] is not None else None for v in ghost_trips['vendors']]
+    }) if ghost_trips else None
+
     # Style the dataframe
-    st.dataframe(
-        suspicious_df.style
-        .set_properties(**{'font-size': '18px', 'background-color': '#1e293b', 'color': '#e2e8f0'})
-        .set_table_styles([
-            {'selector': 'th', 'props': [('font-size', '22px'), ('background-color', '#475569'), ('color', '#f1f5f9'), ('font-weight', '800')]},
-            {'selector': 'td', 'props': [('font-size', '18px')]}
-        ]),
-        use_container_width=True,
-        hide_index=True
-    )
+    if suspicious_df is None:
+        missing_notice("ghost trip vendors")
+    else:
+        seeded_notice("ghost_trips")
+        with timed("suspicious_df"):
+            st.dataframe(
+                suspicious_df.style
+                .set_properties(**{'font-size': '18px', 'background-color': '#1e293b', 'color': '#e2e8f0'})
+                .set_table_styles([
+                    {'selector': 'th', 'props': [('font-size', '22px'), ('background-color', '#475569'), ('color', '#f1f5f9'), ('font-weight', '800')]},
+                    {'selector': 'td', 'props': [('font-size', '18px')]}
+                ]),
+                use_container_width=True,
+                hide_index=True
+            )
     
     st.markdown("---")
     
@@ -421,39 +979,38 @@ with st.sidebar:
     # Create download buttons for reports
     def create_download_button(file_path, button_text):
         if file_path.exists():
-            with open(file_path, "rb") as file:
-                st.download_button(
-                    label=button_text,
-                    data=file,
-                    file_name=file_path.name,
-                    mime="text/plain",
-                    use_container_width=True
-                )
-    
-    # List of reports to include
-    reports = [
-        (VISUALIZATIONS_DIR / "congestion_velocity_summary.txt", "📄 Velocity Analysis Report"),
-        (VISUALIZATIONS_DIR / "tip_crowding_analysis_summary.txt", "📄 Tip Analysis Report"),
-        (VISUALIZATIONS_DIR / "rain_tax_academic_report.txt", "📄 Rain Tax Analysis Report")
-    ]
-    
-    for report_path, btn_text in reports:
+            st.download_button(
+                label=button_text,
+                data=load_report(*file_key(file_path)),
+                file_name=file_path.name,
+                mime="text/plain",
+                use_container_width=True
+            )
+    
+    for report_path, btn_text in REPORTS:
         if report_path.exists():
             create_download_button(report_path, btn_text)
         else:
             st.warning(f"Report not found: {report_path.name}")
-
-# Create 4 tabs with MUCH LARGER labels (24px font size)
-tab1, tab2, tab3, tab4 = st.tabs([
-    "🗺️ TAB 1: THE MAP",
-    "📊 TAB 2: THE FLOW", 
-    "💰 TAB 3: THE ECONOMICS",
-    "🌧️ TAB 4: THE WEATHER"
-])
+    
+    # One zip with every report and CSV; the content hash changes only when a file does
+    bundle_keys = tuple(file_key(path) for path in BUNDLE_FILES if path.exists())
+    if bundle_keys:
+        bundle, bundle_hash = load_report_bundle(bundle_keys)
+        st.download_button(
+            label="📦 Download All (ZIP)",
+            data=bundle,
+            file_name=f"congestion_audit_reports_{bundle_hash[:12]}.zip",
+            mime="application/zip",
+            use_container_width=True
+        )
+        st.caption(f"{len(bundle_keys)} files | sha256 {bundle_hash[:12]}")
 
 # TAB 1: The Map - Border Effect
-with tab1:
+def render_map_tab():
+    """Tab 1: border effect maps and findings"""
     st.markdown('<h2 class="sub-header">🗺️ THE MAP: BORDER EFFECT ANALYSIS</h2>', unsafe_allow_html=True)
+    seeded_notice("border_effect")
     
     st.markdown("""
     <div style="font-size: 20px; color: #e2e8f0; background: linear-gradient(135deg, #1e293b, #334155); padding: 25px; border-radius: 12px; margin-bottom: 30px; border-left: 6px solid #64748b; border-right: 6px solid #64748b;">
@@ -464,6 +1021,26 @@ with tab1:
     </div>
     """, unsafe_allow_html=True)
     
+    # A build without one taxi type's files has no figures for it
+    border_types = results.get("border_effect", {}).get("taxi_types", {})
+    yellow_border = border_types.get("yellow")
+    green_border = border_types.get("green")
+
+    # Interactive zone choropleth when the zone map and per-zone changes exist, else the static PNG maps
+    zone_changes = {t: b for t, b in (("yellow", yellow_border), ("green", green_border)) if b and b["zones"]}
+    zone_geojson = None
+    if zone_changes and ZONE_MAP_PATH.exists():
+        detail = st.radio("Map detail", ["city", "borough", "street"], horizontal=True, key="zone_map_detail")
+        zone_geojson = read_zone_geojson(detail)
+    elif zone_changes:
+        st.caption(f"Static maps: {ZONE_MAP_PATH.name} has not been built - see the deployment instructions")
+    if zone_geojson:
+        display_figure(
+            zone_choropleth(*zone_geojson, zone_changes),
+            "DROP-OFF CHANGE BY TAXI ZONE",
+            "Q1 2024 vs Q1 2025 | Green = Increase, Red = Decrease | Use the buttons to switch taxi type"
+        )
+    
     # Create two columns for yellow and green taxi maps
     col1, col2 = st.columns(2)
     
@@ -474,26 +1051,30 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
         
-        yellow_map_path = VISUALIZATIONS_DIR / "border_effect_yellow_taxis_fixed.png"
-        display_plot(
-            yellow_map_path,
-            "YELLOW TAXIS: Drop-off Changes by Zone",
-            "Green = Increase, Red = Decrease | Dashed line = 60th St"
-        )
+        if not zone_geojson:
+            yellow_map_path = VISUALIZATIONS_DIR / "border_effect_yellow_taxis_fixed.png"
+            display_plot(
+                yellow_map_path,
+                "YELLOW TAXIS: Drop-off Changes by Zone",
+                "Green = Increase, Red = Decrease | Dashed line = 60th St"
+            )
         
         # Metrics for yellow taxis
-        st.markdown("""
-        <div class="metric-card">
-        <b style="font-size: 24px; color: #fbbf24;">YELLOW TAXI FINDINGS:</b><br><br>
-        <span style="font-size: 18px;">
-        • Avg Change: <span class="highlight-grey">-0.7%</span><br>
-        • Zones Analyzed: <span class="highlight-grey">60</span><br>
-        • Border Zones: <span class="highlight-grey">51</span><br>
-        • Max Increase: <span class="highlight-grey">+50.0%</span><br>
-        • Max Decrease: <span class="highlight-grey">-43.3%</span>
-        </span>
-        </div>
-        """, unsafe_allow_html=True)
+        if not yellow_border:
+            missing_notice("yellow taxi border effect figures")
+        else:
+            st.markdown(f"""
+            <div class="metric-card">
+            <b style="font-size: 24px; color: #fbbf24;">YELLOW TAXI FINDINGS:</b><br><br>
+            <span style="font-size: 18px;">
+            • Avg Change: <span class="highlight-grey">{yellow_border['avg_change']:+.1f}%</span><br>
+            • Zones Analyzed: <span class="highlight-grey">{yellow_border['zones_analyzed']}</span><br>
+            • Border Zones: <span class="highlight-grey">{yellow_border['border_zones']}</span><br>
+            • Max Zone Increase: <span class="highlight-grey">{yellow_border['max_increase']['pct_change']:+.1f}%</span><br>
+            • Max Zone Decrease: <span class="highlight-grey">{yellow_border['max_decrease']['pct_change']:+.1f}%</span>
+            </span>
+            </div>
+            """, unsafe_allow_html=True)
     
     with col2:
         st.markdown("""
@@ -502,56 +1083,96 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
         
-        green_map_path = VISUALIZATIONS_DIR / "border_effect_green_taxis_fixed.png"
-        display_plot(
-            green_map_path,
-            "GREEN TAXIS: Drop-off Changes by Zone",
-            "Green = Increase, Red = Decrease | Different pattern than Yellow taxis"
-        )
+        if not zone_geojson:
+            green_map_path = VISUALIZATIONS_DIR / "border_effect_green_taxis_fixed.png"
+            display_plot(
+                green_map_path,
+                "GREEN TAXIS: Drop-off Changes by Zone",
+                "Green = Increase, Red = Decrease | Different pattern than Yellow taxis"
+            )
         
         # Metrics for green taxis
-        st.markdown("""
-        <div class="metric-card">
-        <b style="font-size: 24px; color: #10b981;">GREEN TAXI FINDINGS:</b><br><br>
-        <span style="font-size: 18px;">
-        • Avg Change: <span class="highlight-grey">+2.7%</span><br>
-        • Zones Analyzed: <span class="highlight-grey">60</span><br>
-        • Border Zones: <span class="highlight-grey">51</span><br>
-        • Max Increase: <span class="highlight-grey">+46.7%</span><br>
-        • Max Decrease: <span class="highlight-grey">-19.6%</span>
-        </span>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    # Key insights
+        if not green_border:
+            missing_notice("green taxi border effect figures")
+        else:
+            st.markdown(f"""
+            <div class="metric-card">
+            <b style="font-size: 24px; color: #10b981;">GREEN TAXI FINDINGS:</b><br><br>
+            <span style="font-size: 18px;">
+            • Avg Change: <span class="highlight-grey">{green_border['avg_change']:+.1f}%</span><br>
+            • Zones Analyzed: <span class="highlight-grey">{green_border['zones_analyzed']}</span><br>
+            • Border Zones: <span class="highlight-grey">{green_border['border_zones']}</span><br>
+            • Max Zone Increase: <span class="highlight-grey">{green_border['max_increase']['pct_change']:+.1f}%</span><br>
+            • Max Zone Decrease: <span class="highlight-grey">{green_border['max_decrease']['pct_change']:+.1f}%</span>
+            </span>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Key insights, once the results file has border figures for at least one taxi type
+    if not (yellow_border or green_border):
+        return
     st.markdown("""
     <div style="background: linear-gradient(135deg, #334155, #475569); padding: 25px; border-radius: 15px; margin-top: 35px; border: 3px solid #64748b;">
         <h3 style="color: #f1f5f9; text-align: center; font-size: 32px; font-weight: 800; text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.5);">📝 KEY INSIGHTS</h3>
     </div>
     """, unsafe_allow_html=True)
     
+    # Extremes across both taxi types, labelled with the zone they occurred in. Results
+    # built before the border-only extremes were recorded only have them over all zones.
+    border_by_type = {label: b for label, b in (("Yellow", yellow_border), ("Green", green_border)) if b}
+    border_only = all(b.get('border_max_increase') for b in border_by_type.values())
+    prefix, scope = ("border_", "Border") if border_only else ("", "Zone")
+    inc_type = max(border_by_type, key=lambda t: border_by_type[t][f'{prefix}max_increase']['pct_change'])
+    dec_type = min(border_by_type, key=lambda t: border_by_type[t][f'{prefix}max_decrease']['pct_change'])
+    max_increase = border_by_type[inc_type][f'{prefix}max_increase']
+    max_decrease = border_by_type[dec_type][f'{prefix}max_decrease']
+    border_avg = np.mean([b['border_avg_change'] for b in border_by_type.values()])
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Border Zone Avg Change", "+0.0%", "Both taxi types", delta_color="off")
+        st.metric("Border Zone Avg Change", f"{border_avg:+.1f}%",
+                  "Both taxi types" if len(border_by_type) > 1 else f"{next(iter(border_by_type))} Taxis", delta_color="off")
     with col2:
-        st.metric("Max Border Increase", "+50.0%", "Zone X - Yellow Taxis", delta_color="off")
+        st.metric(f"Max {scope} Increase", f"{max_increase['pct_change']:+.1f}%",
+                  " - ".join(filter(None, [max_increase['zone'], f"{inc_type} Taxis"])), delta_color="off")
     with col3:
-        st.metric("Max Border Decrease", "-43.3%", "Zone Y - Yellow Taxis", delta_color="off")
-    
-    st.markdown("""
+        st.metric(f"Max {scope} Decrease", f"{max_decrease['pct_change']:+.1f}%",
+                  " - ".join(filter(None, [max_decrease['zone'], f"{dec_type} Taxis"])), delta_color="off")
+    
+    # More drop-offs in the border zones supports the hypothesis: judged on the DiD border arm's
+    # confidence interval when the results have one, else on the border zones' average change
+    dropoff_did = results.get("diff_in_diff", {}).get("outcomes", {}).get("dropoffs", {})
+    outcomes = {
+        label.lower(): evidence(b['border_avg_change'], dropoff_did.get(label.lower(), {}).get("arms", {}).get("border", {}).get("ci"), 1)
+        for label, b in border_by_type.items()
+    }
+    verdict = hypothesis_verdict(outcomes)
+    changes = "".join(
+        f"• {label} Taxis: {b['border_avg_change']:+.1f}% in border zones, {b['avg_change']:+.1f}% across all {b['zones_analyzed']} analysed zones<br>"
+        for label, b in border_by_type.items()
+    )
+    if verdict in ("SUPPORTED", "PARTIALLY SUPPORTED"):
+        interpretation = "Drop-offs rose just outside the zone, consistent with passengers ending trips there to avoid the toll."
+    elif verdict == "CONTRADICTED":
+        interpretation = "Drop-offs fell just outside the zone, so passengers are not ending trips there to avoid the toll."
+    else:
+        interpretation = "Drop-offs just outside the zone barely changed, so there is no sign of passengers ending trips there to avoid the toll."
+    
+    st.markdown(f"""
     <div class="insight-box">
-    <b>🔍 FINDING:</b> Clear evidence of border effect is observed. Specific zones immediately outside 
-    the congestion zone show significant increases in drop-offs, particularly for yellow taxis (+50% max).
-    Green taxis show a different pattern with overall increase but less extreme variations.<br><br>
+    <b>🔍 FINDING:</b> The "border effect" hypothesis is {verdict_text(outcomes)}. The largest {scope.lower()} increase in drop-offs
+    was {max_increase['pct_change']:+.0f}% ({" - ".join(filter(None, [max_increase['zone'], f"{inc_type} Taxis"]))}).<br>
+    {changes}<br>{did_findings("dropoffs", {"border": "border zones", "congestion": "congestion zone"}, "+.1f", "%")}
     
-    <b>INTERPRETATION:</b> Passengers are indeed ending trips just outside the zone to avoid the toll, 
-    supporting the "border effect" hypothesis.
+    <b>INTERPRETATION:</b> {interpretation}
     </div>
     """, unsafe_allow_html=True)
 
 # TAB 2: The Flow - Velocity Heatmaps
-with tab2:
+def render_flow_tab():
+    """Tab 2: congestion velocity heatmaps"""
     st.markdown('<h2 class="sub-header">📊 THE FLOW: CONGESTION VELOCITY HEATMAPS</h2>', unsafe_allow_html=True)
+    seeded_notice("velocity")
     
     st.markdown("""
     <div style="font-size: 20px; color: #e2e8f0; background: linear-gradient(135deg, #1e293b, #334155); padding: 25px; border-radius: 12px; margin-bottom: 30px; border-left: 6px solid #64748b; border-right: 6px solid #64748b;">
@@ -570,15 +1191,30 @@ with tab2:
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Yellow 2024", "13.39 MPH", "Before", delta_color="off")
-    with col2:
-        st.metric("Yellow 2025", "13.16 MPH", "-1.73%")
-    with col3:
-        st.metric("Green 2024", "12.31 MPH", "Before", delta_color="off")
-    with col4:
-        st.metric("Green 2025", "12.61 MPH", "+2.39%")
+    velocity_cube = read_velocity_cube()
+    velocity = results.get("velocity", {})
+    speeds = [(t, velocity["taxi_types"][t]) for t in ("yellow", "green") if t in velocity.get("taxi_types", {})]
+    combined_speed = velocity.get("combined")
+    
+    if speeds:
+        columns = st.columns(4)
+        for i, (taxi_type, speed) in enumerate(speeds):
+            with columns[2 * i]:
+                st.metric(f"{taxi_type.title()} {velocity['before_year']}", f"{speed['before_mph']:.2f} MPH", "Before", delta_color="off")
+            with columns[2 * i + 1]:
+                st.metric(f"{taxi_type.title()} {velocity['after_year']}", f"{speed['after_mph']:.2f} MPH", f"{speed['change_pct']:+.2f}%")
+    else:
+        missing_notice("speed figures")
+    if speeds and not velocity_cube:
+        st.caption("Static heatmaps: velocity_cube.npz has not been built - see the deployment instructions")
+    
+    # Median / p90 heatmaps expose the slow tail the means hide
+    statistic = "Mean"
+    if velocity_cube and len(velocity_cube["cell_stats"]) > 1:
+        statistic = st.radio("Heatmap statistic", list(velocity_cube["cell_stats"]), horizontal=True,
+                             format_func=lambda name: SPEED_STATISTICS.get(name, name), key="velocity_statistic")
+    heatmap_label = SPEED_STATISTICS.get(statistic, statistic)
+    difference_label = "" if statistic == "Mean" else f"{heatmap_label} "
     
     # Yellow Taxi Heatmaps
     st.markdown("""
@@ -589,21 +1225,28 @@ with tab2:
     
     col1, col2 = st.columns(2)
     
-    with col1:
-        yellow_heatmap_path = VISUALIZATIONS_DIR / "congestion_velocity_yellow_heatmap.png"
-        display_plot(
-            yellow_heatmap_path,
-            "YELLOW TAXI: Average Speed Heatmap",
-            "Q1 2024 vs Q1 2025 comparison"
-        )
-    
-    with col2:
-        yellow_diff_path = VISUALIZATIONS_DIR / "congestion_velocity_yellow_difference.png"
-        display_plot(
-            yellow_diff_path,
-            "YELLOW TAXI: Speed Difference",
-            "2025 - 2024 (Red = Slower, Blue = Faster)"
-        )
+    if velocity_cube and "yellow" in velocity_cube["taxi_types"] and "yellow" in dict(speeds):
+        yellow_speed_fig, yellow_diff_fig = velocity_figures(velocity_cube, "yellow", statistic)
+        with col1:
+            display_figure(yellow_speed_fig, f"YELLOW TAXI: {heatmap_label} Speed Heatmap", "Q1 2024 vs Q1 2025 comparison")
+        with col2:
+            display_figure(yellow_diff_fig, f"YELLOW TAXI: {difference_label}Speed Difference", "2025 - 2024 (Red = Slower, Blue = Faster)")
+    else:
+        with col1:
+            yellow_heatmap_path = VISUALIZATIONS_DIR / "congestion_velocity_yellow_heatmap.png"
+            display_plot(
+                yellow_heatmap_path,
+                "YELLOW TAXI: Average Speed Heatmap",
+                "Q1 2024 vs Q1 2025 comparison"
+            )
+        
+        with col2:
+            yellow_diff_path = VISUALIZATIONS_DIR / "congestion_velocity_yellow_difference.png"
+            display_plot(
+                yellow_diff_path,
+                "YELLOW TAXI: Speed Difference",
+                "2025 - 2024 (Red = Slower, Blue = Faster)"
+            )
     
     # Green Taxi Heatmaps
     st.markdown("""
@@ -614,51 +1257,91 @@ with tab2:
     
     col1, col2 = st.columns(2)
     
-    with col1:
-        green_heatmap_path = VISUALIZATIONS_DIR / "congestion_velocity_green_heatmap.png"
-        display_plot(
-            green_heatmap_path,
-            "GREEN TAXI: Average Speed Heatmap",
-            "Q1 2024 vs Q1 2025 comparison"
-        )
-    
-    with col2:
-        green_diff_path = VISUALIZATIONS_DIR / "congestion_velocity_green_difference.png"
-        display_plot(
-            green_diff_path,
-            "GREEN TAXI: Speed Difference",
-            "2025 - 2024 (Red = Slower, Blue = Faster)"
-        )
-    
-    # Hypothesis testing
+    if velocity_cube and "green" in velocity_cube["taxi_types"] and "green" in dict(speeds):
+        green_speed_fig, green_diff_fig = velocity_figures(velocity_cube, "green", statistic)
+        with col1:
+            display_figure(green_speed_fig, f"GREEN TAXI: {heatmap_label} Speed Heatmap", "Q1 2024 vs Q1 2025 comparison")
+        with col2:
+            display_figure(green_diff_fig, f"GREEN TAXI: {difference_label}Speed Difference", "2025 - 2024 (Red = Slower, Blue = Faster)")
+    else:
+        with col1:
+            green_heatmap_path = VISUALIZATIONS_DIR / "congestion_velocity_green_heatmap.png"
+            display_plot(
+                green_heatmap_path,
+                "GREEN TAXI: Average Speed Heatmap",
+                "Q1 2024 vs Q1 2025 comparison"
+            )
+        
+        with col2:
+            green_diff_path = VISUALIZATIONS_DIR / "congestion_velocity_green_difference.png"
+            display_plot(
+                green_diff_path,
+                "GREEN TAXI: Speed Difference",
+                "2025 - 2024 (Red = Slower, Blue = Faster)"
+            )
+    
+    # Hypothesis testing, once the results file has speed figures to assess
+    if not speeds:
+        return
     st.markdown("""
     <div style="background: linear-gradient(135deg, #334155, #475569); padding: 25px; border-radius: 15px; margin: 35px 0 25px 0; border: 3px solid #64748b;">
         <h3 style="color: #f1f5f9; text-align: center; font-size: 32px; font-weight: 800; text-shadow: 1px 1px 2px rgba(0, 0, 0, 0.5);">🎯 HYPOTHESIS ASSESSMENT</h3>
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
+    findings = "".join(
+        f"• {taxi_type.title()} Taxis: {speed['change_mph']:+.2f} MPH ({speed['change_pct']:+.2f}%)"
+        f"{interval_text(velocity, speed, 'change_mph', '+.2f', ' MPH')} → {speed_verdict(speed['change_pct'])}<br>"
+        for taxi_type, speed in speeds
+    )
+    if combined_speed:
+        findings += (f"• Combined: {combined_speed['change_mph']:+.2f} MPH ({combined_speed['change_pct']:+.1f}%)"
+                     f"{interval_text(velocity, combined_speed, 'change_mph', '+.2f', ' MPH')} → {speed_verdict(combined_speed['change_pct'])}<br>")
+    
+    # Faster trips support the hypothesis: judged on the bootstrap interval of the MPH change
+    # when the results have one, else on a change of at least 1% either way (as speed_verdict)
+    outcomes = {taxi_type: evidence(speed['change_pct'], speed.get("ci", {}).get("change_mph"), 1) for taxi_type, speed in speeds}
+    overall = ""
+    if combined_speed:
+        combined = evidence(combined_speed['change_pct'], combined_speed.get("ci", {}).get("change_mph"), 1)
+        if combined == 1:
+            overall = f" Overall, speeds rose {combined_speed['change_pct']:+.1f}% combined, evidence that congestion pricing improved traffic flow."
+        elif combined == -1:
+            overall = f" Overall, speeds fell {combined_speed['change_pct']:+.1f}% combined, so congestion pricing has not improved traffic flow."
+        else:
+            overall = (f" Overall, the combined change of {combined_speed['change_pct']:+.1f}% is minimal evidence that congestion pricing "
+                       "substantially improved traffic flow speeds.")
+    faster = [taxi_type for taxi_type, outcome in outcomes.items() if outcome == 1]
+    slower = [taxi_type for taxi_type, outcome in outcomes.items() if outcome == -1]
+    if faster and slower:
+        slight = "slight " if all(abs(dict(speeds)[taxi_type]['change_pct']) < 5 for taxi_type in faster) else ""
+        interpretation = (f"The toll had mixed effects - {' and '.join(faster)} taxis saw {slight}improvements while "
+                          f"{' and '.join(slower)} taxis actually slowed down, possibly due to different route patterns or passenger behaviors.")
+    elif faster:
+        interpretation = f"Trips got faster for {' and '.join(faster)} taxis, consistent with lighter traffic in the zone."
+    elif slower:
+        interpretation = f"Trips got slower for {' and '.join(slower)} taxis, so the toll has not relieved congestion in the zone."
+    else:
+        interpretation = "Speeds barely moved, so the toll has not measurably changed traffic flow."
+    
+    st.markdown(f"""
     <div class="insight-box">
     <b>HYPOTHESIS:</b> "Did the toll actually speed up traffic?"<br><br>
     
     <b>FINDINGS:</b><br>
-    • Yellow Taxis: -0.23 MPH (-1.73%) → <span style="color: #f87171; font-weight: 800; font-size: 20px;">SLOWER</span><br>
-    • Green Taxis: +0.29 MPH (+2.39%) → <span style="color: #4ade80; font-weight: 800; font-size: 20px;">FASTER</span><br>
-    • Combined: +0.03 MPH (+0.3%) → <span style="color: #cbd5e1; font-weight: 800; font-size: 20px;">MINIMAL CHANGE</span><br><br>
+    {findings}<br>{did_findings("speed", {"congestion": "trips starting in the congestion zone"}, "+.2f", " MPH")}
     
-    <b>CONCLUSION:</b> The hypothesis is <b style="color: #fbbf24; font-size: 22px;">PARTIALLY SUPPORTED</b> for green taxis but 
-    <b style="color: #f87171; font-size: 22px;">CONTRADICTED</b> for yellow taxis. Overall, minimal evidence that congestion pricing 
-    substantially improved traffic flow speeds.<br><br>
+    <b>CONCLUSION:</b> The hypothesis is {verdict_text(outcomes)}.{overall}<br><br>
     
-    <b>INTERPRETATION:</b> The toll had mixed effects - green taxis saw slight improvements 
-    while yellow taxis actually slowed down, possibly due to different route patterns or 
-    passenger behaviors.
+    <b>INTERPRETATION:</b> {interpretation}
     </div>
     """, unsafe_allow_html=True)
 
 # TAB 3: The Economics - Tip vs Surcharge
-with tab3:
+def render_economics_tab():
+    """Tab 3: tip percentage vs surcharge"""
     st.markdown('<h2 class="sub-header">💰 THE ECONOMICS: TIP PERCENTAGE VS SURCHARGE ANALYSIS</h2>', unsafe_allow_html=True)
+    seeded_notice("tip_crowding")
     
     st.markdown("""
     <div style="font-size: 20px; color: #e2e8f0; background: linear-gradient(135deg, #1e293b, #334155); padding: 25px; border-radius: 12px; margin-bottom: 30px; border-left: 6px solid #64748b; border-right: 6px solid #64748b;">
@@ -680,7 +1363,8 @@ with tab3:
     display_plot(
         monthly_chart_path,
         "MONTHLY AVERAGE SURCHARGE VS TIP PERCENTAGE (2025)",
-        "Bars = Average Surcharge ($), Line = Average Tip Percentage (%)"
+        "Bars = Average Surcharge ($), Line = Average Tip Percentage (%)",
+        width=1600
     )
     
     # Correlation Plots
@@ -690,12 +1374,25 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
     
-    correlation_plot_path = VISUALIZATIONS_DIR / "tip_crowding_correlation_plots.png"
-    display_plot(
-        correlation_plot_path,
-        "SURCHARGE VS TIP PERCENTAGE CORRELATION",
-        "Each point represents an individual taxi trip"
-    )
+    tip_crowding = results.get("tip_crowding", {})
+    tips = [(t, tip_crowding["taxi_types"][t]) for t in ("yellow", "green") if t in tip_crowding.get("taxi_types", {})]
+    
+    tip_density = read_tip_density()
+    density_types = [(t, summary) for t, summary in tips if tip_density and t in tip_density["taxi_types"]]
+    if density_types:
+        for column, (taxi_type, summary) in zip(st.columns(2), density_types):
+            with column:
+                display_figure(tip_density_figure(tip_density, taxi_type, summary),
+                               f"{taxi_type.upper()} TAXI: SURCHARGE VS TIP PERCENTAGE",
+                               "Trips per surcharge / tip % cell (log scale) | Line = least-squares fit")
+    else:
+        correlation_plot_path = VISUALIZATIONS_DIR / "tip_crowding_correlation_plots.png"
+        display_plot(
+            correlation_plot_path,
+            "SURCHARGE VS TIP PERCENTAGE CORRELATION",
+            "Each point represents an individual taxi trip",
+            width=1600
+        )
     
     # Display correlation metrics - LARGER
     st.markdown("""
@@ -704,15 +1401,16 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Yellow Correlation", "+0.390", "Strong Positive", delta_color="off")
-    with col2:
-        st.metric("Green Correlation", "+0.006", "No Correlation", delta_color="off")
-    with col3:
-        st.metric("Yellow Avg Tip", "40.66%", "$2.19 avg surcharge", delta_color="off")
-    with col4:
-        st.metric("Green Avg Tip", "34.85%", "$0.91 avg surcharge", delta_color="off")
+    if not tips:
+        missing_notice("tip crowding figures")
+        return
+    columns = iter(st.columns(4))
+    for taxi_type, summary in tips:
+        with next(columns):
+            st.metric(f"{taxi_type.title()} Correlation", f"{summary['correlation']:+.3f}", summary['label'], delta_color="off")
+    for taxi_type, summary in tips:
+        with next(columns):
+            st.metric(f"{taxi_type.title()} Avg Tip", f"{summary['avg_tip_pct']:.2f}%", f"${summary['avg_surcharge']:.2f} avg surcharge", delta_color="off")
     
     # Hypothesis testing
     st.markdown("""
@@ -721,34 +1419,55 @@ with tab3:
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
+    # A negative correlation supports the hypothesis: judged on its bootstrap interval when the
+    # results have one, else on the |r| >= 0.1 cut-off behind the "No Correlation" label
+    directions = {taxi_type: evidence(summary['correlation'], summary.get("ci", {}).get("correlation"), 0.1) for taxi_type, summary in tips}
+    outcomes = {taxi_type: -direction for taxi_type, direction in directions.items()}
+    higher = [taxi_type for taxi_type, direction in directions.items() if direction == 1]
+    lower = [taxi_type for taxi_type, direction in directions.items() if direction == -1]
+    neither = [taxi_type for taxi_type, direction in directions.items() if direction == 0]
+    interpretation = []
+    if higher:
+        interpretation += [
+            f"For {' and '.join(higher)} taxis, higher surcharges are actually associated with HIGHER tips",
+            "Possible explanations:<br>"
+            "&nbsp;&nbsp;&nbsp;&nbsp;• Passengers view the surcharge as part of \"premium service\"<br>"
+            "&nbsp;&nbsp;&nbsp;&nbsp;• Longer/more expensive trips have both higher surcharges AND higher tips<br>"
+            "&nbsp;&nbsp;&nbsp;&nbsp;• No evidence of \"crowding out\" effect on driver income",
+        ]
+    if lower:
+        interpretation.append(f"For {' and '.join(lower)} taxis, higher surcharges are associated with LOWER tips - "
+                              "passengers appear to offset the toll by tipping less (\"crowding out\")")
+    if neither:
+        interpretation.append(f"{' and '.join(neither).capitalize()} taxis show no significant relationship")
+    if lower:
+        policy = f"Congestion pricing may be reducing driver compensation through lower tips for {' and '.join(lower)} taxis."
+    else:
+        policy = "Congestion pricing does not appear to negatively impact driver compensation through reduced tips."
+    
+    st.markdown(f"""
     <div class="insight-box">
     <b>HYPOTHESIS:</b> "Higher congestion surcharges reduce disposable income passengers leave for drivers"<br><br>
     
     <b>EXPECTED:</b> NEGATIVE correlation (higher surcharge → lower tips)<br><br>
     
     <b>ACTUAL FINDINGS:</b><br>
-    • Yellow Taxis: <span style="color: #4ade80; font-weight: 800; font-size: 20px;">+0.390 correlation</span> (POSITIVE)<br>
-    • Green Taxis: <span style="color: #cbd5e1; font-weight: 800; font-size: 20px;">+0.006 correlation</span> (NO CORRELATION)<br><br>
+    {"".join(f"• {taxi_type.title()} Taxis: {correlation_span(summary)}<br>" for taxi_type, summary in tips)}<br>
     
-    <b>CONCLUSION:</b> The hypothesis is <b style="color: #f87171; font-size: 24px;">STRONGLY CONTRADICTED</b>.<br><br>
+    <b>CONCLUSION:</b> The hypothesis is {verdict_text(outcomes)}.<br><br>
     
     <b>INTERPRETATION:</b><br>
-    1. For yellow taxis, higher surcharges are actually associated with HIGHER tips<br>
-    2. Possible explanations:<br>
-       &nbsp;&nbsp;&nbsp;&nbsp;• Passengers view the surcharge as part of "premium service"<br>
-       &nbsp;&nbsp;&nbsp;&nbsp;• Longer/more expensive trips have both higher surcharges AND higher tips<br>
-       &nbsp;&nbsp;&nbsp;&nbsp;• No evidence of "crowding out" effect on driver income<br>
-    3. Green taxis show no significant relationship<br><br>
-    
-    <b>POLICY IMPLICATION:</b> Congestion pricing does not appear to negatively impact 
-    driver compensation through reduced tips.
+    {"".join(f"{i}. {item}<br>" for i, item in enumerate(interpretation, start=1))}<br>
+    
+    <b>POLICY IMPLICATION:</b> {policy}
     </div>
     """, unsafe_allow_html=True)
 
 # TAB 4: The Weather - Rain Elasticity
-with tab4:
+def render_weather_tab():
+    """Tab 4: rain elasticity of demand"""
     st.markdown('<h2 class="sub-header">🌧️ THE WEATHER: RAIN ELASTICITY OF DEMAND</h2>', unsafe_allow_html=True)
+    seeded_notice("weather")
     
     st.markdown("""
     <div style="font-size: 20px; color: #e2e8f0; background: linear-gradient(135deg, #1e293b, #334155); padding: 25px; border-radius: 12px; margin-bottom: 30px; border-left: 6px solid #64748b; border-right: 6px solid #64748b;">
@@ -767,12 +1486,19 @@ with tab4:
     </div>
     """, unsafe_allow_html=True)
     
+    weather = results.get("weather")
     rain_plot_path = VISUALIZATIONS_DIR / "rain_tax_analysis_real_api.png"
     display_plot(
         rain_plot_path,
         "DAILY TRIP COUNT VS PRECIPITATION (MM)",
-        "Analysis for the wettest month of 2025 (May) | Trend: y = -76x + 125984"
+        f"Analysis for the wettest month of {weather['wettest_month'].split()[-1]} ({weather['wettest_month'].split()[0]}) | "
+        f"Trend: y = {weather['wettest_month_trend']['slope']:.0f}x + {weather['wettest_month_trend']['intercept']:.0f}"
+        if weather else "",
+        width=1600
     )
+    if not weather:
+        missing_notice("weather figures")
+        return
     
     # Display metrics - LARGER
     st.markdown("""
@@ -783,13 +1509,13 @@ with tab4:
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Rain Correlation", "+0.041", "Weak Positive", delta_color="off")
+        st.metric("Rain Correlation", f"{weather['rain_correlation']:+.3f}", weather['rain_correlation_label'], delta_color="off")
     with col2:
-        st.metric("Rain Elasticity", "-0.40%", "Per mm rain", delta_color="off")
+        st.metric("Rain Elasticity", f"{weather['elasticity_pct_per_mm']:.2f}%", "Per mm rain", delta_color="off")
     with col3:
-        st.metric("Wettest Month", "May 2025", "200 mm rain", delta_color="off")
+        st.metric("Wettest Month", weather['wettest_month'], f"{weather['wettest_month_mm']:.0f} mm rain", delta_color="off")
     with col4:
-        st.metric("Rainy Days", "169", "47.3% of days", delta_color="off")
+        st.metric("Rainy Days", f"{weather['rainy_days']}", f"{weather['rainy_days_pct']:.1f}% of days", delta_color="off")
     
     # Additional weather insights
     st.markdown("""
@@ -798,32 +1524,38 @@ with tab4:
     </div>
     """, unsafe_allow_html=True)
     
+    latitude, longitude = CENTRAL_PARK
+    coordinates = f"{abs(latitude):.4f}° {'N' if latitude >= 0 else 'S'}, {abs(longitude):.4f}° {'W' if longitude < 0 else 'E'}"
+    start, end = pd.Timestamp(weather['date_start']), pd.Timestamp(weather['date_end'])
+    period = (f"{start:%b} {start.day} - {end:%b} {end.day}, {end.year}" if start.year == end.year
+              else f"{start:%b} {start.day}, {start.year} - {end:%b} {end.day}, {end.year}")
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
         <b style="font-size: 24px; color: #f1f5f9;">WEATHER DATA SOURCE:</b><br><br>
         <span style="font-size: 18px;">
         • API: Open-Meteo Historical<br>
         • Location: Central Park, NYC<br>
-        • Coordinates: 40.7812° N, 73.9665° W<br>
-        • Period: Jan 1 - Dec 31, 2025<br>
-        • Total Precipitation: 1083 mm
+        • Coordinates: {coordinates}<br>
+        • Period: {period}<br>
+        • Total Precipitation: {weather['total_precipitation_mm']:.0f} mm
         </span>
         </div>
         """, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
+        st.markdown(f"""
         <div class="metric-card">
         <b style="font-size: 24px; color: #f1f5f9;">TAXI DATA SUMMARY:</b><br><br>
         <span style="font-size: 18px;">
         • Source: NYC TLC Processed Data<br>
-        • Total Trips Analyzed: 43.2M<br>
-        • Average Daily Trips: 121,124<br>
-        • Date Range: 2025-01-01 to 2025-11-30<br>
-        • Rainy Day Trips: +7.1% higher
+        • Total Trips Analyzed: {weather['total_trips'] / 1e6:.1f}M<br>
+        • Average Daily Trips: {weather['avg_daily_trips']:,.0f}<br>
+        • Date Range: {weather['date_start']} to {weather['date_end']}<br>
+        • Rainy Day Trips: {weather['rainy_day_change_pct']:+.1f}% {'higher' if weather['rainy_day_change_pct'] >= 0 else 'lower'}
         </span>
         </div>
         """, unsafe_allow_html=True)
@@ -835,36 +1567,80 @@ with tab4:
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
+    # The "Rain Tax" hypothesis expects fewer trips on rainy days; a 5% gap either way counts
+    inelastic = weather['elasticity_label'] == "Inelastic"
+    rainy_change = weather['rainy_day_change_pct']
+    rain_effect = evidence(rainy_change, None, 5)
+    impact = "Weather has minimal impact on taxi usage" if inelastic else "Weather has a substantial impact on taxi usage"
+    if rain_effect == -1:
+        demand = "Taxi demand drops on rainy days"
+        rain_tax = f"Consistent with the \"Rain Tax\" hypothesis, rainy days see {abs(rainy_change):.1f}% fewer trips"
+    elif rain_effect == 1:
+        demand = "Taxi demand rises on rainy days"
+        rain_tax = f"Contrary to \"Rain Tax\" hypothesis, rainy days see {rainy_change:.1f}% more trips, not fewer"
+    else:
+        demand = "Taxi demand is relatively weather-resistant"
+        rain_tax = "Contrary to \"Rain Tax\" hypothesis, rainfall doesn't significantly deter taxi usage"
+    if rain_effect == -1:
+        policy = "Demand falls with rain, so dynamic toll adjustment during heavy rain is worth evaluating."
+    elif inelastic:
+        policy = ("Dynamic toll adjustment during heavy rain may not be necessary since rain does not reduce demand. "
+                  "Focus on other factors for demand forecasting.")
+    else:
+        policy = "Demand responds strongly to rain, so rainfall belongs in demand forecasting and toll planning."
+    
+    st.markdown(f"""
     <div class="insight-box">
-    <b>RAIN ELASTICITY OF DEMAND: -0.40% per mm</b><br><br>
+    <b>RAIN ELASTICITY OF DEMAND: {weather['elasticity_pct_per_mm']:.2f}% per mm</b><br><br>
     
     <b>INTERPRETATION:</b> For every 1mm increase in daily precipitation, taxi demand 
-    changes by approximately -0.40%.<br><br>
+    changes by approximately {weather['elasticity_pct_per_mm']:.2f}%.<br><br>
     
-    <b>CLASSIFICATION:</b> <span style="color: #cbd5e1; font-weight: 800; font-size: 20px;">INELASTIC DEMAND</span><br>
+    <b>CLASSIFICATION:</b> <span style="color: #cbd5e1; font-weight: 800; font-size: 20px;">{weather['elasticity_label'].upper()} DEMAND</span><br>
     - Absolute value < 1.0 indicates inelastic demand<br>
-    - Weather has minimal impact on taxi usage<br><br>
+    - {impact}<br><br>
     
     <b>KEY FINDINGS:</b><br>
-    1. Weak positive correlation (0.041) between rain and taxi demand<br>
-    2. Taxi demand is relatively weather-resistant<br>
-    3. Contrary to "Rain Tax" hypothesis, rainfall doesn't significantly deter taxi usage<br>
-    4. Average trips on rainy days: 125,498 vs dry days: 117,191 (+7.1%)<br><br>
+    1. {weather['rain_correlation_label'].capitalize()} correlation ({weather['rain_correlation']:.3f}) between rain and taxi demand<br>
+    2. {demand}<br>
+    3. {rain_tax}<br>
+    4. Average trips on rainy days: {weather['rainy_day_avg_trips']:,.0f} vs dry days: {weather['dry_day_avg_trips']:,.0f} ({weather['rainy_day_change_pct']:+.1f}%)<br><br>
     
-    <b>POLICY RECOMMENDATION:</b> Dynamic toll adjustment during heavy rain may not be 
-    necessary since demand remains stable. Focus on other factors for demand forecasting.
+    <b>POLICY RECOMMENDATION:</b> {policy}
     </div>
     """, unsafe_allow_html=True)
 
+# Create 4 tabs with MUCH LARGER labels (24px font size)
+TABS = {
+    "🗺️ TAB 1: THE MAP": render_map_tab,
+    "📊 TAB 2: THE FLOW": render_flow_tab,
+    "💰 TAB 3: THE ECONOMICS": render_economics_tab,
+    "🌧️ TAB 4: THE WEATHER": render_weather_tab,
+}
+
+# st.tabs runs every tab body on each rerun, so by default a tab selector is used
+# and only the active tab is computed. DASHBOARD_EAGER_TABS=1 restores st.tabs.
+if os.environ.get("DASHBOARD_EAGER_TABS") == "1":
+    for tab, (tab_name, render_tab) in zip(st.tabs(list(TABS)), TABS.items()):
+        with tab, timed(f"tab: {tab_name}"):
+            render_tab()
+else:
+    active_tab = st.radio("Dashboard section", list(TABS), horizontal=True,
+                          key="active_tab", label_visibility="collapsed")
+    with timed(f"tab: {active_tab}"):
+        TABS[active_tab]()
+
 # Footer with larger text
-st.markdown("""
+# A results file that was only seeded from the reports has never been built
+generated = (f"{datetime.fromisoformat(results['generated_at']):%B %-d, %Y}" if "generated_at" in results
+             else "seeded from the analysis reports")
+st.markdown(f"""
 <div class="footer">
 <b style="font-size: 22px; color: #f1f5f9;">NYC CONGESTION PRICING AUDIT DASHBOARD</b><br>
 <span style="font-size: 18px; color: #cbd5e1;">
 Data Source: NYC TLC Trip Record Data | 
 Analysis Period: 2024-2025 | 
-Generated: February 7, 2026 | 
+Generated: {generated} | 
 Lead Data Scientist: Transportation Consultancy
 </span>
 </div>
@@ -888,6 +1664,13 @@ with st.sidebar:
         3. Deployed via share.streamlit.io<br>
         4. Public link: <code>https://nyc-congestion.streamlit.app</code><br><br>
         
+        <b style="font-size: 18px; color: #f1f5f9;">Build Step (before each deploy):</b><br>
+        1. <code>python -m analysis.build</code> - results.json and outputs/artifacts/
+        (zone_map.json needs the shapefile in data/raw/taxi_zones/)<br>
+        2. <code>python -m analysis.images</code> - static/images/<br>
+        3. Commit outputs/ and static/images/ - Streamlit Cloud runs no build, so
+        missing artifacts fall back to the static PNGs<br><br>
+        
         <b style="font-size: 18px; color: #f1f5f9;">Files Structure:</b><br>
         <code style="color: #94a3b8;">
         dashboard.py (this file)<br>
@@ -896,7 +1679,30 @@ with st.sidebar:
         &nbsp;&nbsp;├── border_effect_*.png<br>
         &nbsp;&nbsp;├── congestion_velocity_*.png<br>
         &nbsp;&nbsp;├── tip_crowding_*.png<br>
-        &nbsp;&nbsp;└── rain_tax_*.png
+        &nbsp;&nbsp;└── rain_tax_*.png<br>
+        outputs/results.json<br>
+        outputs/artifacts/<br>
+        &nbsp;&nbsp;├── zone_map.json, border_zones.json<br>
+        &nbsp;&nbsp;└── velocity_cube.npz, tip_density.npz, daily_index.npz<br>
+        static/images/ (python -m analysis.images)<br>
+        .streamlit/config.toml (enableStaticServing)
         </code>
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+
+# Hidden diagnostics panel with per-section timings for this session and all sessions
+run_timings.append(("script", time.perf_counter() - script_start))
+session_timings, global_timings = record_run_timings()
+if DIAGNOSTICS:
+    with st.sidebar, st.expander("⏱️ DIAGNOSTICS", expanded=False):
+        st.caption(f"Session {session_timings['session_id']} | {len(session_timings['runs'])} runs here, "
+                   f"{global_timings['runs']} across all sessions | times include nested sections")
+        st.markdown("**This session**")
+        st.dataframe(timing_frame(session_timings["sections"]), hide_index=True, use_container_width=True)
+        st.markdown("**All sessions**")
+        with global_timings["lock"]:
+            global_sections = {section: dict(stats) for section, stats in global_timings["sections"].items()}
+        st.dataframe(timing_frame(global_sections), hide_index=True, use_container_width=True)
+        st.download_button("Export timings (JSON lines)", data=timings_jsonl(session_timings, global_sections),
+                           file_name=f"dashboard_timings_{session_timings['session_id']}.jsonl",
+                           mime="application/x-ndjson", use_container_width=True)
@@ -0,0 +1,63 @@
+"""
+Tests for the on-disk precipitation cache, run against the file-backed provider
+Run with: python -m pytest tests
+"""
+
+import pandas as pd
+
+from analysis.weather import FileProvider, WeatherCache
+
+LATITUDE, LONGITUDE = 40.7829, -73.9654
+
+
+class RecordingProvider(FileProvider):
+    """FileProvider that records the ranges it is asked for"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+
+    def fetch(self, latitude, longitude, start, end):
+        self.calls.append((start, end))
+        return super().fetch(latitude, longitude, start, end)
+
+
+def write_precipitation(path, start, end):
+    """Daily precipitation CSV with a distinct value per day"""
+    dates = pd.date_range(start, end, freq="D")
+    pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "precipitation_mm": range(len(dates))}).to_csv(path, index=False)
+
+
+def test_overlapping_fetch_only_requests_missing_days(tmp_path):
+    source = tmp_path / "precipitation.csv"
+    write_precipitation(source, "2025-01-01", "2025-01-31")
+    provider = RecordingProvider(source)
+    cache = WeatherCache(provider, cache_dir=tmp_path / "cache")
+
+    first = cache.daily_precipitation(LATITUDE, LONGITUDE, "2025-01-01", "2025-01-10")
+    second = cache.daily_precipitation(LATITUDE, LONGITUDE, "2025-01-05", "2025-01-15")
+
+    assert len(first) == 10 and len(second) == 11
+    # Only the days after the first range are fetched again
+    assert provider.calls == [
+        (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-10")),
+        (pd.Timestamp("2025-01-11"), pd.Timestamp("2025-01-15")),
+    ]
+    assert second["precipitation_mm"].tolist() == list(range(4, 15))
+
+
+def test_cached_range_is_served_without_fetching(tmp_path):
+    source = tmp_path / "precipitation.csv"
+    write_precipitation(source, "2025-01-01", "2025-01-31")
+    WeatherCache(FileProvider(source), cache_dir=tmp_path / "cache").daily_precipitation(
+        LATITUDE, LONGITUDE, "2025-01-01", "2025-01-31"
+    )
+
+    # A fresh cache object over the same directory reads the file written above
+    provider = RecordingProvider(source)
+    daily = WeatherCache(provider, cache_dir=tmp_path / "cache").daily_precipitation(
+        LATITUDE, LONGITUDE, "2025-01-10", "2025-01-20"
+    )
+
+    assert provider.calls == []
+    assert daily["date"].dt.strftime("%Y-%m-%d").tolist() == [f"2025-01-{day}" for day in range(10, 21)]